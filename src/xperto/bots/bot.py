@@ -5,14 +5,21 @@
 # SPDX-License-Identifier: BSD 2-Clause License
 #
 
+import datetime
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
 
 from pipecat.adapters.schemas.tools_schema import ToolsSchema
-from pipecat.frames.frames import BotInterruptionFrame, LLMRunFrame, TTSSpeakFrame
+from pipecat.frames.frames import (
+    BotInterruptionFrame,
+    BotStartedSpeakingFrame,
+    LLMRunFrame,
+    TTSSpeakFrame,
+)
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
@@ -26,12 +33,49 @@ from pipecat.transports.base_transport import BaseTransport
 from pipecat.transports.local.audio import LocalAudioTransport
 
 from ..config import APIKeysConfig, AppConfig
+from ..utils.answer_cache import AnswerCache
+from ..utils.audio_wake_gate import AudioWakeGate, KeywordSpotter
 from ..utils.audiobuffer_handler import AudioBufferHandler
+from ..utils.config_registry import ConfigRegistry, ConfigSnapshot
+from ..utils.hedged_llm import HedgedOpenAILLMService
+from ..utils.meeting_notes import MeetingNotes, RecapProcessor
+from ..utils.memory_budget import (
+    SessionMemoryAccountant,
+    approx_size,
+    audio_buffer_bytes,
+    install_tracemalloc_handler,
+    spill_tool_results,
+)
+from ..utils.pipeline_instrumentation import PipelineInstrumentation
+from ..utils.prompt_cache import PromptCache
 from ..utils.context_manager import ConversationContextManager
 from ..utils.context_saver import ContextSaverProcessor
+from ..utils.rate_scheduler import (
+    LLM_SCHEDULER,
+    WEB_SCHEDULER,
+    get_shared_rate_scheduler,
+    rate_limit_llm_service,
+)
+from ..utils.relevance_gate import RelevanceGate, create_relevance_classifier
+from ..utils.sampling_profiler import (
+    SamplingProfiler,
+    install_profile_toggle,
+    remove_profile_toggle,
+)
+from ..utils.segmented_recorder import RECORDING_CHUNK_BYTES, SegmentedRecorder
+from ..utils.storage_janitor import StorageJanitor
+from ..utils.supervisor import mark_worker_ready
 from ..utils.transcript_handler import TranscriptHandler
 from ..utils.wake_check_buffer import WakeCheckBuffer
-from ..utils.function_calling import web_fetch, web_fetch_schema, web_search, web_search_schema
+from ..utils.worker_pool import report_pool_event
+from ..utils.function_calling import (
+    create_kb_search,
+    kb_search_schema,
+    web_fetch,
+    web_fetch_schema,
+    web_search,
+    web_search_schema,
+)
 
 logger.remove(0)
 logger.add(sys.stderr, level="DEBUG")
@@ -43,10 +87,17 @@ class SimpleBot:
         config: AppConfig,
         api_keys: APIKeysConfig,
         resume_session_id: Optional[str] = None,
+        config_registry: Optional[ConfigRegistry] = None,
+        session_id: Optional[str] = None,
+        transcript_file: Optional[str] = None,
     ):
         self.config = config
         self.api_keys = api_keys
         self.resume_session_id = resume_session_id
+        # Set by the supervisor, so a restarted worker continues the same session
+        self.fixed_session_id = session_id
+        self.transcript_file = transcript_file
+        self.config_registry = config_registry or ConfigRegistry(lambda: config)
 
         self.context: Optional[OpenAILLMContext] = None
         self.context_aggregator = None
@@ -56,17 +107,81 @@ class SimpleBot:
         self.context_saver: Optional[ContextSaverProcessor] = None
         self.session_id: Optional[str] = None
         self.session_metadata: Optional[dict] = None
+        self.recovered_messages: list[dict] = []
+        self.wake_check: Optional[WakeCheckBuffer] = None
+        self.audio_wake_gate: Optional[AudioWakeGate] = None
+        self.tools: Optional[ToolsSchema] = None
+        self.prompt_cache: Optional[PromptCache] = None
+        self.meeting_notes: Optional[MeetingNotes] = None
+        # Wall-clock time a warm pool worker was asked to join, for the join latency
+        self.join_requested_at: Optional[float] = None
+        self._services: Optional[tuple[STTService, TTSService, LLMService]] = None
+
+    def create_services(self):
+        """Create the STT, TTS and LLM services ahead of `run` (warm pool workers)."""
+        self._services = (
+            self._create_stt_service(),
+            self._create_tts_service(),
+            self._create_llm_service(),
+        )
+
+    async def warm_up(self):
+        """Take the first-request costs of the LLM client ahead of `run` (warm pool workers).
+
+        The OpenAI client imports its API resources and the HTTP stack its
+        async backend on first use (~2s), and the first request opens the
+        connection. All of that would delay the greeting. Listing the models
+        costs nothing and the connection is kept for the greeting.
+        """
+        if not self._services:
+            return
+        llm = self._services[2]
+        clients = {id(llm._client): llm._client}
+        secondary = getattr(llm, "_secondary_client", None)
+        if secondary is not None:
+            clients[id(secondary)] = secondary
+        for client in clients.values():
+            client.chat.completions
+            try:
+                await client.models.list()
+            except Exception as e:
+                logger.warning(f"LLM warm-up request failed: {e}")
 
     async def run(self, transport: BaseTransport) -> None:
-        self.audiobuffer = AudioBufferProcessor()
-        audiobuffer_handler = AudioBufferHandler(
-            output_folder=Path(self.config.paths.recordings),
-            output_name=Path(__file__).stem,
-        )
+        segmented_recorder = None
+        audio_budget = int(self.config.memory.audio_buffer_mb * 1024 * 1024)
+        if (
+            self.config.bot.audio_segment_secs
+            or self.config.bot.audio_segment_max_mb
+            or audio_budget
+        ):
+            # Drain the buffer in chunks so memory stays bounded by one chunk
+            # (and the memory budget), without segment limits into one file per track
+            chunk_bytes = RECORDING_CHUNK_BYTES
+            if audio_budget:
+                chunk_bytes = min(chunk_bytes, audio_budget // 2)
+            self.audiobuffer = AudioBufferProcessor(buffer_size=chunk_bytes)
+            audiobuffer_handler = segmented_recorder = SegmentedRecorder(
+                output_folder=Path(self.config.paths.recordings),
+                output_name=Path(__file__).stem,
+                segment_secs=self.config.bot.audio_segment_secs,
+                segment_max_bytes=int(self.config.bot.audio_segment_max_mb * 1024 * 1024),
+            )
+        else:
+            self.audiobuffer = AudioBufferProcessor()
+            audiobuffer_handler = AudioBufferHandler(
+                output_folder=Path(self.config.paths.recordings),
+                output_name=Path(__file__).stem,
+                postprocess_tracks=self.config.bot.audio_separate_tracks,
+            )
 
-        stt = self._create_stt_service()
-        tts = self._create_tts_service()
-        llm = self._create_llm_service()
+        if self._services:
+            stt, tts, llm = self._services
+            self._services = None
+        else:
+            stt = self._create_stt_service()
+            tts = self._create_tts_service()
+            llm = self._create_llm_service()
 
         @llm.event_handler("on_function_calls_started")
         async def on_function_calls_started(service, function_calls):
@@ -88,10 +203,12 @@ class SimpleBot:
                 logger.error(f"Failed to resume session {self.resume_session_id}: {e}")
                 logger.info("Starting new session instead")
                 self.context = OpenAILLMContext()
-                self.session_id = self.context_manager.generate_session_id()
+                self.session_id = (
+                    self.fixed_session_id or self.context_manager.generate_session_id()
+                )
         else:
             self.context = OpenAILLMContext()
-            self.session_id = self.context_manager.generate_session_id()
+            self.session_id = self.fixed_session_id or self.context_manager.generate_session_id()
 
         standard_tools = []
         for tool in self.config.services.llm.tools:
@@ -102,9 +219,21 @@ class SimpleBot:
                 case "web_fetch":
                     llm.register_function("web_fetch", web_fetch, cancel_on_interruption=True)
                     standard_tools.append(web_fetch_schema)
-
-        tools = ToolsSchema(standard_tools=standard_tools)
-        self.context.set_tools(tools)
+                case "kb_search":
+                    knowledge_base = self.config.services.llm.knowledge_base
+                    llm.register_function(
+                        "kb_search",
+                        create_kb_search(
+                            knowledge_base.index_dir,
+                            top_k=knowledge_base.top_k,
+                            max_tokens=knowledge_base.max_tokens,
+                        ),
+                        cancel_on_interruption=True,
+                    )
+                    standard_tools.append(kb_search_schema)
+
+        self.tools = ToolsSchema(standard_tools=standard_tools)
+        self.context.set_tools(self.tools)
         self.context_aggregator = llm.create_context_aggregator(self.context)
 
         # Create context saver processor
@@ -113,36 +242,138 @@ class SimpleBot:
             context_manager=self.context_manager,
             session_id=self.session_id,
             config_name=self.config.config_name,
+            config_version=self.config_registry.current.version,
             save_interval=60.0,  # Save every minute
         )
 
-        wake_check = WakeCheckBuffer(
+        self.wake_check = WakeCheckBuffer(
             wake_phrases=self.config.bot.assistant_names,
             keepalive_timeout_secs=self.config.bot.keepalive_timeout_secs,
+            per_speaker=self.config.bot.per_speaker_wake,
+            max_buffered_frames=self.config.bot.wake_buffer_max_frames,
         )
 
         transcript = TranscriptProcessor()
         self.transcript_handler = TranscriptHandler(
             output_folder=Path(self.config.paths.transcripts),
             output_name=Path(__file__).stem,
+            file_name=self.transcript_file,
         )
+        # Link the transcripts to the session, a resumed session has several
+        transcript_files = list((self.session_metadata or {}).get("transcript_files", []))
+        output_file = self.transcript_handler.output_file
+        if output_file:
+            # A restarted worker appends to the transcript of the crashed one,
+            # recover the lines written after the last context save
+            if output_file.exists():
+                offset = 0
+                if transcript_files and transcript_files[-1] == output_file.name:
+                    offset = self.session_metadata.get("transcript_offset", 0)
+                self.recovered_messages = self.transcript_handler.read_messages(offset)
+            if output_file.name not in transcript_files:
+                transcript_files.append(output_file.name)
+        self.context_saver.set_transcript_files(transcript_files, output_file)
+
+        notes_config = self.config.services.llm.meeting_notes
+        if notes_config.enabled:
+            scheduler = get_shared_rate_scheduler(LLM_SCHEDULER)
+            saved_notes = (self.session_metadata or {}).get("meeting_notes")
+            self.meeting_notes = MeetingNotes(
+                self.api_keys.openai_api_key,
+                notes_config.model,
+                interval_secs=notes_config.interval_secs,
+                max_lines=notes_config.max_lines,
+                scheduler=scheduler if scheduler.limited else None,
+                state=saved_notes,
+                # Notes started in the middle of a resumed session miss its start
+                complete=not self.session_metadata or saved_notes is not None,
+            )
+            self.context_saver.set_meeting_notes(self.meeting_notes)
+
+        if self.config.bot.audio_wake:
+            self.audio_wake_gate = AudioWakeGate(
+                KeywordSpotter(
+                    self.config.bot.assistant_names,
+                    model=self.config.bot.audio_wake_model,
+                    language=self.config.bot.language.lower(),
+                ),
+                keepalive_timeout_secs=self.config.bot.keepalive_timeout_secs,
+                preroll_secs=self.config.bot.audio_wake_preroll_secs,
+            )
+            stt_processors = [self.audio_wake_gate, stt, self.audio_wake_gate.bypass]
+        else:
+            stt_processors = [stt]
+
+        user_processors = [
+            transport.input(),
+            *stt_processors,
+            transcript.user(),
+            self.wake_check,
+        ]
 
-        pipeline = Pipeline(
-            [
-                transport.input(),
-                stt,
-                transcript.user(),
-                wake_check,
-                self.context_aggregator.user(),
+        relevance_classifier = create_relevance_classifier(
+            self.config.bot.relevance_gate, self.config.bot.assistant_names
+        )
+        if relevance_classifier:
+            user_processors.append(RelevanceGate(relevance_classifier))
+
+        llm_processors = [llm]
+        answer_cache_config = self.config.services.llm.answer_cache
+        if answer_cache_config.enabled:
+            answer_cache = AnswerCache(
+                ttl_secs=answer_cache_config.ttl_secs,
+                similarity_threshold=answer_cache_config.similarity,
+                max_entries=answer_cache_config.max_entries,
+            )
+            llm_processors = [answer_cache.lookup(), llm, answer_cache.store()]
+        if self.config.services.llm.prompt_cache.enabled:
+            self.prompt_cache = PromptCache(
+                metrics_path=Path(self.config.paths.metrics)
+                / f"{self.session_id}_prompt_cache.jsonl"
+            )
+            index = llm_processors.index(llm)
+            llm_processors[index : index + 1] = [
+                self.prompt_cache.guard(),
                 llm,
-                tts,
-                transport.output(),
-                self.audiobuffer,
-                transcript.assistant(),
-                self.context_aggregator.assistant(),
-                self.context_saver,
+                self.prompt_cache.metrics(),
             ]
-        )
+        if self.meeting_notes:
+            # First, so the answer cache and prompt cache see the recap context
+            recap = RecapProcessor(
+                self.meeting_notes,
+                prefix=lambda: self._prefix_messages(self.config_registry.current),
+            )
+            llm_processors.insert(0, recap)
+
+        processors = [
+            *user_processors,
+            self.context_aggregator.user(),
+            *llm_processors,
+            tts,
+            transport.output(),
+            self.audiobuffer,
+            transcript.assistant(),
+            self.context_aggregator.assistant(),
+            self.context_saver,
+        ]
+
+        instrumentation = None
+        instrumentation_config = self.config.instrumentation
+        if instrumentation_config.enabled:
+            snapshot_path = None
+            if instrumentation_config.json_snapshots:
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                snapshot_path = (
+                    Path(self.config.paths.metrics) / f"{timestamp}_instrumentation.jsonl"
+                )
+            instrumentation = PipelineInstrumentation(
+                sample_every=instrumentation_config.sample_every,
+                report_interval_secs=instrumentation_config.report_interval_secs,
+                snapshot_path=snapshot_path,
+            )
+            instrumentation.instrument(processors)
+
+        pipeline = Pipeline(processors)
 
         self.task = PipelineTask(
             pipeline,
@@ -156,20 +387,36 @@ class SimpleBot:
             ),
         )
 
-        # Combined user and assistant audio.
-        self.audiobuffer.add_event_handler(
-            "on_audio_data", audiobuffer_handler.on_audio_data
-        )
+        @self.task.event_handler("on_pipeline_started")
+        async def on_pipeline_started(task, frame):
+            mark_worker_ready()
+            self._report_join_latency("joined")
+
+        if self.join_requested_at is not None:
+            self.task.set_reached_upstream_filter((BotStartedSpeakingFrame,))
+
+            @self.task.event_handler("on_frame_reached_upstream")
+            async def on_frame_reached_upstream(task, frame):
+                if self.join_requested_at is not None:
+                    self._report_join_latency("greeted")
+                    self.join_requested_at = None
 
-        # Separate files for user and assistant audio.
-        # This could help normalizing audio levels later on.
-        # audiobuffer.add_event_handler(
-        #     "on_track_audio_data", audiobuffer_handler.on_track_audio_data
-        # )
+        if self.config.bot.audio_separate_tracks:
+            # Separate files for user and assistant audio, normalized and mixed afterwards.
+            self.audiobuffer.add_event_handler(
+                "on_track_audio_data", audiobuffer_handler.on_track_audio_data
+            )
+        else:
+            # Combined user and assistant audio.
+            self.audiobuffer.add_event_handler(
+                "on_audio_data", audiobuffer_handler.on_audio_data
+            )
 
         @transcript.event_handler("on_transcript_update")
         async def on_transcript_update(processor, frame):
             await self.transcript_handler.on_transcript_update(processor, frame)
+            if self.meeting_notes:
+                self.meeting_notes.add_messages(frame.messages)
 
         @transport.event_handler("on_participant_joined")
         async def on_participant_joined(transport, participant):
@@ -187,8 +434,83 @@ class SimpleBot:
         else:
             from pipecat.pipeline.runner import PipelineRunner as Runner
 
+        self.config_registry.add_listener(self._on_config_reloaded)
+        if self.config.bot.hot_reload:
+            self.config_registry.start_watching()
+
+        storage_janitor = StorageJanitor(self.config.paths, self.config.storage)
+        storage_janitor.start()
+        if instrumentation:
+            instrumentation.start()
+        memory_accountant = self._create_memory_accountant()
+        memory_accountant.start()
+        if self.meeting_notes:
+            self.meeting_notes.start()
+        install_tracemalloc_handler(Path(self.config.paths.metrics))
+        profiler = SamplingProfiler(
+            Path(self.config.paths.metrics), self.session_id, self.config.config_name
+        )
+        install_profile_toggle(profiler)
+        if self.config.bot.profile:
+            profiler.start()
+
         runner = Runner()
-        await runner.run(self.task)
+        try:
+            await runner.run(self.task)
+        finally:
+            if instrumentation:
+                await instrumentation.stop()
+            remove_profile_toggle()
+            profiler.stop()
+            if self.meeting_notes:
+                await self.meeting_notes.stop()
+            await memory_accountant.stop()
+            for name in (LLM_SCHEDULER, WEB_SCHEDULER):
+                scheduler = get_shared_rate_scheduler(name)
+                if scheduler.limited:
+                    logger.info(f"Rate scheduler {name} stats: {scheduler.stats}")
+            await self.config_registry.stop_watching()
+            await storage_janitor.stop()
+            if segmented_recorder:
+                await segmented_recorder.close()
+
+    def _report_join_latency(self, event: str):
+        if self.join_requested_at is None:
+            return
+        latency_secs = time.time() - self.join_requested_at
+        logger.info(f"Join latency ({event}): {latency_secs * 1000:.0f}ms")
+        report_pool_event(event, latency_secs=latency_secs, session_id=self.session_id)
+
+    def _create_memory_accountant(self) -> SessionMemoryAccountant:
+        """Track the per-session structures that grow with the meeting length."""
+        memory = self.config.memory
+        accountant = SessionMemoryAccountant(check_interval_secs=memory.check_interval_secs)
+
+        accountant.track(
+            "transcript",
+            lambda: approx_size(self.transcript_handler.messages),
+            int(memory.transcript_mb * 1024 * 1024),
+            self.transcript_handler.trim_messages,
+        )
+        accountant.track(
+            "wake_buffer",
+            self.wake_check.buffered_bytes,
+            int(memory.wake_buffer_mb * 1024 * 1024),
+            self.wake_check.trim_buffers,
+        )
+        accountant.track(
+            "context",
+            lambda: approx_size(self.context.messages),
+            int(memory.context_mb * 1024 * 1024),
+            # Spill well below the budget, every spill changes the prompt and
+            # costs a provider cache miss, so it should happen rarely
+            lambda budget: spill_tool_results(
+                self.context.messages, int(budget * 0.75), self.context_manager.blobs
+            ),
+        )
+        # Enforced by the audio buffer itself, which flushes to disk at its buffer size
+        accountant.track("audio_buffer", lambda: audio_buffer_bytes(self.audiobuffer))
+        return accountant
 
     def _create_stt_service(self) -> STTService:
         match self.config.services.stt.provider:
@@ -210,16 +532,37 @@ class SimpleBot:
             case "speechmatics":
                 from pipecat.services.speechmatics.stt import SpeechmaticsSTTService
 
+                stt_config = self.config.services.stt
+                silence_trigger_secs = stt_config.silence_trigger_secs
+                if stt_config.turn_detection == "smart_turn":
+                    # Smart-turn decides when the turn ends, the STT only has to
+                    # finalize the words by then
+                    silence_trigger_secs = stt_config.smart_turn_vad_stop_secs
                 return SpeechmaticsSTTService(
                     api_key=self.api_keys.speechmatics_api_key,
                     params=SpeechmaticsSTTService.InputParams(
                         language=self.config.bot.language.lower(),
                         enable_diarization=True,
-                        end_of_utterance_silence_trigger=0.5,
+                        end_of_utterance_silence_trigger=silence_trigger_secs,
                         speaker_active_format="<{speaker_id}>{text}</{speaker_id}>",
                         speaker_passive_format="<PASSIVE><{speaker_id}>{text}</{speaker_id}></PASSIVE>",
                     ),
                 )
+            case "whisper":
+                from pipecat.transcriptions.language import Language
+
+                from ..utils.local_whisper_stt import LocalWhisperSTTService, whisper_model_name
+
+                stt_config = self.config.services.stt
+                # The default model is Deepgram's, only use an explicitly set one
+                model = stt_config.model if "model" in stt_config.model_fields_set else None
+                return LocalWhisperSTTService(
+                    model=whisper_model_name(model),
+                    device=self.config.services.stt.device,
+                    compute_type=self.config.services.stt.compute_type,
+                    language=Language(self.config.bot.language.lower()),
+                    interim_interval_secs=self.config.services.stt.interim_interval_secs,
+                )
             case _:
                 raise ValueError(
                     f"Unsupported STT provider: {self.config.services.stt.provider}"
@@ -239,9 +582,9 @@ class SimpleBot:
                     ),
                 )
             case "deepgram":
-                from pipecat.services.deepgram.tts import DeepgramTTSService
+                from ..utils.deepgram_tts import PooledDeepgramTTSService
 
-                return DeepgramTTSService(
+                return PooledDeepgramTTSService(
                     api_key=self.api_keys.deepgram_api_key,
                     voice=self.config.services.tts.voice,
                 )
@@ -251,17 +594,46 @@ class SimpleBot:
                 )
 
     def _create_llm_service(self) -> LLMService:
+        extra = {}
+        prompt_cache = self.config.services.llm.prompt_cache
+        if prompt_cache.enabled and prompt_cache.cache_key:
+            extra["prompt_cache_key"] = f"xperto-{self.config.config_name}"
+
         match self.config.services.llm.provider:
+            case "openai" if self.config.services.llm.hedging.enabled:
+                hedging = self.config.services.llm.hedging
+                llm = HedgedOpenAILLMService(
+                    api_key=self.api_keys.openai_api_key,
+                    model=self.config.services.llm.model,
+                    params=OpenAILLMService.InputParams(extra=extra),
+                    percentile=hedging.percentile,
+                    initial_delay_secs=hedging.initial_delay_secs,
+                    min_delay_secs=hedging.min_delay_secs,
+                    max_delay_secs=hedging.max_delay_secs,
+                    secondary_model=hedging.secondary_model,
+                    secondary_base_url=hedging.secondary_base_url,
+                    secondary_api_key=self.api_keys.llm_secondary_api_key,
+                )
             case "openai":
-                return OpenAILLMService(
+                llm = OpenAILLMService(
                     api_key=self.api_keys.openai_api_key,
                     model=self.config.services.llm.model,
+                    params=OpenAILLMService.InputParams(extra=extra),
                 )
             case _:
                 raise ValueError(
                     f"Unsupported LLM provider: {self.config.services.llm.provider}"
                 )
 
+        # Shared by all sessions of the process, so bursts don't run into 429s
+        rate_limit = self.config.services.llm.rate_limit
+        get_shared_rate_scheduler(WEB_SCHEDULER).configure(rate_limit.tool_requests_per_min, 0)
+        scheduler = get_shared_rate_scheduler(LLM_SCHEDULER)
+        scheduler.configure(rate_limit.requests_per_min, rate_limit.tokens_per_min)
+        if scheduler.limited:
+            rate_limit_llm_service(llm, scheduler)
+        return llm
+
     async def _handle_participant_joined(self, participant):
         """Reset the context and send startup message (unless resuming)"""
         logger.info(f"Participant {participant} joined the call.")
@@ -277,25 +649,82 @@ class SimpleBot:
             await self.context_aggregator.assistant().reset()
             self.context.messages.clear()
 
-            self.context.messages.extend(
-                [
-                    {
-                        "role": "system",
-                        "content": self.config.load_persona_prompt(),
-                    },
-                    {
-                        "role": "system",
-                        "content": self.config.load_intro_prompt(),
-                    },
-                ]
+            snapshot = self.config_registry.current
+            self.context_saver.set_config_version(
+                snapshot.config.config_name, snapshot.version
             )
+            self.context.messages.extend(self._prefix_messages(snapshot))
         else:
             logger.info(
                 f"Resuming session with {len(self.context.messages)} existing messages"
             )
 
+        if self.recovered_messages:
+            logger.info(
+                f"Recovered {len(self.recovered_messages)} messages from the transcript"
+            )
+            self.context.messages.append(
+                self.transcript_handler.recovery_note(self.recovered_messages)
+            )
+            if self.meeting_notes:
+                self.meeting_notes.add_lines(
+                    f"{message['role']}: {message['content']}"
+                    for message in self.recovered_messages
+                )
+            self.recovered_messages = []
+
+        if self.prompt_cache:
+            # Tools and system prompts first, so all requests share a cacheable prefix
+            self.prompt_cache.set_prefix(
+                self._prefix_messages(self.config_registry.current), self.tools
+            )
+            self.prompt_cache.apply(self.context)
+
         await self.task.queue_frames([LLMRunFrame()])
 
+    def _on_config_reloaded(self, old: ConfigSnapshot, new: ConfigSnapshot):
+        """Apply a reloaded config to the running session from the next turn on."""
+        if old.config.services != new.config.services:
+            logger.warning("Service config changed, this requires a bot restart")
+
+        self.config = new.config
+        self.wake_check.update_wake_settings(
+            wake_phrases=new.config.bot.assistant_names,
+            keepalive_timeout_secs=new.config.bot.keepalive_timeout_secs,
+        )
+        if self.audio_wake_gate:
+            self.audio_wake_gate.update_wake_settings(
+                wake_phrases=new.config.bot.assistant_names,
+                keepalive_timeout_secs=new.config.bot.keepalive_timeout_secs,
+            )
+
+        # Swap the system prompts in place so the next LLM run sees them
+        for message in self.context.messages:
+            if message.get("role") != "system":
+                continue
+            if message.get("content") == old.persona_prompt:
+                message["content"] = new.persona_prompt
+            elif message.get("content") == old.intro_prompt:
+                message["content"] = new.intro_prompt
+
+        self.context_saver.set_config_version(new.config.config_name, new.version)
+        if self.prompt_cache:
+            self.prompt_cache.set_prefix(self._prefix_messages(new), self.tools)
+
+    @staticmethod
+    def _prefix_messages(snapshot: ConfigSnapshot) -> list[dict]:
+        """The system messages every conversation starts with."""
+        return [
+            {
+                "role": "system",
+                "content": snapshot.persona_prompt,
+            },
+            {
+                "role": "system",
+                "content": snapshot.intro_prompt,
+            },
+        ]
+
     async def _handle_participant_left(self, participant):
         """Stop all processing."""
         await self.transcript_handler.handle_participant_left(participant["id"])
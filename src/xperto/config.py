@@ -2,6 +2,7 @@ import yaml
 from pathlib import Path
 from typing import List, Optional
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,8 +11,22 @@ class BotConfig(BaseSettings):
     assistant_names: List[str] = ["Experto", "Experte", "Expertin", "Expert"]
     idle_timeout_secs: int = 1800
     keepalive_timeout_secs: float = 30
+    per_speaker_wake: bool = False
+    wake_buffer_max_frames: Optional[int] = None
+    relevance_gate: str = "off"
+    vad: str = "silero"
+    # Only stream audio to STT after a local model heard an assistant name
+    audio_wake: bool = False
+    audio_wake_model: str = "tiny"
+    audio_wake_preroll_secs: float = 1.5
     audio_recording: bool = False
+    audio_separate_tracks: bool = False
+    audio_segment_secs: float = 0
+    audio_segment_max_mb: float = 0
     tui: bool = False
+    hot_reload: bool = False
+    # Sample all thread stacks and the event loop lag into <metrics>/<session_id>_profile.*
+    profile: bool = False
 
 
 class PromptsConfig(BaseSettings):
@@ -23,17 +38,107 @@ class PathsConfig(BaseSettings):
     recordings: Path = Path("./recordings")
     transcripts: Path = Path("./transcripts")
     contexts: Path = Path("~/.xperto/contexts")
+    metrics: Path = Path("./metrics")
+
+
+class StorageQuotaConfig(BaseSettings):
+    max_size_mb: float = 0
+    max_age_days: float = 0
+
+
+class StorageConfig(BaseSettings):
+    janitor_interval_secs: float = 0
+    shard_after_days: float = 1
+    compress_after_days: float = 7
+    recordings: StorageQuotaConfig = StorageQuotaConfig()
+    transcripts: StorageQuotaConfig = StorageQuotaConfig()
+    contexts: StorageQuotaConfig = StorageQuotaConfig()
 
 
 class STTConfig(BaseSettings):
     provider: str = "deepgram"
     model: str = "nova-2-general"
+    # Only used by the local "whisper" provider
+    device: str = "cpu"
+    compute_type: str = "int8"
+    interim_interval_secs: float = 0.7
+    # End of turn: "silence" (after silence_trigger_secs) or "smart_turn" (local
+    # model on CPU, asked after a short VAD pause, ends the turn when confident)
+    turn_detection: str = "silence"
+    silence_trigger_secs: float = 0.5
+    smart_turn_vad_stop_secs: float = 0.2
+    smart_turn_threshold: float = 0.5
+    # Silence after which the turn ends even if the model disagrees
+    smart_turn_stop_secs: float = 3.0
+
+
+class AnswerCacheConfig(BaseSettings):
+    enabled: bool = False
+    ttl_secs: float = 600
+    similarity: float = 0.8
+    max_entries: int = 256
+
+
+class HedgingConfig(BaseSettings):
+    enabled: bool = False
+    percentile: float = 95
+    initial_delay_secs: float = 1.5
+    min_delay_secs: float = 0.3
+    max_delay_secs: float = 3.0
+    # Optional secondary OpenAI-compatible provider, defaults to the primary one
+    secondary_model: Optional[str] = None
+    secondary_base_url: Optional[str] = None
+
+
+class PromptCacheConfig(BaseSettings):
+    enabled: bool = False
+    # Route requests of the same config to the same provider cache (OpenAI)
+    cache_key: bool = True
+
+
+class KnowledgeBaseConfig(BaseSettings):
+    # Folder of markdown/PDF/text documents, indexed with `--build-kb`
+    source_dir: Optional[Path] = None
+    index_dir: Path = Path("~/.xperto/kb_index")
+    top_k: int = 5
+    # Max. size of the passages returned per search
+    max_tokens: int = 800
+
+    @field_validator("source_dir", "index_dir")
+    @classmethod
+    def expand_user(cls, path: Optional[Path]) -> Optional[Path]:
+        # Also covers the default and environment overrides, not just YAML
+        return path.expanduser() if path is not None else None
+
+
+class RateLimitConfig(BaseSettings):
+    # Budgets of all sessions in the process (0 = unlimited), set them a bit
+    # below the limits of the API key
+    requests_per_min: float = 0
+    tokens_per_min: float = 0
+    # For the web_search and web_fetch tools
+    tool_requests_per_min: float = 0
+
+
+class MeetingNotesConfig(BaseSettings):
+    enabled: bool = False
+    # Cheap model that folds the transcript into the running notes
+    model: str = "gpt-4.1-mini"
+    # Update the notes this often, or as soon as max_lines are new
+    interval_secs: float = 180
+    max_lines: int = 40
 
 
 class LLMConfig(BaseSettings):
     provider: str = "openai"
     model: str = "gpt-4.1"
     tools: List[str] = []
+    answer_cache: AnswerCacheConfig = AnswerCacheConfig()
+    hedging: HedgingConfig = HedgingConfig()
+    prompt_cache: PromptCacheConfig = PromptCacheConfig()
+    knowledge_base: KnowledgeBaseConfig = KnowledgeBaseConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    meeting_notes: MeetingNotesConfig = MeetingNotesConfig()
 
 
 class TTSConfig(BaseSettings):
@@ -42,6 +147,24 @@ class TTSConfig(BaseSettings):
     voice: str = "aura-helios-en"
 
 
+class MemoryConfig(BaseSettings):
+    # Measure per-session structures every N seconds (0 = off)
+    check_interval_secs: float = 0
+    # Per-session budgets in MB (0 = unlimited)
+    transcript_mb: float = 0
+    wake_buffer_mb: float = 0
+    context_mb: float = 0
+    audio_buffer_mb: float = 0
+
+
+class InstrumentationConfig(BaseSettings):
+    enabled: bool = False
+    # Time only every n-th frame per processor to keep the overhead low
+    sample_every: int = 1
+    report_interval_secs: float = 10
+    json_snapshots: bool = True
+
+
 class ServicesConfig(BaseSettings):
     stt: STTConfig = STTConfig()
     llm: LLMConfig = LLMConfig()
@@ -50,6 +173,7 @@ class ServicesConfig(BaseSettings):
 
 class APIKeysConfig(BaseSettings):
     openai_api_key: str
+    llm_secondary_api_key: Optional[str] = None
     deepgram_api_key: Optional[str] = None
     speechmatics_api_key: Optional[str] = None
     elevenlabs_api_key: Optional[str] = None
@@ -67,6 +191,9 @@ class AppConfig(BaseSettings):
     bot: BotConfig = BotConfig()
     prompts: PromptsConfig = PromptsConfig()
     paths: PathsConfig = PathsConfig()
+    storage: StorageConfig = StorageConfig()
+    instrumentation: InstrumentationConfig = InstrumentationConfig()
+    memory: MemoryConfig = MemoryConfig()
     services: ServicesConfig = ServicesConfig()
 
     @classmethod
@@ -88,7 +215,10 @@ class AppConfig(BaseSettings):
             paths_data["transcripts"] = Path(paths_data["transcripts"]).expanduser()
         if "contexts" in paths_data:
             paths_data["contexts"] = Path(paths_data["contexts"]).expanduser()
+        if "metrics" in paths_data:
+            paths_data["metrics"] = Path(paths_data["metrics"]).expanduser()
 
+        llm_data = data.get("services", {}).get("llm", {})
         prompts_data = data.get("prompts", {})
         if "prompts_dir" in prompts_data:
             prompts_data["prompts_dir"] = Path(prompts_data["prompts_dir"]).expanduser()
@@ -98,9 +228,12 @@ class AppConfig(BaseSettings):
             bot=BotConfig(**data.get("bot", {})),
             prompts=PromptsConfig(**prompts_data),
             paths=PathsConfig(**paths_data),
+            storage=StorageConfig(**data.get("storage", {})),
+            instrumentation=InstrumentationConfig(**data.get("instrumentation", {})),
+            memory=MemoryConfig(**data.get("memory", {})),
             services=ServicesConfig(
                 stt=STTConfig(**data.get("services", {}).get("stt", {})),
-                llm=LLMConfig(**data.get("services", {}).get("llm", {})),
+                llm=LLMConfig(**llm_data),
                 tts=TTSConfig(**data.get("services", {}).get("tts", {})),
             ),
         )
@@ -6,14 +6,29 @@
 #
 
 import asyncio
+import datetime
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
 
 import aiohttp
 import click
+from click.core import ParameterSource
+from loguru import logger
+from pipecat.audio.turn.base_turn_analyzer import BaseTurnAnalyzer
 from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.transports.base_transport import TransportParams
 
 from .bots.bot import SimpleBot
 from .config import APIKeysConfig, AppConfig
+from .utils.config_registry import ConfigRegistry
 from .utils.context_manager import ConversationContextManager
+from .utils.memory_budget import request_tracemalloc_diff
+from .utils.segmented_recorder import concat_segments
+from .utils.storage_janitor import StorageJanitor
 
 
 def load_config_with_overrides(config_file: str, **cli_overrides) -> AppConfig:
@@ -31,6 +46,200 @@ def load_config_with_overrides(config_file: str, **cli_overrides) -> AppConfig:
     return config
 
 
+def create_vad_analyzer(config: AppConfig) -> VADAnalyzer:
+    params = None
+    if config.services.stt.turn_detection == "smart_turn":
+        # Short pauses already trigger the smart-turn model
+        params = VADParams(stop_secs=config.services.stt.smart_turn_vad_stop_secs)
+
+    match config.bot.vad:
+        case "silero":
+            return SileroVADAnalyzer(params=params)
+        case "batched":
+            from .utils.batched_vad import BatchedSileroVADAnalyzer
+
+            return BatchedSileroVADAnalyzer(params=params)
+        case _:
+            raise ValueError(f"Unsupported VAD: {config.bot.vad}")
+
+
+def create_turn_analyzer(config: AppConfig) -> Optional[BaseTurnAnalyzer]:
+    match config.services.stt.turn_detection:
+        case "silence":
+            return None
+        case "smart_turn":
+            from .utils.smart_turn import create_smart_turn_analyzer
+
+            return create_smart_turn_analyzer(config.services.stt)
+        case _:
+            raise ValueError(
+                f"Unsupported turn detection: {config.services.stt.turn_detection}"
+            )
+
+
+def create_config_registry(config: str, cli_overrides: dict) -> ConfigRegistry:
+    return ConfigRegistry(
+        loader=lambda: load_config_with_overrides(config, **cli_overrides),
+        config_path=AppConfig._resolve_config_path(config),
+    )
+
+
+def create_transport_params(config: AppConfig, transport: str) -> TransportParams:
+    # Using match-case for transport selection and lazy imports
+    match transport:
+        case "local":
+            from pipecat.transports.local.audio import LocalAudioTransportParams
+
+            return LocalAudioTransportParams(
+                audio_in_enabled=True,
+                audio_out_enabled=True,
+                vad_analyzer=create_vad_analyzer(config),
+                turn_analyzer=create_turn_analyzer(config),
+            )
+        case "daily":
+            from pipecat.transports.daily.transport import DailyParams
+
+            return DailyParams(
+                audio_in_enabled=True,
+                audio_out_enabled=True,
+                vad_analyzer=create_vad_analyzer(config),
+                turn_analyzer=create_turn_analyzer(config),
+            )
+        case _:
+            raise ValueError(f"Unsupported transport: {transport}")
+
+
+async def run_bot(
+    bot: SimpleBot,
+    transport: str,
+    params: TransportParams,
+    api_keys: APIKeysConfig,
+    room_url: Optional[str] = None,
+):
+    match transport:
+        case "local":
+            from pipecat.transports.local.audio import LocalAudioTransport
+
+            await bot.run(LocalAudioTransport(params=params))
+
+        case "daily":
+            from pipecat.transports.daily.transport import DailyTransport
+            from pipecat.transports.daily.utils import DailyRESTHelper
+
+            room_url = room_url or api_keys.daily_sample_room_url
+            async with aiohttp.ClientSession() as session:
+                daily_rest_helper = DailyRESTHelper(
+                    daily_api_key=api_keys.daily_api_key,
+                    daily_api_url="https://api.daily.co/v1",
+                    aiohttp_session=session,
+                )
+                token = await daily_rest_helper.get_token(room_url, 60 * 60)
+                daily_transport = DailyTransport(room_url, token, "Pipecat", params=params)
+
+                await bot.run(daily_transport)
+
+
+async def run_pool_worker(config: str, transport: str, cli_overrides: dict):
+    """Warm up for `config`, then run the bot in the room the pool asks for."""
+    from .utils.worker_pool import wait_for_join_request
+
+    start = time.monotonic()
+    # The pool reads events from stdout and nobody watches a worker's terminal
+    cli_overrides = dict(cli_overrides, tui=False)
+    api_keys = APIKeysConfig()
+    config_registry = create_config_registry(config, cli_overrides)
+    app_config = config_registry.current.config
+    params = create_transport_params(app_config, transport)
+    bot = SimpleBot(app_config, api_keys, config_registry=config_registry)
+    bot.create_services()
+    await bot.warm_up()
+    logger.info(f"Pool worker warmed up in {time.monotonic() - start:.1f}s")
+
+    request = await wait_for_join_request()
+    if request.get("config") not in (None, config):
+        # Only the imports are warm for other configs
+        config_registry = create_config_registry(request["config"], cli_overrides)
+        app_config = config_registry.current.config
+        params = create_transport_params(app_config, transport)
+        bot = SimpleBot(app_config, api_keys, config_registry=config_registry)
+    bot.join_requested_at = request.get("requested_at", time.time())
+    await run_bot(bot, transport, params, api_keys, room_url=request.get("room_url"))
+
+
+def _worker_args(
+    config, transport, language, assistant_name, voice_id, hot_reload, profile
+) -> list[str]:
+    """The runner arguments of a bot started by --supervise or --pool."""
+    worker_args = ["--config", config, "--transport", transport]
+    for option, value in (
+        ("--language", language),
+        ("--assistant-name", assistant_name),
+        ("--voice-id", voice_id),
+    ):
+        if value is not None:
+            worker_args += [option, value]
+    if hot_reload:
+        worker_args.append("--hot-reload")
+    if profile:
+        worker_args.append("--profile")
+    return worker_args
+
+
+def run_benchmark(
+    name: str, sessions: Optional[int], secs: Optional[float], wav_paths: List[str]
+):
+    """Run the micro benchmark `name` and echo its results, unset sizes use its defaults."""
+    match name:
+        case "rate-scheduler":
+            from .utils.rate_scheduler import benchmark
+
+            sessions = sessions or 20
+            results = asyncio.run(benchmark(sessions=sessions))
+            click.echo(f"{sessions} sessions against a 429-ing stub of the chat completions API")
+            for mode, result in results.items():
+                click.echo(
+                    f"  {mode + ':':<12} {result['rejected']} 429s, {result['failed']} failed "
+                    f"turns, p95 turn {result['p95_turn_ms']:.0f}ms"
+                )
+
+        case "batched-vad":
+            from .utils.batched_vad import benchmark
+
+            sessions, secs = sessions or 16, secs or 10.0
+            results = benchmark(sessions=sessions, seconds=secs)
+            click.echo(f"{sessions} sessions, {secs:.0f}s of audio each, CPU per audio second:")
+            click.echo(f"  per-session Silero: {results['per_session_cpu_ms']:.1f}ms per session")
+            click.echo(
+                f"  batched Silero:     {results['batched_cpu_ms']:.1f}ms per session "
+                f"(mean batch size {results['mean_batch_size']:.1f})"
+            )
+
+        case "whisper":
+            from .utils.local_whisper_stt import benchmark
+
+            if not wav_paths:
+                raise click.UsageError("The whisper benchmark needs --benchmark-wav recordings")
+            for result in benchmark(wav_paths):
+                click.echo(
+                    f"{result['path']}: {result['audio_secs']:.1f}s audio, "
+                    f"RTF {result['rtf']:.2f}, final latency {result['final_latency_ms']:.0f}ms"
+                )
+                click.echo(f"  {result['text']}")
+
+        case "audio-postprocessing":
+            from .utils.audio_postprocessing import benchmark
+
+            secs = secs or 3600.0
+            with tempfile.TemporaryDirectory() as folder:
+                results = benchmark(minutes=secs / 60, folder=Path(folder))
+            click.echo(f"Audio: {secs / 60:.0f} min")
+            paths = (("Combined WAV", "combined_secs"), ("Tracks + normalize", "tracks_secs"))
+            for label, key in paths:
+                click.echo(
+                    f"{label + ':':<19} {results[key]:.2f}s ({secs / results[key]:.0f}x realtime)"
+                )
+
+
 @click.command()
 @click.option(
     "--config",
@@ -49,6 +258,133 @@ def load_config_with_overrides(config_file: str, **cli_overrides) -> AppConfig:
 @click.option("--voice-id", help="Override voice ID")
 @click.option("--resume", help="Resume conversation from session ID")
 @click.option("--list-contexts", is_flag=True, help="List saved conversation contexts")
+@click.option(
+    "--hot-reload",
+    is_flag=True,
+    default=None,
+    help="Reload config and prompts on file changes without restarting",
+)
+@click.option(
+    "--concat-recording",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Join the segments of a recording session folder into one file per track",
+)
+@click.option(
+    "--janitor",
+    is_flag=True,
+    help="Shard, compress and enforce quotas on the output folders once, then exit",
+)
+@click.option(
+    "--load-test",
+    type=int,
+    metavar="MAX_SESSIONS",
+    help="Ramp up synthetic sessions with stub services and report the capacity of this host",
+)
+@click.option(
+    "--load-test-mode",
+    type=click.Choice(["audio", "transcripts"]),
+    default="audio",
+    help="Drive the load test sessions with synthetic audio or transcripts",
+)
+@click.option(
+    "--load-test-vad",
+    type=click.Choice(["energy", "silero", "batched"]),
+    default="energy",
+    help="VAD of the load test sessions in audio mode (energy isolates the pipeline cost)",
+)
+@click.option(
+    "--benchmark",
+    type=click.Choice(["rate-scheduler", "batched-vad", "whisper", "audio-postprocessing"]),
+    help="Run a micro benchmark and report the results, then exit",
+)
+@click.option(
+    "--benchmark-sessions",
+    type=int,
+    help="Concurrent sessions of the rate-scheduler and batched-vad benchmarks",
+)
+@click.option(
+    "--benchmark-secs",
+    type=float,
+    help="Audio per session (batched-vad) or recording length (audio-postprocessing)",
+)
+@click.option(
+    "--benchmark-wav",
+    type=click.Path(exists=True, dir_okay=False),
+    multiple=True,
+    help="16kHz WAV recording to transcribe in the whisper benchmark (repeatable)",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=None,
+    help="Run the sampling profiler (thread stacks and event loop lag) for the whole session",
+)
+@click.option(
+    "--profile-toggle",
+    type=int,
+    metavar="PID",
+    help="Start or stop the sampling profiler of the running bot with this PID",
+)
+@click.option(
+    "--tracemalloc-diff",
+    type=int,
+    metavar="PID",
+    help="Ask the running bot with this PID for a tracemalloc snapshot diff",
+)
+@click.option(
+    "--build-kb",
+    is_flag=True,
+    help="Build or update the knowledge base index for the kb_search tool, then exit",
+)
+@click.option(
+    "--summarize",
+    is_flag=True,
+    help="Summarize all saved sessions that changed since the last run, then exit",
+)
+@click.option(
+    "--summarize-concurrency",
+    type=int,
+    default=4,
+    show_default=True,
+    help="Max. concurrent LLM requests of --summarize",
+)
+@click.option(
+    "--summarize-stub",
+    is_flag=True,
+    help="Use an offline stub instead of the configured LLM for --summarize (testing)",
+)
+@click.option(
+    "--eval-turns",
+    is_flag=True,
+    help="Compare end-of-turn latency and false cutoffs of the turn detection modes "
+    "on the recorded user tracks, then exit",
+)
+@click.option(
+    "--supervise",
+    is_flag=True,
+    help="Run the bot in a worker process that is restarted and resumed if it crashes",
+)
+@click.option(
+    "--pool",
+    type=int,
+    metavar="SIZE",
+    help="Keep SIZE warmed-up bot workers that join rooms on request (see --join)",
+)
+@click.option(
+    "--join",
+    metavar="ROOM_URL",
+    help="Ask the running --pool to join ROOM_URL (with --config if given), then exit",
+)
+@click.option(
+    "--pool-socket",
+    type=click.Path(path_type=Path),
+    default=Path(tempfile.gettempdir()) / "xperto-pool.sock",
+    show_default=True,
+    help="Local socket of the worker pool",
+)
+@click.option("--pool-worker", is_flag=True, hidden=True, help="Run as a pool worker")
+@click.option("--session-id", hidden=True, help="Session ID to use (set by --supervise)")
+@click.option("--transcript-file", hidden=True, help="Transcript to append to (set by --supervise)")
 @click.option("--verbose", "-v", count=True, help="Increase verbosity")
 def main(
     config,
@@ -58,10 +394,140 @@ def main(
     voice_id,
     resume,
     list_contexts,
+    hot_reload,
+    concat_recording,
+    janitor,
+    load_test,
+    load_test_mode,
+    load_test_vad,
+    benchmark,
+    benchmark_sessions,
+    benchmark_secs,
+    benchmark_wav,
+    profile,
+    profile_toggle,
+    tracemalloc_diff,
+    build_kb,
+    summarize,
+    summarize_concurrency,
+    summarize_stub,
+    eval_turns,
+    supervise,
+    pool,
+    join,
+    pool_socket,
+    pool_worker,
+    session_id,
+    transcript_file,
     verbose,
 ):
     """Pipecat Bot Runner with configuration support."""
 
+    # Handle concat-recording command
+    if concat_recording:
+        for output in concat_segments(concat_recording):
+            click.echo(f"Joined recording: {output}")
+        return
+
+    # Handle janitor command
+    if janitor:
+        app_config = AppConfig.load_from_yaml(config)
+        report = StorageJanitor(app_config.paths, app_config.storage).sweep()
+        for error in report.errors:
+            click.echo(f"Error: {error}")
+        return
+
+    # Handle profile-toggle command
+    if profile_toggle:
+        from .utils.sampling_profiler import request_profile_toggle
+
+        request_profile_toggle(profile_toggle)
+        click.echo(f"Toggled the sampling profiler of {profile_toggle}, see its log.")
+        return
+
+    # Handle tracemalloc-diff command
+    if tracemalloc_diff:
+        request_tracemalloc_diff(tracemalloc_diff)
+        click.echo(
+            f"Requested a tracemalloc snapshot diff from {tracemalloc_diff}, see its log. "
+            "The first request only starts tracing."
+        )
+        return
+
+    # Handle build-kb command
+    if build_kb:
+        from .utils.knowledge_base import build_index
+
+        knowledge_base = AppConfig.load_from_yaml(config).services.llm.knowledge_base
+        if knowledge_base.source_dir is None:
+            raise click.UsageError("Set services.llm.knowledge_base.source_dir in the config")
+        report = build_index(knowledge_base.source_dir, knowledge_base.index_dir)
+        click.echo(
+            f"Knowledge base {knowledge_base.index_dir}: {report.indexed} documents indexed, "
+            f"{report.reused} unchanged, {report.removed} removed, {report.passages} passages, "
+            f"{report.terms} terms ({report.elapsed_secs:.1f}s)"
+        )
+        for error in report.errors:
+            click.echo(f"Error: {error}")
+        return
+
+    # Handle summarize command
+    if summarize:
+        from .utils.batch_summarizer import (
+            BatchSummarizer,
+            OpenAISummarizer,
+            StubSummarizer,
+        )
+
+        app_config = AppConfig.load_from_yaml(config)
+        if summarize_stub:
+            summarizer = StubSummarizer()
+        else:
+            from .utils.rate_scheduler import LLM_SCHEDULER, get_shared_rate_scheduler
+
+            rate_limit = app_config.services.llm.rate_limit
+            scheduler = get_shared_rate_scheduler(LLM_SCHEDULER)
+            scheduler.configure(rate_limit.requests_per_min, rate_limit.tokens_per_min)
+            summarizer = OpenAISummarizer(
+                APIKeysConfig().openai_api_key,
+                app_config.services.llm.model,
+                scheduler=scheduler if scheduler.limited else None,
+            )
+        batch = BatchSummarizer(app_config.paths, summarizer, concurrency=summarize_concurrency)
+        report = asyncio.run(batch.run())
+        click.echo(
+            f"Summaries: {report.summarized} written, {report.skipped} up to date, "
+            f"{report.failed} failed ({report.elapsed_secs:.1f}s)"
+        )
+        for error in report.errors:
+            click.echo(f"Error: {error}")
+        return
+
+    # Handle load-test command
+    if load_test:
+        from .utils.load_test import format_report, run_load_test
+
+        # Per-frame debug logging of N sessions would dominate the measurement
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+        app_config = AppConfig.load_from_yaml(config)
+        report, report_path = asyncio.run(
+            run_load_test(
+                app_config, max_sessions=load_test, mode=load_test_mode, vad=load_test_vad
+            )
+        )
+        click.echo(format_report(report))
+        click.echo(f"Report saved to {report_path}")
+        return
+
+    # Handle benchmark command
+    if benchmark:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+        run_benchmark(benchmark, benchmark_sessions, benchmark_secs, list(benchmark_wav))
+        return
+
     # Handle list-contexts command
     if list_contexts:
         app_config = AppConfig.load_from_yaml(config)
@@ -79,71 +545,123 @@ def main(
             click.echo(f"  Timestamp: {ctx.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
             click.echo(f"  Messages: {ctx.message_count}")
             click.echo(f"  Config: {ctx.config_used}")
+            if ctx.config_version:
+                click.echo(f"  Config version: {ctx.config_version}")
             click.echo(f"  Participants: {ctx.participant_count}")
             click.echo()
         return
 
+    # Handle eval-turns command
+    if eval_turns:
+        from .utils.smart_turn import RESUME_SECS, evaluate_recordings
+
+        app_config = AppConfig.load_from_yaml(config)
+        stt_config = app_config.services.stt
+        try:
+            reports = evaluate_recordings(Path(app_config.paths.recordings), stt_config)
+        except FileNotFoundError as e:
+            raise click.UsageError(str(e))
+        click.echo(
+            f"Turn detection on {reports[0].files} recordings (silence trigger "
+            f"{stt_config.silence_trigger_secs}s, smart-turn threshold "
+            f"{stt_config.smart_turn_threshold}, cutoff = speech resumed within {RESUME_SECS}s):"
+        )
+        for report in reports:
+            click.echo(
+                f"  {report.mode:<10} {report.turns} turns, median end-of-turn latency "
+                f"{report.median_latency_ms:.0f}ms, false cutoffs {report.false_cutoffs} "
+                f"({report.false_cutoff_rate:.1%})"
+            )
+        return
+
+    # Handle supervise command
+    if supervise:
+        from .utils.supervisor import WorkerSupervisor
+
+        app_config = AppConfig.load_from_yaml(config)
+        worker_args = _worker_args(
+            config, transport, language, assistant_name, voice_id, hot_reload, profile
+        )
+
+        context_manager = ConversationContextManager(app_config.paths.contexts)
+        if resume:
+            session_id = context_manager.load_context(resume)[1]["session_id"]
+        else:
+            session_id = context_manager.generate_session_id()
+        supervisor = WorkerSupervisor(
+            worker_args,
+            app_config.paths.contexts,
+            session_id=session_id,
+            # Named like the transcripts of unsupervised sessions
+            transcript_file=f"{datetime.datetime.now():%Y%m%d_%H%M%S}_bot.log",
+        )
+        raise SystemExit(supervisor.run())
+
+    # Handle join command
+    if join:
+        from .utils.worker_pool import request_join
+
+        try:
+            # Without an explicit --config the pool's own (warmed-up) config is used
+            source = click.get_current_context().get_parameter_source("config")
+            join_config = config if source is not ParameterSource.DEFAULT else None
+            response = request_join(pool_socket, join, join_config)
+        except OSError as e:
+            raise click.ClickException(f"No worker pool at {pool_socket}: {e}")
+        if "error" in response:
+            raise click.ClickException(f"Join failed: {response['error']}")
+        click.echo(
+            f"Worker {response['worker']} joined {join} (session {response.get('session_id')}) "
+            f"after {response['join_latency_secs'] * 1000:.0f}ms"
+        )
+        return
+
+    # Handle pool command
+    if pool:
+        from .utils.worker_pool import WarmWorkerPool
+
+        worker_args = _worker_args(
+            config, transport, language, assistant_name, voice_id, hot_reload, profile
+        )
+        worker_pool = WarmWorkerPool(worker_args, pool_socket, size=pool)
+        try:
+            asyncio.run(worker_pool.serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
     # Load configuration with CLI overrides
     cli_overrides = {
         "language": language,
         "assistant_name": assistant_name,
         "voice_id": voice_id,
+        "hot_reload": hot_reload,
+        "profile": profile,
     }
-    app_config = load_config_with_overrides(config, **cli_overrides)
+
+    # Handle pool-worker command (started by --pool)
+    if pool_worker:
+        asyncio.run(run_pool_worker(config, transport, cli_overrides))
+        return
+
+    config_registry = create_config_registry(config, cli_overrides)
+    app_config = config_registry.current.config
 
     # Load API keys from environment
     api_keys = APIKeysConfig()
 
     # Create bot instance with optional resume
-    bot = SimpleBot(app_config, api_keys, resume_session_id=resume)
-
-    # Using match-case for transport selection and lazy imports
-    match transport:
-        case "local":
-            from pipecat.transports.local.audio import (
-                LocalAudioTransport,
-                LocalAudioTransportParams,
-            )
-
-            params = LocalAudioTransportParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
-            )
-
-            async def run():
-                transport = LocalAudioTransport(params=params)
-                await bot.run(transport)
-
-            asyncio.run(run())
-
-        case "daily":
-            from pipecat.transports.daily.transport import DailyParams, DailyTransport
-            from pipecat.transports.daily.utils import DailyRESTHelper
-
-            params = DailyParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
-            )
+    bot = SimpleBot(
+        app_config,
+        api_keys,
+        resume_session_id=resume,
+        config_registry=config_registry,
+        session_id=session_id,
+        transcript_file=transcript_file,
+    )
 
-            async def run():
-                async with aiohttp.ClientSession() as session:
-                    daily_rest_helper = DailyRESTHelper(
-                        daily_api_key=api_keys.daily_api_key,
-                        daily_api_url="https://api.daily.co/v1",
-                        aiohttp_session=session,
-                    )
-                    token = await daily_rest_helper.get_token(
-                        api_keys.daily_sample_room_url, 60 * 60
-                    )
-                    transport = DailyTransport(
-                        api_keys.daily_sample_room_url, token, "Pipecat", params=params
-                    )
-
-                    await bot.run(transport)
-
-            asyncio.run(run())
+    params = create_transport_params(app_config, transport)
+    asyncio.run(run_bot(bot, transport, params, api_keys))
 
 
 if __name__ == "__main__":
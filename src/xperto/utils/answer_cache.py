@@ -0,0 +1,273 @@
+import hashlib
+import json
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    StartInterruptionFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from .wake_check_buffer import SPEAKER_TAGS_PATTERN
+
+NON_WORD_PATTERN = re.compile(r"[^\w]+", re.UNICODE)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip speaker tags and punctuation, collapse whitespace."""
+    text = SPEAKER_TAGS_PATTERN.sub(" ", text).lower()
+    return NON_WORD_PATTERN.sub(" ", text).strip()
+
+
+class MinHasher:
+    """MinHash signatures over character n-grams for near-duplicate matching."""
+
+    def __init__(self, num_perm: int = 64, ngram_size: int = 3, seed: int = 1):
+        self.ngram_size = ngram_size
+        # Deterministic universal hash parameters (a * x + b) mod p
+        coefficients = hashlib.sha256(f"minhash-{seed}".encode()).digest()
+        while len(coefficients) < num_perm * 16:
+            coefficients += hashlib.sha256(coefficients).digest()
+        self._perms = [
+            (
+                int.from_bytes(coefficients[i * 16 : i * 16 + 8], "little") % MERSENNE_PRIME | 1,
+                int.from_bytes(coefficients[i * 16 + 8 : i * 16 + 16], "little") % MERSENNE_PRIME,
+            )
+            for i in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        padded = f" {text} "
+        shingles = {
+            zlib.crc32(padded[i : i + self.ngram_size].encode("utf-8"))
+            for i in range(max(1, len(padded) - self.ngram_size + 1))
+        }
+        return tuple(
+            min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in shingles)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two underlying n-gram sets."""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    context_hash: str
+    signature: tuple[int, ...]
+    answer: str
+    created_at: float
+
+
+class AnswerCache:
+    """Reuses previous answers for near-duplicate questions at the LLM boundary.
+
+    Entries are keyed by a hash of the stable context (system prompts and
+    tools) and matched by the MinHash similarity of the normalized question.
+    On a hit the cached answer is streamed downstream as if the LLM produced
+    it, so the LLM call is skipped entirely. Entries expire after `ttl_secs`.
+
+    Use `lookup()` right before the LLM and `store()` right after it.
+    """
+
+    def __init__(
+        self,
+        ttl_secs: float = 600.0,
+        similarity_threshold: float = 0.8,
+        max_entries: int = 256,
+        min_question_chars: int = 12,
+    ):
+        self.ttl_secs = ttl_secs
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.min_question_chars = min_question_chars
+
+        self._hasher = MinHasher()
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._pending: Optional[tuple[str, str, tuple[int, ...]]] = None
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lookup_processor: Optional[AnswerCacheLookupProcessor] = None
+        self._store_processor: Optional[AnswerCacheStoreProcessor] = None
+
+    def lookup(self) -> "AnswerCacheLookupProcessor":
+        """Processor to place between the user context aggregator and the LLM."""
+        if self._lookup_processor is None:
+            self._lookup_processor = AnswerCacheLookupProcessor(self)
+        return self._lookup_processor
+
+    def store(self) -> "AnswerCacheStoreProcessor":
+        """Processor to place between the LLM and the TTS service."""
+        if self._store_processor is None:
+            self._store_processor = AnswerCacheStoreProcessor(self)
+        return self._store_processor
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def find(self, context: OpenAILLMContext) -> Optional[CachedAnswer]:
+        """Return a cached answer for the latest user question, or None.
+
+        On a miss, the question is remembered so the next LLM answer can be stored.
+        """
+        self._pending = None
+        question = self._latest_question(context)
+        if question is None:
+            return None
+
+        context_hash = self._context_hash(context)
+        signature = self._hasher.signature(question)
+        self._expire()
+
+        best, best_similarity = None, 0.0
+        for entry in self._entries.values():
+            if entry.context_hash != context_hash:
+                continue
+            similarity = MinHasher.similarity(signature, entry.signature)
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best is not None and best_similarity >= self.similarity_threshold:
+            self.hits += 1
+            logger.debug(
+                f"Answer cache hit ({best_similarity:.2f}): '{question}' ~ '{best.question}'"
+            )
+            return best
+
+        self.misses += 1
+        self._pending = (question, context_hash, signature)
+        return None
+
+    def add(self, answer: str):
+        """Store the answer for the question remembered by the last miss."""
+        if self._pending is None or not answer.strip():
+            return
+        question, context_hash, signature = self._pending
+        self._pending = None
+
+        self._entries[self._next_id] = CachedAnswer(
+            question=question,
+            context_hash=context_hash,
+            signature=signature,
+            answer=answer,
+            created_at=time.monotonic(),
+        )
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard_pending(self):
+        self._pending = None
+
+    def _latest_question(self, context: OpenAILLMContext) -> Optional[str]:
+        messages = context.messages
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        content = messages[-1].get("content")
+        if not isinstance(content, str):
+            return None
+        question = normalize_question(content)
+        if len(question) < self.min_question_chars:
+            return None
+        return question
+
+    @staticmethod
+    def _context_hash(context: OpenAILLMContext) -> str:
+        system_messages = [m for m in context.messages if m.get("role") == "system"]
+        digest = hashlib.sha256(
+            json.dumps(system_messages, sort_keys=True, default=str).encode("utf-8")
+        )
+        digest.update(json.dumps(context.tools, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_secs
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.created_at >= cutoff:
+                break
+            self._entries.popitem(last=False)
+
+
+class AnswerCacheLookupProcessor(FrameProcessor):
+    """Answers context frames from the cache instead of passing them to the LLM."""
+
+    def __init__(self, cache: AnswerCache, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            entry = self._cache.find(frame.context)
+            if entry is not None:
+                await self.push_frame(LLMFullResponseStartFrame())
+                await self.push_frame(LLMTextFrame(entry.answer))
+                await self.push_frame(LLMFullResponseEndFrame())
+                return
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            logger.info(f"Answer cache stats: {self._cache.stats}")
+
+        await self.push_frame(frame, direction)
+
+
+class AnswerCacheStoreProcessor(FrameProcessor):
+    """Collects the LLM answer for a cache miss and stores it in the cache."""
+
+    def __init__(self, cache: AnswerCache, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+        self._collecting = False
+        self._text: List[str] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, LLMFullResponseStartFrame):
+            self._collecting = True
+            self._text = []
+        elif isinstance(frame, LLMTextFrame) and self._collecting:
+            self._text.append(frame.text)
+        elif isinstance(frame, LLMFullResponseEndFrame) and self._collecting:
+            self._collecting = False
+            # Tool call rounds produce no text, keep waiting for the final answer
+            if self._text:
+                self._cache.add("".join(self._text))
+        elif isinstance(frame, StartInterruptionFrame):
+            self._collecting = False
+            self._text = []
+            self._cache.discard_pending()
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,227 @@
+import asyncio
+import functools
+import multiprocessing
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+BLOCK_SECS = 0.4
+BLOCK_OVERLAP = 0.75
+ABSOLUTE_GATE_DBFS = -70.0
+RELATIVE_GATE_DB = -10.0
+PEAK_CEILING_DBFS = -1.0
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def read_wav(path: Path) -> tuple[np.ndarray, int]:
+    """Read a 16-bit PCM WAV file as float32 samples in [-1, 1] (mono mixdown)."""
+    with wave.open(str(path), "rb") as wf:
+        sample_rate = wf.getframerate()
+        num_channels = wf.getnchannels()
+        frames = wf.readframes(wf.getnframes())
+
+    samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if num_channels > 1:
+        samples = samples.reshape(-1, num_channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def write_wav(path: Path, samples: np.ndarray, sample_rate: int):
+    """Write float samples in [-1, 1] as a mono 16-bit PCM WAV file."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+    with wave.open(str(path), "wb") as wf:
+        wf.setsampwidth(2)
+        wf.setnchannels(1)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+
+
+def block_power(samples: np.ndarray, sample_rate: int, block_secs: float = BLOCK_SECS) -> np.ndarray:
+    """Mean square power of overlapping blocks, computed without a Python loop."""
+    block = max(1, int(block_secs * sample_rate))
+    hop = max(1, int(block * (1.0 - BLOCK_OVERLAP)))
+    if len(samples) < block:
+        return np.array([np.mean(samples**2)]) if len(samples) else np.zeros(0)
+
+    # Blocks are sums over a cumulative sum, O(n) regardless of overlap
+    cumsum = np.concatenate(([0.0], np.cumsum(samples.astype(np.float64) ** 2)))
+    starts = np.arange(0, len(samples) - block + 1, hop)
+    return (cumsum[starts + block] - cumsum[starts]) / block
+
+
+def gated_loudness(samples: np.ndarray, sample_rate: int) -> Optional[float]:
+    """Integrated loudness in dBFS with BS.1770-style absolute and relative gating.
+
+    This skips the K-weighting pre-filter, which is close enough for speech and
+    keeps the computation to plain NumPy. Returns None for silent tracks.
+    """
+    power = block_power(samples, sample_rate)
+    if power.size == 0:
+        return None
+
+    with np.errstate(divide="ignore"):
+        block_db = 10.0 * np.log10(power)
+
+    gated = power[block_db > ABSOLUTE_GATE_DBFS]
+    if gated.size == 0:
+        return None
+
+    relative_gate = 10.0 * np.log10(gated.mean()) + RELATIVE_GATE_DB
+    with np.errstate(divide="ignore"):
+        gated = gated[10.0 * np.log10(gated) > relative_gate]
+    return float(10.0 * np.log10(gated.mean()))
+
+
+def normalize(samples: np.ndarray, sample_rate: int, target_dbfs: float) -> np.ndarray:
+    """Scale the samples to the target gated loudness without exceeding the peak ceiling."""
+    loudness = gated_loudness(samples, sample_rate)
+    if loudness is None:
+        return samples
+
+    gain = 10.0 ** ((target_dbfs - loudness) / 20.0)
+    peak = float(np.max(np.abs(samples))) * gain
+    ceiling = 10.0 ** (PEAK_CEILING_DBFS / 20.0)
+    if peak > ceiling:
+        gain *= ceiling / peak
+    return samples * np.float32(gain)
+
+
+def activity_envelope(
+    samples: np.ndarray, sample_rate: int, threshold_dbfs: float = -45.0, ramp_secs: float = 0.05
+) -> np.ndarray:
+    """Per-sample activity in [0, 1], smoothed to avoid clicks when used as gain."""
+    frame = max(1, int(0.02 * sample_rate))
+    num_frames = int(np.ceil(len(samples) / frame))
+    padded = np.zeros(num_frames * frame, dtype=np.float32)
+    padded[: len(samples)] = samples
+
+    power = np.mean(padded.reshape(num_frames, frame) ** 2, axis=1)
+    with np.errstate(divide="ignore"):
+        active = (10.0 * np.log10(power) > threshold_dbfs).astype(np.float32)
+
+    ramp = max(1, int(ramp_secs / 0.02))
+    kernel = np.ones(2 * ramp + 1, dtype=np.float32) / (2 * ramp + 1)
+    smoothed = np.convolve(active, kernel, mode="same")
+    return np.repeat(smoothed, frame)[: len(samples)]
+
+
+def postprocess_tracks(
+    user_path: Path,
+    bot_path: Path,
+    output_path: Path,
+    target_dbfs: float = -20.0,
+    duck_db: float = -6.0,
+) -> dict:
+    """Normalize the user and bot tracks, duck the user track under the bot and mix.
+
+    This is CPU-bound and must never run on the live event loop, use
+    `postprocess_tracks_async` instead.
+
+    Returns:
+        Stats about the processed recording.
+    """
+    start = time.perf_counter()
+    user, user_rate = read_wav(user_path)
+    bot, bot_rate = read_wav(bot_path)
+    if user_rate != bot_rate:
+        raise ValueError(f"Sample rate mismatch: {user_rate} != {bot_rate}")
+
+    # Align both tracks to the same length, the audio buffer pads with silence
+    length = max(len(user), len(bot))
+    user = np.pad(user, (0, length - len(user)))
+    bot = np.pad(bot, (0, length - len(bot)))
+
+    user_loudness = gated_loudness(user, user_rate)
+    bot_loudness = gated_loudness(bot, bot_rate)
+    user = normalize(user, user_rate, target_dbfs)
+    bot = normalize(bot, bot_rate, target_dbfs)
+
+    duck_gain = 10.0 ** (duck_db / 20.0)
+    user *= 1.0 - (1.0 - duck_gain) * activity_envelope(bot, bot_rate)
+
+    mix = normalize(user + bot, user_rate, target_dbfs)
+    write_wav(output_path, mix, user_rate)
+
+    return {
+        "output": str(output_path),
+        "duration_secs": length / user_rate,
+        "user_loudness_dbfs": user_loudness,
+        "bot_loudness_dbfs": bot_loudness,
+        "mix_loudness_dbfs": gated_loudness(mix, user_rate),
+        "processing_secs": time.perf_counter() - start,
+    }
+
+
+def get_postprocessing_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all sessions in this process."""
+    global _pool
+    if _pool is None:
+        # Never fork a running event loop
+        _pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def postprocess_tracks_async(
+    user_path: Path, bot_path: Path, output_path: Path, **kwargs
+) -> dict:
+    """Run `postprocess_tracks` in the shared process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_postprocessing_pool(),
+        functools.partial(postprocess_tracks, user_path, bot_path, output_path, **kwargs),
+    )
+
+
+def benchmark(
+    minutes: float = 60.0, sample_rate: int = 16000, folder: Path = Path("/tmp")
+) -> dict:
+    """Compare the combined WAV path against separate tracks + post-processing.
+
+    Returns the seconds each path took for `minutes` of audio.
+    """
+    import io
+
+    rng = np.random.default_rng(0)
+    num_samples = int(minutes * 60 * sample_rate)
+    t = np.arange(num_samples, dtype=np.float32) / sample_rate
+    talking = (np.sin(2 * np.pi * t / 7.0) > 0).astype(np.float32)
+    user = (0.05 * rng.standard_normal(num_samples, dtype=np.float32) * talking * 32767)
+    bot = (0.3 * np.sin(2 * np.pi * 220 * t) * (1.0 - talking) * 32767)
+    user_pcm = user.astype(np.int16).tobytes()
+    bot_pcm = bot.astype(np.int16).tobytes()
+
+    # Combined path: interleave into one stereo WAV (what AudioBufferProcessor does)
+    start = time.perf_counter()
+    interleaved = np.empty(2 * num_samples, dtype=np.int16)
+    interleaved[0::2] = np.frombuffer(user_pcm, dtype=np.int16)
+    interleaved[1::2] = np.frombuffer(bot_pcm, dtype=np.int16)
+    with io.BytesIO() as buffer:
+        with wave.open(buffer, "wb") as wf:
+            wf.setsampwidth(2)
+            wf.setnchannels(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(interleaved.tobytes())
+        (folder / "bench_combined.wav").write_bytes(buffer.getvalue())
+    combined_secs = time.perf_counter() - start
+
+    # Separate tracks + normalization and mixdown
+    start = time.perf_counter()
+    for name, pcm in (("user", user_pcm), ("bot", bot_pcm)):
+        with wave.open(str(folder / f"bench_{name}.wav"), "wb") as wf:
+            wf.setsampwidth(2)
+            wf.setnchannels(1)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm)
+    postprocess_tracks(
+        folder / "bench_user.wav", folder / "bench_bot.wav", folder / "bench_mix.wav"
+    )
+    tracks_secs = time.perf_counter() - start
+
+    return {"combined_secs": combined_secs, "tracks_secs": tracks_secs}
@@ -0,0 +1,324 @@
+import asyncio
+import re
+import time
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from .wake_check_buffer import compile_wake_patterns
+
+WHISPER_SAMPLE_RATE = 16000
+NON_WORD_PATTERN = re.compile(r"[^\w\s]+", re.UNICODE)
+
+
+class KeywordSpotter:
+    """Spots assistant names in short stretches of audio, on the CPU.
+
+    There are no pretrained keyword models for arbitrary names, so a small
+    Whisper model decodes the audio greedily with the names as hotwords, and
+    the text is matched exactly and fuzzily (mis-transcribed names) against
+    them.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        model: str = "tiny",
+        language: Optional[str] = None,
+        similarity: float = 0.8,
+    ):
+        self.model = model
+        self.language = language
+        self.similarity = similarity
+        self.update_names(names)
+
+    def update_names(self, names: list[str]):
+        self._names = [NON_WORD_PATTERN.sub(" ", name).lower().split() for name in names]
+        self._hotwords = " ".join(names)
+        self._patterns = compile_wake_patterns(names)
+
+    def spot(self, audio: bytes, sample_rate: int) -> Optional[str]:
+        """The name heard in the 16-bit mono audio, or None."""
+        audio_float = np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            positions = np.arange(0, len(audio_float), sample_rate / WHISPER_SAMPLE_RATE)
+            audio_float = np.interp(positions, np.arange(len(audio_float)), audio_float)
+            audio_float = audio_float.astype(np.float32)
+
+        # Needs the local-stt extra, only imported when audio wake is used
+        from .local_whisper_stt import get_shared_whisper_model
+
+        whisper = get_shared_whisper_model(self.model, "cpu", "int8")
+        segments, _ = whisper.transcribe(
+            audio_float,
+            language=self.language,
+            beam_size=1,
+            hotwords=self._hotwords,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        return self.match(" ".join(segment.text for segment in segments))
+
+    def match(self, text: str) -> Optional[str]:
+        for pattern in self._patterns:
+            match = pattern.search(text)
+            if match:
+                return match.group()
+
+        words = NON_WORD_PATTERN.sub(" ", text).lower().split()
+        for name in self._names:
+            target = " ".join(name)
+            for i in range(len(words) - len(name) + 1):
+                candidate = " ".join(words[i : i + len(name)])
+                if SequenceMatcher(None, candidate, target).ratio() >= self.similarity:
+                    return candidate
+        return None
+
+
+class AudioWakeGate(FrameProcessor):
+    """Only streams audio to the STT service after an assistant name was heard.
+
+    Sits between the input transport and the STT service. While closed, the
+    user's speech is checked for an assistant name by a local
+    `KeywordSpotter` every `spot_interval_secs` and at the end of each
+    utterance. When a name is heard, the buffered audio since shortly before
+    the utterance (`preroll_secs`) is replayed to the STT service, so the name
+    itself gets transcribed for the `WakeCheckBuffer`, and audio is forwarded
+    live until neither the user nor the bot spoke for
+    `keepalive_timeout_secs`. The buffer keeps the whole utterance (up to
+    `max_utterance_secs`) until the spot of its end returned.
+
+    Audio that isn't sent to the STT service still has to reach the rest of
+    the pipeline (e.g. the recording), it is handed to the `bypass` processor,
+    which must be placed right after the STT service.
+    """
+
+    def __init__(
+        self,
+        spotter: KeywordSpotter,
+        keepalive_timeout_secs: float = 30.0,
+        preroll_secs: float = 1.5,
+        spot_interval_secs: float = 0.5,
+        spot_window_secs: float = 3.0,
+        max_utterance_secs: float = 10.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._spotter = spotter
+        self._keepalive_timeout_secs = keepalive_timeout_secs
+        self._preroll_secs = preroll_secs
+        self._spot_interval_secs = spot_interval_secs
+        self._spot_window_secs = spot_window_secs
+        self._max_utterance_secs = max_utterance_secs
+        self.bypass = AudioWakeBypass()
+
+        # Open at the start so the reply to the intro gets through
+        self._open = True
+        self._last_activity = time.monotonic()
+        self._user_speaking = False
+        self._bot_speaking = False
+        self._keyword: Optional[str] = None
+
+        self._buffer: deque[InputAudioRawFrame] = deque()
+        self._buffer_bytes = 0
+        self._utterance_bytes = 0
+        self._bytes_since_spot = 0
+        self._spot_task: Optional[asyncio.Task] = None
+        # End of utterance to spot once the running spot returned
+        self._pending_spot: Optional[tuple[bytes, int]] = None
+
+        self.audio_secs = 0.0
+        self.forwarded_secs = 0.0
+        self.wakeups = 0
+        self.spot_runs = 0
+        self.spot_secs = 0.0
+
+    def update_wake_settings(self, wake_phrases: list[str], keepalive_timeout_secs: float):
+        """Swap in new wake phrases and keepalive timeout, e.g. after a config reload."""
+        self._spotter.update_names(wake_phrases)
+        self._keepalive_timeout_secs = keepalive_timeout_secs
+
+    @property
+    def stats(self) -> dict:
+        """How much audio was kept away from the STT service."""
+        saved_secs = self.audio_secs - self.forwarded_secs
+        return {
+            "audio_secs": round(self.audio_secs, 1),
+            "stt_secs": round(self.forwarded_secs, 1),
+            "stt_secs_saved": round(saved_secs, 1),
+            "saved_ratio": saved_secs / self.audio_secs if self.audio_secs else 0.0,
+            "wakeups": self.wakeups,
+            "spot_runs": self.spot_runs,
+            "spot_cpu_secs": round(self.spot_secs, 1),
+        }
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InputAudioRawFrame):
+            await self._handle_audio(frame)
+            return
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._user_speaking = True
+            self._last_activity = time.monotonic()
+            self._utterance_bytes = 0
+            self._bytes_since_spot = 0
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._user_speaking = False
+            self._last_activity = time.monotonic()
+            if not self._open and self._bytes_since_spot:
+                self._start_spotting(end_of_utterance=True)
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._bot_speaking = True
+            self._last_activity = time.monotonic()
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self._bot_speaking = False
+            self._last_activity = time.monotonic()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            self._pending_spot = None
+            if self._spot_task:
+                await self.cancel_task(self._spot_task)
+                self._spot_task = None
+            logger.info(f"Audio wake stats: {self.stats}")
+
+        await self.push_frame(frame, direction)
+
+    async def _handle_audio(self, frame: InputAudioRawFrame):
+        bytes_per_sec = frame.sample_rate * frame.num_channels * 2
+        self.audio_secs += len(frame.audio) / bytes_per_sec
+
+        if self._open:
+            idle_secs = time.monotonic() - self._last_activity
+            speaking = self._user_speaking or self._bot_speaking
+            if speaking or idle_secs < self._keepalive_timeout_secs:
+                self.forwarded_secs += len(frame.audio) / bytes_per_sec
+                await self.push_frame(frame)
+                return
+            self._open = False
+            logger.debug(f"Audio wake: no speech for {idle_secs:.0f}s, pausing STT ({self.stats})")
+
+        # Replay the buffered audio to the STT service first, so it stays in order
+        if self._keyword is not None:
+            await self._wake(frame)
+            return
+
+        await self.bypass.push_frame(frame)
+        self._buffer.append(frame)
+        self._buffer_bytes += len(frame.audio)
+        if self._user_speaking:
+            self._utterance_bytes += len(frame.audio)
+            self._bytes_since_spot += len(frame.audio)
+
+        # A running spot may still wake on the buffered utterance, keep all of it
+        if not self._spotting:
+            # The pre-roll and the utterance so far (the last max_utterance_secs of it)
+            max_bytes = self._preroll_secs * bytes_per_sec
+            if self._user_speaking:
+                max_bytes += min(self._utterance_bytes, self._max_utterance_secs * bytes_per_sec)
+            while self._buffer_bytes > max_bytes:
+                self._buffer_bytes -= len(self._buffer.popleft().audio)
+
+        spot_bytes = self._spot_interval_secs * bytes_per_sec
+        if self._user_speaking and self._bytes_since_spot >= spot_bytes:
+            self._start_spotting()
+
+    @property
+    def _spotting(self) -> bool:
+        return self._spot_task is not None and not self._spot_task.done()
+
+    def _start_spotting(self, end_of_utterance: bool = False):
+        if not self._buffer or (self._spotting and not end_of_utterance):
+            return
+        first = self._buffer[0]
+        bytes_per_sec = first.sample_rate * first.num_channels * 2
+        window = b"".join(frame.audio for frame in self._buffer)
+        window = window[-int(self._spot_window_secs * bytes_per_sec) // 2 * 2 :]
+        self._bytes_since_spot = 0
+        if self._spotting:
+            # The end of the utterance must be checked too, after the running spot
+            self._pending_spot = (window, first.sample_rate)
+            return
+        self._spot_task = self.create_task(self._spot(window, first.sample_rate))
+
+    async def _spot(self, audio: bytes, sample_rate: int):
+        start = time.perf_counter()
+        try:
+            keyword = await asyncio.to_thread(self._spotter.spot, audio, sample_rate)
+        except Exception as e:
+            logger.error(f"Audio wake keyword spotting failed: {e}")
+            return
+        finally:
+            self.spot_runs += 1
+            self.spot_secs += time.perf_counter() - start
+        if self._open:
+            return
+        if keyword:
+            logger.debug(f"Audio wake: heard '{keyword}', resuming STT")
+            # Picked up with the next audio frame, see `_handle_audio`
+            self._keyword = keyword
+            self._pending_spot = None
+        elif self._pending_spot is not None:
+            window, sample_rate = self._pending_spot
+            self._pending_spot = None
+            self._spot_task = self.create_task(self._spot(window, sample_rate))
+
+    async def _wake(self, frame: InputAudioRawFrame):
+        self._keyword = None
+        self._open = True
+        self._last_activity = time.monotonic()
+        self.wakeups += 1
+
+        bytes_per_sec = frame.sample_rate * frame.num_channels * 2
+        self._buffer.append(frame)
+        for buffered_frame in self._buffer:
+            # The bypass already passed the buffered audio on, drop it after the STT
+            if buffered_frame is not frame:
+                self.bypass.expect_replay(buffered_frame)
+            self.forwarded_secs += len(buffered_frame.audio) / bytes_per_sec
+            await self.push_frame(buffered_frame)
+        self._buffer.clear()
+        self._buffer_bytes = 0
+        self._utterance_bytes = 0
+
+
+class AudioWakeBypass(FrameProcessor):
+    """Passes on the audio the `AudioWakeGate` kept from the STT service.
+
+    Replayed audio that comes out of the STT service a second time is dropped.
+    """
+
+    MAX_PENDING_REPLAYS = 10_000
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._replayed: set[int] = set()
+
+    def expect_replay(self, frame: InputAudioRawFrame):
+        # STT services without audio passthrough never return the frames
+        if len(self._replayed) >= AudioWakeBypass.MAX_PENDING_REPLAYS:
+            self._replayed.clear()
+        self._replayed.add(frame.id)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InputAudioRawFrame) and frame.id in self._replayed:
+            self._replayed.discard(frame.id)
+            return
+
+        await self.push_frame(frame, direction)
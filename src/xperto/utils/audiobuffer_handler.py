@@ -6,25 +6,33 @@ from pathlib import Path
 import aiofiles
 from loguru import logger
 
+from .audio_postprocessing import postprocess_tracks_async
+
 
 class AudioBufferHandler:
     """Handles audio data processing and saving.
 
     This class provides methods to save audio data to WAV files, either as a single
-    combined audio file or as separate tracks for user and bot audio.
+    combined audio file or as separate tracks for user and bot audio. Separate
+    tracks can be loudness normalized and mixed in a process pool afterwards.
     """
 
     def __init__(
-        self, output_folder: Path = Path("./recordings"), output_name: str = "recording"
+        self,
+        output_folder: Path = Path("./recordings"),
+        output_name: str = "recording",
+        postprocess_tracks: bool = False,
     ):
         """Initialize the handler with an output folder.
 
         Args:
             output_folder: Path to the folder where audio files will be saved.
+            postprocess_tracks: Whether to create a normalized mix from separate tracks.
         """
         self.output_folder = output_folder
         self.output_folder.mkdir(parents=True, exist_ok=True)
         self.output_name = output_name
+        self.postprocess_tracks = postprocess_tracks
         logger.debug(
             f"AudioBufferHandler initialized with output folder: {self.output_folder}"
         )
@@ -63,3 +71,13 @@ class AudioBufferHandler:
         # Save bot audio
         bot_filename = self.output_folder / f"{timestamp}_{self.output_name}_bot.wav"
         await self.save_audio_file(bot_audio, bot_filename, sample_rate, 1)
+
+        if self.postprocess_tracks and user_filename.exists() and bot_filename.exists():
+            mix_filename = self.output_folder / f"{timestamp}_{self.output_name}_mix.wav"
+            try:
+                stats = await postprocess_tracks_async(
+                    user_filename, bot_filename, mix_filename
+                )
+                logger.info(f"Normalized mix saved to {mix_filename}: {stats}")
+            except Exception as e:
+                logger.error(f"Failed to post-process audio tracks: {e}")
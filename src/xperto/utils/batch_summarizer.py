@@ -0,0 +1,306 @@
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from ..config import PathsConfig
+from .context_manager import ContextInfo, ConversationContextManager
+from .rate_scheduler import (
+    Priority,
+    RateScheduler,
+    rate_limited_http_client,
+    request_priority,
+)
+from .storage_janitor import TIMESTAMPED_NAME_PATTERN, shard_name
+
+SUMMARY_SUFFIX = "_summary.md"
+# In a folder of its own within the contexts folder, so it isn't taken for a
+# context file. Not timestamped, so the janitor never shards, compresses or
+# deletes it
+SUMMARIES_DIR = "summaries"
+CHECKPOINT_NAME = "checkpoint.json"
+# Where earlier versions kept the checkpoint, moved on the next run
+LEGACY_CHECKPOINT_NAME = "summaries_checkpoint.json"
+# Bump when the prompt or output format changes, all sessions are summarized again
+PROMPT_VERSION = "1"
+# Sessions without linked transcripts get those started this soon after them
+TRANSCRIPT_MATCH_SECS = 120
+
+SUMMARY_PROMPT = """You summarize meetings an AI assistant took part in.
+Write in the language of the meeting. Reply with a JSON object:
+{"summary": "<a few paragraphs covering topics, decisions and open questions>",
+ "action_items": [{"task": "...", "owner": "<name or null>", "due": "<date or null>"}]}"""
+
+
+@dataclass
+class SummaryJob:
+    session: ContextInfo
+    transcripts: List[Path]
+    text: str
+    content_hash: str
+
+    @property
+    def output_file(self) -> Path:
+        # Next to the context file, the janitor shards both into the same folder
+        return self.session.file_path.parent / f"{self.session.session_id}{SUMMARY_SUFFIX}"
+
+
+@dataclass
+class SummaryReport:
+    summarized: int = 0
+    skipped: int = 0
+    failed: int = 0
+    elapsed_secs: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+class OpenAISummarizer:
+    """Summarizes with the configured OpenAI model.
+
+    With a `scheduler`, requests queue behind the live turns of running bots
+    in the same process.
+    """
+
+    def __init__(self, api_key: str, model: str, scheduler: Optional[RateScheduler] = None):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        http_client = rate_limited_http_client(scheduler) if scheduler else None
+        self._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+    async def summarize(self, text: str) -> dict:
+        token = request_priority.set(Priority.BACKGROUND)
+        try:
+            response = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": text},
+                ],
+                response_format={"type": "json_object"},
+            )
+        finally:
+            request_priority.reset(token)
+        return json.loads(response.choices[0].message.content or "{}")
+
+
+class StubSummarizer:
+    """Offline summarizer for tests, echoes the start of the meeting."""
+
+    model = "stub"
+
+    def __init__(self, delay_secs: float = 0.05):
+        self.delay_secs = delay_secs
+
+    async def summarize(self, text: str) -> dict:
+        await asyncio.sleep(self.delay_secs)
+        lines = [line for line in text.splitlines() if line.strip()]
+        return {
+            "summary": f"{len(lines)} lines, starting with: " + " / ".join(lines[:3]),
+            "action_items": [],
+        }
+
+
+class BatchSummarizer:
+    """Summarizes all saved sessions after the fact, with bounded concurrency.
+
+    Each session is summarized from its transcripts (all speakers), or from
+    the messages of its saved context if no transcript is found. The summary
+    is written as markdown next to the context file. A checkpoint in the
+    contexts' summaries folder records the content hash of every finished session after
+    each job, so an interrupted run resumes where it stopped and unchanged
+    sessions are skipped on later runs.
+    """
+
+    def __init__(
+        self,
+        paths: PathsConfig,
+        summarizer,
+        concurrency: int = 4,
+        max_input_chars: int = 200_000,
+    ):
+        self.contexts_dir = Path(paths.contexts)
+        self.transcripts_dir = Path(paths.transcripts)
+        self.summarizer = summarizer
+        self.concurrency = max(1, concurrency)
+        self.max_input_chars = max_input_chars
+        self.checkpoint_file = self.contexts_dir / SUMMARIES_DIR / CHECKPOINT_NAME
+        self._checkpoint: Dict[str, dict] = {}
+
+    def collect_jobs(self) -> List[SummaryJob]:
+        """A job for every saved session, oldest first."""
+        manager = ConversationContextManager(self.contexts_dir)
+        transcript_times = self._transcript_times()
+        jobs = []
+        for session in reversed(manager.list_saved_contexts()):
+            try:
+                data = manager._read_context_file(session.file_path)
+                transcripts = self._find_transcripts(session, transcript_times)
+                if transcripts:
+                    text = "\n".join(_read_text(path) for path in transcripts)
+                else:
+                    text = _context_text(data.get("messages", []))
+            except Exception as e:
+                logger.warning(f"Failed to read session {session.session_id}: {e}")
+                continue
+            if not text.strip():
+                continue
+
+            text = self._truncate(text)
+            digest = hashlib.sha256(f"{self.summarizer.model}\n{PROMPT_VERSION}\n".encode())
+            digest.update(text.encode("utf-8"))
+            jobs.append(SummaryJob(session, transcripts, text, digest.hexdigest()))
+        return jobs
+
+    async def run(self) -> SummaryReport:
+        report = SummaryReport()
+        start = time.monotonic()
+        self._checkpoint = self._load_checkpoint()
+
+        pending = []
+        for job in self.collect_jobs():
+            done = self._checkpoint.get(job.session.session_id, {})
+            if done.get("content_hash") == job.content_hash and job.output_file.exists():
+                report.skipped += 1
+            else:
+                pending.append(job)
+
+        logger.info(
+            f"Summarizing {len(pending)} sessions ({report.skipped} up to date) "
+            f"with {self.concurrency} concurrent requests"
+        )
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(job: SummaryJob):
+            async with semaphore:
+                try:
+                    result = await self.summarizer.summarize(job.text)
+                    self._write_summary(job, result)
+                except Exception as e:
+                    report.failed += 1
+                    report.errors.append(f"{job.session.session_id}: {e}")
+                    logger.error(f"Failed to summarize {job.session.session_id}: {e}")
+                    return
+            report.summarized += 1
+            self._checkpoint[job.session.session_id] = {
+                "content_hash": job.content_hash,
+                "output": job.output_file.name,
+                "model": self.summarizer.model,
+                "timestamp": datetime.datetime.now().isoformat(),
+            }
+            self._save_checkpoint()
+
+        await asyncio.gather(*(worker(job) for job in pending))
+        report.elapsed_secs = time.monotonic() - start
+        return report
+
+    def _truncate(self, text: str) -> str:
+        """Keep the start and end of overlong meetings, within the model's context."""
+        if len(text) <= self.max_input_chars:
+            return text
+        half = self.max_input_chars // 2
+        return f"{text[:half]}\n[...]\n{text[-half:]}"
+
+    def _transcript_times(self) -> Dict[Path, datetime.datetime]:
+        """Start time of every transcript, top-level and in date shard folders."""
+        if not self.transcripts_dir.exists():
+            return {}
+        times = {}
+        for path in self.transcripts_dir.glob("**/*.log*"):
+            match = TIMESTAMPED_NAME_PATTERN.match(path.name)
+            if match:
+                times[path] = datetime.datetime.strptime(path.name[:15], "%Y%m%d_%H%M%S")
+        return times
+
+    def _find_transcripts(
+        self, session: ContextInfo, transcript_times: Dict[Path, datetime.datetime]
+    ) -> List[Path]:
+        if session.transcript_files:
+            found = [self._resolve_transcript(name) for name in session.transcript_files]
+            return [path for path in found if path is not None]
+
+        # Older sessions didn't link their transcript, it starts right after them
+        match = TIMESTAMPED_NAME_PATTERN.match(session.session_id)
+        if not match:
+            return []
+        started = datetime.datetime.strptime(session.session_id[:15], "%Y%m%d_%H%M%S")
+        return sorted(
+            path
+            for path, created in transcript_times.items()
+            if 0 <= (created - started).total_seconds() <= TRANSCRIPT_MATCH_SECS
+        )
+
+    def _resolve_transcript(self, name: str) -> Optional[Path]:
+        folders = [self.transcripts_dir]
+        shard = shard_name(name)
+        if shard is not None:
+            folders.append(self.transcripts_dir / shard)
+        for folder in folders:
+            for candidate in (folder / name, folder / f"{name}.gz"):
+                if candidate.exists():
+                    return candidate
+        return None
+
+    def _write_summary(self, job: SummaryJob, result: dict):
+        lines = [f"# {job.session.session_id}", "", str(result.get("summary", "")).strip(), ""]
+        action_items = result.get("action_items") or []
+        if action_items:
+            lines += ["## Action items", ""]
+            for item in action_items:
+                if isinstance(item, dict):
+                    details = [str(item[key]) for key in ("owner", "due") if item.get(key)]
+                    suffix = f" ({', '.join(details)})" if details else ""
+                    lines.append(f"- [ ] {item.get('task', '')}{suffix}")
+                else:
+                    lines.append(f"- [ ] {item}")
+            lines.append("")
+        _write_atomic(job.output_file, "\n".join(lines))
+
+    def _load_checkpoint(self) -> Dict[str, dict]:
+        legacy_file = self.contexts_dir / LEGACY_CHECKPOINT_NAME
+        if legacy_file.exists() and not self.checkpoint_file.exists():
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(legacy_file, self.checkpoint_file)
+        try:
+            with self.checkpoint_file.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable summaries checkpoint: {e}")
+            return {}
+
+    def _save_checkpoint(self):
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.checkpoint_file, json.dumps(self._checkpoint, indent=2))
+
+
+def _read_text(path: Path) -> str:
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    return path.read_text(encoding="utf-8")
+
+
+def _context_text(messages: List[dict]) -> str:
+    """The spoken part of a saved context, without prompts and tool calls."""
+    lines = []
+    for message in messages:
+        content = message.get("content")
+        if message.get("role") in ("user", "assistant") and isinstance(content, str) and content:
+            lines.append(f"{message['role']}: {content}")
+    return "\n".join(lines)
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,282 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import List, Optional
+
+import numpy as np
+import pipecat
+from loguru import logger
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+# Same as pipecat's Silero analyzer, the model state is reset this often
+MODEL_RESET_STATES_SECS = 5.0
+# Analyzers that sent audio this recently are waited for when filling a batch
+ACTIVE_WINDOW_SECS = 0.1
+# pipecat versions known to keep the Silero ONNX session at `SileroVADAnalyzer._model.session`
+SILERO_SESSION_PIPECAT_VERSIONS = ("0.0.90",)
+SILERO_SESSION_INPUTS = {"input", "state", "sr"}
+
+_batcher: Optional["SileroBatcher"] = None
+_batcher_lock = threading.Lock()
+
+
+class _Request:
+    __slots__ = ("analyzer", "audio", "confidence", "error", "done")
+
+    def __init__(self, analyzer: "BatchedSileroVADAnalyzer", audio: bytes):
+        self.analyzer = analyzer
+        self.audio = audio
+        self.confidence = 0.0
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class SileroBatcher:
+    """Runs the Silero VAD model for all sessions of a process in batches.
+
+    Each analyzer thread submits its next window and blocks until the batch
+    containing it was inferred. A batch is run as soon as every recently
+    active analyzer has submitted, or after `max_wait_secs`, so a single
+    session is never delayed. The recurrent model state of each session is
+    kept by its analyzer and gathered into the batch on every run.
+    """
+
+    def __init__(self, max_wait_secs: float = 0.004, max_batch_size: int = 64):
+        self.max_wait_secs = max_wait_secs
+        self.max_batch_size = max_batch_size
+        self._session = _load_silero_session()
+        self._condition = threading.Condition()
+        self._pending: List[_Request] = []
+        # Ended sessions drop out on their own
+        self._analyzers: "weakref.WeakSet[BatchedSileroVADAnalyzer]" = weakref.WeakSet()
+        self._thread: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def register(self, analyzer: "BatchedSileroVADAnalyzer"):
+        with self._condition:
+            self._analyzers.add(analyzer)
+
+    def infer(self, analyzer: "BatchedSileroVADAnalyzer", audio: bytes) -> float:
+        """Voice confidence of one window, blocks until its batch was run."""
+        request = _Request(analyzer, audio)
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="silero-batcher", daemon=True
+                )
+                self._thread.start()
+            self._pending.append(request)
+            self._condition.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.confidence
+
+    def _active_count(self, now: float) -> int:
+        return sum(
+            1
+            for analyzer in self._analyzers
+            if now - analyzer.last_request_time < ACTIVE_WINDOW_SECS
+        )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.max_wait_secs
+                while len(self._pending) < self.max_batch_size:
+                    now = time.monotonic()
+                    if len(self._pending) >= self._active_count(now) or now >= deadline:
+                        break
+                    self._condition.wait(deadline - now)
+
+                # Only windows of the same sample rate can share a batch
+                sample_rate = self._pending[0].analyzer.sample_rate
+                batch = [r for r in self._pending if r.analyzer.sample_rate == sample_rate]
+                batch = batch[: self.max_batch_size]
+                self._pending = [r for r in self._pending if r not in batch]
+
+            try:
+                self._infer_batch(batch, sample_rate)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            for request in batch:
+                request.done.set()
+
+    def _infer_batch(self, batch: List[_Request], sample_rate: int):
+        size = len(batch)
+        context_size = batch[0].analyzer.context_size
+        window = np.empty((size, context_size + len(batch[0].audio) // 2), dtype=np.float32)
+        state = np.empty((2, size, 128), dtype=np.float32)
+        for i, request in enumerate(batch):
+            analyzer = request.analyzer
+            window[i, :context_size] = analyzer.context
+            # Convert straight into the batch row, without an intermediate array
+            np.multiply(
+                np.frombuffer(request.audio, dtype=np.int16),
+                1.0 / 32768.0,
+                out=window[i, context_size:],
+                casting="unsafe",
+            )
+            state[:, i] = analyzer.state
+
+        out, new_state = self._session.run(
+            None, {"input": window, "state": state, "sr": np.array(sample_rate, dtype=np.int64)}
+        )
+
+        for i, request in enumerate(batch):
+            analyzer = request.analyzer
+            analyzer.context[:] = window[i, -context_size:]
+            analyzer.state[:] = new_state[:, i]
+            request.confidence = float(out[i, 0])
+
+        self.batches += 1
+        self.items += size
+
+
+def _load_silero_session():
+    """ONNX session of the Silero model that ships with pipecat.
+
+    Borrows the model loading (and its packaging fallbacks) from pipecat, which
+    keeps the session private. This is the only place reaching into it.
+
+    Raises:
+        RuntimeError: If the installed pipecat keeps no compatible session there.
+    """
+    if pipecat.__version__ not in SILERO_SESSION_PIPECAT_VERSIONS:
+        logger.warning(
+            f"Batched Silero VAD is untested with pipecat {pipecat.__version__} "
+            f"(tested: {', '.join(SILERO_SESSION_PIPECAT_VERSIONS)})"
+        )
+
+    analyzer = SileroVADAnalyzer()
+    session = getattr(getattr(analyzer, "_model", None), "session", None)
+    inputs = {i.name for i in session.get_inputs()} if session is not None else set()
+    if inputs != SILERO_SESSION_INPUTS:
+        raise RuntimeError(
+            f"pipecat {pipecat.__version__} keeps no Silero ONNX session with the inputs "
+            f"{sorted(SILERO_SESSION_INPUTS)} at SileroVADAnalyzer._model.session, "
+            f"the batched VAD needs updating"
+        )
+    return session
+
+
+def get_shared_silero_batcher() -> SileroBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = SileroBatcher()
+        return _batcher
+
+
+class BatchedSileroVADAnalyzer(VADAnalyzer):
+    """Silero VAD that shares one batched model with all sessions of the process.
+
+    A drop-in for `SileroVADAnalyzer` as the `vad_analyzer` of a transport.
+    With many concurrent sessions, one inference per batch instead of per
+    session and window cuts the per-call overhead, which dominates for a
+    model this small.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+        batcher: Optional[SileroBatcher] = None,
+    ):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self._batcher = batcher or get_shared_silero_batcher()
+        self.state = np.zeros((2, 128), dtype=np.float32)
+        self.context = np.zeros(0, dtype=np.float32)
+        self.last_request_time = 0.0
+        self._last_reset_time = 0.0
+
+    @property
+    def context_size(self) -> int:
+        return 64 if self.sample_rate == 16000 else 32
+
+    def set_sample_rate(self, sample_rate: int):
+        if sample_rate != 16000 and sample_rate != 8000:
+            raise ValueError(
+                f"Silero VAD sample rate needs to be 16000 or 8000 (sample rate: {sample_rate})"
+            )
+        super().set_sample_rate(sample_rate)
+        self.context = np.zeros(self.context_size, dtype=np.float32)
+        self._batcher.register(self)
+
+    def num_frames_required(self) -> int:
+        return 512 if self.sample_rate == 16000 else 256
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            self.last_request_time = time.monotonic()
+            confidence = self._batcher.infer(self, buffer)
+
+            # Reset like pipecat's analyzer, the model doesn't need a long memory
+            now = time.time()
+            if now - self._last_reset_time >= MODEL_RESET_STATES_SECS:
+                self.state[:] = 0.0
+                self.context[:] = 0.0
+                self._last_reset_time = now
+
+            return confidence
+        except Exception as e:
+            logger.error(f"Error analyzing audio with batched Silero VAD: {e}")
+            return 0
+
+
+def benchmark(sessions: int = 16, seconds: float = 10.0) -> dict:
+    """Compare the CPU time per session of per-session and batched Silero VAD.
+
+    Every session feeds 20ms chunks of noisy audio with speech-like bursts in
+    real time, as a transport would. Returns the CPU time per audio second
+    per session of both.
+    """
+    sample_rate = 16000
+    chunk_secs = 0.02
+    rng = np.random.default_rng(1)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    audio = rng.normal(0, 300, len(t)) + 6000 * np.sin(2 * np.pi * 220 * t) * (np.sin(t) > 0)
+    audio = np.clip(audio, -32768, 32767).astype(np.int16).tobytes()
+    chunk_bytes = int(sample_rate * chunk_secs) * 2
+
+    async def feed(analyzer: VADAnalyzer, offset: float):
+        analyzer.set_sample_rate(sample_rate)
+        await asyncio.sleep(offset)
+        start = time.monotonic()
+        for i, pos in enumerate(range(0, len(audio) - chunk_bytes, chunk_bytes)):
+            await analyzer.analyze_audio(audio[pos : pos + chunk_bytes])
+            await asyncio.sleep(max(0.0, start + (i + 1) * chunk_secs - time.monotonic()))
+
+    async def run(create_analyzer) -> float:
+        analyzers = [create_analyzer() for _ in range(sessions)]
+        cpu_start = time.process_time()
+        await asyncio.gather(
+            *(feed(analyzer, i * chunk_secs / sessions) for i, analyzer in enumerate(analyzers))
+        )
+        return (time.process_time() - cpu_start) / sessions / seconds
+
+    batcher = get_shared_silero_batcher()
+    per_session = asyncio.run(run(SileroVADAnalyzer))
+    batched = asyncio.run(run(BatchedSileroVADAnalyzer))
+
+    return {
+        "per_session_cpu_ms": per_session * 1000,
+        "batched_cpu_ms": batched * 1000,
+        "mean_batch_size": batcher.stats["mean_batch_size"],
+    }
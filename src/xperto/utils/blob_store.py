@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+# Folder of the blob store in the contexts folder, not timestamped so the
+# janitor never shards or compresses it
+BLOBS_DIR = "blobs"
+# Context messages reference their blob under this key instead of "content"
+BLOB_KEY = "content_blob"
+# A blob is touched at most this often when referenced again, so its mtime
+# tells the janitor it may be about to be referenced by a new save
+TOUCH_INTERVAL_SECS = 3600
+
+
+class BlobStore:
+    """Content-addressed store for large text payloads (e.g. tool results).
+
+    A blob is stored once, gzipped, under the SHA-256 of its text
+    (`<root>/<2 hex>/<digest>.gz`), so the same payload referenced by many
+    saves and sessions takes the space of one. Blobs are written atomically
+    and never change. The `StorageJanitor` deletes blobs no context file
+    references, their mtime is refreshed when they are referenced again
+    (`touch`) so a blob isn't deleted just before the next save references it.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._touched: Dict[str, float] = {}
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def put(self, text: str) -> str:
+        """Store the text if it's new, returns its digest."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists() and self.touch(digest):
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._touched[digest] = time.monotonic()
+        return digest
+
+    def get(self, digest: str) -> str:
+        with gzip.open(self.path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def touch(self, digest: str) -> bool:
+        """Mark the blob as referenced, returns False if it doesn't exist (anymore)."""
+        now = time.monotonic()
+        if now - self._touched.get(digest, -TOUCH_INTERVAL_SECS) < TOUCH_INTERVAL_SECS:
+            return True
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            self._touched.pop(digest, None)
+            return False
+        self._touched[digest] = now
+        return True
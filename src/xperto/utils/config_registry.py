@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from ..config import AppConfig
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """An immutable, fully rendered version of the app config and its prompts."""
+
+    config: AppConfig
+    persona_prompt: str
+    intro_prompt: str
+    version: str
+    loaded_at: datetime.datetime
+
+
+ReloadListener = Callable[[ConfigSnapshot, ConfigSnapshot], None]
+
+
+class ConfigRegistry:
+    """In-memory registry for the app config and its rendered prompts.
+
+    The config and prompt files are read and rendered once per version. When
+    watching is enabled, the files are polled for mtime changes and a new
+    snapshot is swapped in atomically, so the next turn picks it up without
+    restarting the bot. Readers should always go through `current` and never
+    cache the snapshot across turns.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], AppConfig],
+        config_path: Optional[Path] = None,
+        poll_interval_secs: float = 2.0,
+    ):
+        """Initialize the registry and load the first snapshot.
+
+        Args:
+            loader: Callable that builds a fresh `AppConfig` (incl. CLI overrides).
+            config_path: Path to the YAML file backing the config, if any.
+            poll_interval_secs: Interval between mtime checks while watching.
+        """
+        self._loader = loader
+        self._config_path = config_path
+        self._poll_interval_secs = poll_interval_secs
+        self._listeners: List[ReloadListener] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+        self._current = self._load_snapshot()
+        self._mtimes = self._read_mtimes(self._current)
+
+    @property
+    def current(self) -> ConfigSnapshot:
+        """The currently active snapshot."""
+        return self._current
+
+    def add_listener(self, listener: ReloadListener):
+        """Register a callback invoked with (old, new) after every swap."""
+        self._listeners.append(listener)
+
+    def reload_if_changed(self) -> bool:
+        """Reload the snapshot if any watched file changed since the last load.
+
+        Returns:
+            True if a new version was swapped in, False otherwise.
+        """
+        mtimes = self._read_mtimes(self._current)
+        if mtimes == self._mtimes:
+            return False
+
+        try:
+            snapshot = self._load_snapshot()
+        except Exception as e:
+            logger.error(f"Failed to reload config, keeping {self._current.version}: {e}")
+            # Don't retry the same broken files on every poll
+            self._mtimes = mtimes
+            return False
+
+        self._mtimes = self._read_mtimes(snapshot)
+        if snapshot.version == self._current.version:
+            return False
+
+        old, self._current = self._current, snapshot
+        logger.info(f"Config reloaded: {old.version} -> {snapshot.version}")
+
+        for listener in self._listeners:
+            try:
+                listener(old, snapshot)
+            except Exception as e:
+                logger.error(f"Config reload listener failed: {e}")
+        return True
+
+    def start_watching(self):
+        """Start polling the watched files in the background."""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+            logger.info(
+                f"Watching config files every {self._poll_interval_secs}s for changes"
+            )
+
+    async def stop_watching(self):
+        """Stop the background polling task."""
+        if self._watch_task and not self._watch_task.done():
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+        self._watch_task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self._poll_interval_secs)
+            self.reload_if_changed()
+
+    def _load_snapshot(self) -> ConfigSnapshot:
+        config = self._loader()
+        persona = config.load_persona_prompt()
+        intro = config.load_intro_prompt()
+
+        digest = hashlib.sha256()
+        if self._config_path is not None and self._config_path.exists():
+            digest.update(self._config_path.read_bytes())
+        else:
+            digest.update(config.model_dump_json().encode("utf-8"))
+        digest.update(persona.encode("utf-8"))
+        digest.update(intro.encode("utf-8"))
+
+        return ConfigSnapshot(
+            config=config,
+            persona_prompt=persona,
+            intro_prompt=intro,
+            version=digest.hexdigest()[:12],
+            loaded_at=datetime.datetime.now(),
+        )
+
+    def _read_mtimes(self, snapshot: ConfigSnapshot) -> Dict[Path, Optional[int]]:
+        paths = [snapshot.config.prompts.persona, snapshot.config.prompts.intro]
+        if self._config_path is not None:
+            paths.append(self._config_path)
+
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
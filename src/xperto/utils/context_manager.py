@@ -1,12 +1,23 @@
 import datetime
+import gzip
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 
+from .blob_store import BLOB_KEY, BLOBS_DIR, BlobStore
+from .memory_budget import spilled_blob
+from .prompt_cache import provider_tools
+from .storage_janitor import SHARD_NAME_PATTERN, shard_name
+
+CONTEXT_SUFFIXES = (".json", ".json.gz")
+# Tool results this large are kept in the blob store, the context file only
+# references them (see BLOB_KEY)
+BLOB_MIN_CHARS = 2048
+
 
 @dataclass
 class ContextInfo:
@@ -16,14 +27,29 @@ class ContextInfo:
     message_count: int
     config_used: str
     file_path: Path
+    config_version: Optional[str] = None
+    transcript_files: List[str] = field(default_factory=list)
 
 
 class ConversationContextManager:
-    """Manages saving and loading conversation contexts for session resumption."""
+    """Manages saving and loading conversation contexts for session resumption.
+
+    Context files may live directly in `contexts_dir` or in date shard folders
+    and may be gzipped by the `StorageJanitor`, lookups handle all of these.
+
+    Large tool results (e.g. fetched web pages) are stored once in a
+    content-addressed `BlobStore` in `contexts_dir/blobs`, shared by all
+    sessions, and the context file keeps a reference. Periodic saves don't
+    serialize them again and listing contexts doesn't read them. They are
+    only read back by `load_context`.
+    """
 
     def __init__(self, contexts_dir: Path = Path("~/.xperto/contexts").expanduser()):
         self.contexts_dir = contexts_dir
         self.contexts_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs = BlobStore(self.contexts_dir / BLOBS_DIR)
+        # id(content) -> (content, digest), each content string is hashed once
+        self._blob_digests: Dict[int, Tuple[str, str]] = {}
 
     def generate_session_id(self, config_name: str = "default") -> str:
         """Generate a unique session ID based on timestamp and config."""
@@ -36,6 +62,10 @@ class ConversationContextManager:
         session_id: str,
         config_name: str = "default",
         participant_count: int = 1,
+        config_version: Optional[str] = None,
+        transcript_files: Optional[List[str]] = None,
+        transcript_offset: int = 0,
+        meeting_notes: Optional[dict] = None,
     ) -> Path:
         """Save conversation context to file.
 
@@ -44,21 +74,34 @@ class ConversationContextManager:
             session_id: Unique identifier for this session
             config_name: Name of config used for this session
             participant_count: Number of participants in conversation
+            config_version: Version of the config/prompts used for this session
+            transcript_files: Names of the transcript files of this session
+            transcript_offset: Size of the last transcript file at the time of saving
+            meeting_notes: State of the running meeting notes, if kept
 
         Returns:
             Path to the saved context file
         """
-        context_file = self.contexts_dir / f"{session_id}.json"
+        # Keep writing to where the session already lives (e.g. after a resume)
+        existing_file = self._find_context_file(session_id)
+        if existing_file is None:
+            context_file = self.contexts_dir / f"{session_id}.json"
+        else:
+            context_file = existing_file.with_name(f"{session_id}.json")
 
         # Prepare context data
         context_data = {
             "session_id": session_id,
             "timestamp": datetime.datetime.now().isoformat(),
             "config_used": config_name,
+            "config_version": config_version,
             "participant_count": participant_count,
+            "transcript_files": transcript_files or [],
+            "transcript_offset": transcript_offset,
+            "meeting_notes": meeting_notes,
             "message_count": len(context.messages),
-            "messages": context.messages,
-            "tools": context.tools,
+            "messages": self._store_blobs(context.messages),
+            "tools": provider_tools(context.tools),
             "metadata": {
                 "saved_at": datetime.datetime.now().isoformat(),
                 "version": "1.0",
@@ -69,6 +112,10 @@ class ConversationContextManager:
             with context_file.open("w", encoding="utf-8") as f:
                 json.dump(context_data, f, indent=2, ensure_ascii=False)
 
+            # A compressed copy from a previous run is outdated now
+            if existing_file is not None and existing_file != context_file:
+                existing_file.unlink(missing_ok=True)
+
             logger.info(f"Context saved to: {context_file}")
             return context_file
 
@@ -92,14 +139,13 @@ class ConversationContextManager:
         context_file = self._resolve_context_file(session_id)
 
         try:
-            with context_file.open("r", encoding="utf-8") as f:
-                context_data = json.load(f)
+            context_data = self._read_context_file(context_file)
 
             # Create new context and populate with messages
             context = OpenAILLMContext()
             # Clear existing messages and extend with loaded messages
             context.messages.clear()
-            context.messages.extend(context_data["messages"])
+            context.messages.extend(self._load_blobs(context_data["messages"]))
             tools = context_data.get("tools", [])
             if tools:
                 context.set_tools(tools)
@@ -109,8 +155,12 @@ class ConversationContextManager:
                 "session_id": context_data["session_id"],
                 "timestamp": context_data["timestamp"],
                 "config_used": context_data["config_used"],
+                "config_version": context_data.get("config_version"),
                 "participant_count": context_data["participant_count"],
                 "message_count": context_data["message_count"],
+                "transcript_files": context_data.get("transcript_files", []),
+                "transcript_offset": context_data.get("transcript_offset", 0),
+                "meeting_notes": context_data.get("meeting_notes"),
             }
 
             logger.info(f"Context loaded from: {context_file}")
@@ -130,10 +180,9 @@ class ConversationContextManager:
         """
         contexts = []
 
-        for context_file in self.contexts_dir.glob("*.json"):
+        for context_file in self._iter_context_files():
             try:
-                with context_file.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = self._read_context_file(context_file)
 
                 contexts.append(
                     ContextInfo(
@@ -143,6 +192,8 @@ class ConversationContextManager:
                         message_count=data["message_count"],
                         config_used=data["config_used"],
                         file_path=context_file,
+                        config_version=data.get("config_version"),
+                        transcript_files=data.get("transcript_files", []),
                     )
                 )
 
@@ -154,6 +205,64 @@ class ConversationContextManager:
         contexts.sort(key=lambda x: x.timestamp, reverse=True)
         return contexts
 
+    def _store_blobs(self, messages: List[dict]) -> List[dict]:
+        """The messages to save, large tool results replaced by blob references."""
+        stored = []
+        digests = {}
+        for message in messages:
+            content = message.get("content")
+            # Spilled to save memory: the blob exists, reference it so it's kept
+            digest = spilled_blob(message)
+            if digest is not None and self.blobs.touch(digest):
+                stored.append(
+                    {**{k: v for k, v in message.items() if k != "content"}, BLOB_KEY: digest}
+                )
+                continue
+            if (
+                message.get("role") != "tool"
+                or not isinstance(content, str)
+                or len(content) < BLOB_MIN_CHARS
+            ):
+                stored.append(message)
+                continue
+
+            cached = self._blob_digests.get(id(content))
+            if cached is not None and cached[0] is content and self.blobs.touch(cached[1]):
+                digest = cached[1]
+            else:
+                digest = self.blobs.put(content)
+            digests[id(content)] = (content, digest)
+            stored.append(
+                {**{k: v for k, v in message.items() if k != "content"}, BLOB_KEY: digest}
+            )
+        # Only keep what's still in the context, spilled results may be freed
+        self._blob_digests = digests
+        return stored
+
+    def _load_blobs(self, messages: List[dict]) -> List[dict]:
+        """The saved messages with their blob references resolved.
+
+        Resolved right away: the whole context goes to the LLM on the first
+        turn after resuming, lazy loading would only move the reads there.
+        """
+        loaded = []
+        for message in messages:
+            digest = message.get(BLOB_KEY)
+            if digest is None:
+                loaded.append(message)
+                continue
+            try:
+                content = self.blobs.get(digest)
+            except (OSError, EOFError) as e:
+                logger.warning(f"Tool result {digest[:12]} is missing from the blob store: {e}")
+                content = "[Tool result no longer available]"
+            else:
+                self._blob_digests[id(content)] = (content, digest)
+            loaded.append(
+                {**{k: v for k, v in message.items() if k != BLOB_KEY}, "content": content}
+            )
+        return loaded
+
     def _resolve_context_file(self, session_id: str) -> Path:
         """Resolve session_id to actual context file path.
 
@@ -170,18 +279,64 @@ class ConversationContextManager:
             ValueError: If multiple contexts match partial session_id
         """
         # Try exact match first
-        exact_file = self.contexts_dir / f"{session_id}.json"
-        if exact_file.exists():
+        exact_file = self._find_context_file(session_id)
+        if exact_file is not None:
             return exact_file
 
         # Try partial match
-        matching_files = list(self.contexts_dir.glob(f"*{session_id}*.json"))
+        matching_files = [
+            f for f in self._iter_context_files() if session_id in self._session_id_of(f)
+        ]
 
         if not matching_files:
             raise FileNotFoundError(f"No context found matching: {session_id}")
 
         if len(matching_files) > 1:
-            matches = [f.stem for f in matching_files]
+            matches = [self._session_id_of(f) for f in matching_files]
             raise ValueError(f"Multiple contexts match '{session_id}': {matches}")
 
         return matching_files[0]
+
+    def _find_context_file(self, session_id: str) -> Optional[Path]:
+        """Find the context file of an exact session ID without scanning folders."""
+        folders = [self.contexts_dir]
+        shard = shard_name(session_id)
+        if shard is not None:
+            folders.append(self.contexts_dir / shard)
+
+        for folder in folders:
+            for suffix in CONTEXT_SUFFIXES:
+                candidate = folder / f"{session_id}{suffix}"
+                if candidate.exists():
+                    return candidate
+        return None
+
+    def _iter_context_files(self) -> List[Path]:
+        """All context files, both top-level and in date shard folders."""
+        folders = [self.contexts_dir] + [
+            d
+            for d in self.contexts_dir.iterdir()
+            if d.is_dir() and SHARD_NAME_PATTERN.match(d.name)
+        ]
+        return [
+            f
+            for folder in folders
+            for pattern in ("*.json", "*.json.gz")
+            for f in folder.glob(pattern)
+        ]
+
+    @staticmethod
+    def _session_id_of(context_file: Path) -> str:
+        name = context_file.name
+        for suffix in CONTEXT_SUFFIXES[::-1]:
+            if name.endswith(suffix):
+                return name[: -len(suffix)]
+        return context_file.stem
+
+    @staticmethod
+    def _read_context_file(context_file: Path) -> Dict[str, Any]:
+        if context_file.name.endswith(".gz"):
+            with gzip.open(context_file, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        with context_file.open("r", encoding="utf-8") as f:
+            return json.load(f)
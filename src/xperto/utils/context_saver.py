@@ -1,6 +1,7 @@
 import asyncio
 import time
-from typing import Optional
+from pathlib import Path
+from typing import List, Optional
 
 from loguru import logger
 from pipecat.frames.frames import CancelFrame, Frame
@@ -8,6 +9,7 @@ from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 
 from .context_manager import ConversationContextManager
+from .meeting_notes import MeetingNotes
 
 
 class ContextSaverProcessor(FrameProcessor):
@@ -22,6 +24,7 @@ class ContextSaverProcessor(FrameProcessor):
         context_manager: ConversationContextManager,
         session_id: str,
         config_name: str = "default",
+        config_version: Optional[str] = None,
         save_interval: float = 60.0,  # Save every minute
         **kwargs,
     ):
@@ -31,10 +34,14 @@ class ContextSaverProcessor(FrameProcessor):
         self.context_manager = context_manager
         self.session_id = session_id
         self.config_name = config_name
+        self.config_version = config_version
         self.save_interval = save_interval
 
         self.last_save_time = time.time()
         self.participant_count = 1
+        self.transcript_files: List[str] = []
+        self.transcript_file: Optional[Path] = None
+        self.meeting_notes: Optional[MeetingNotes] = None
         self._save_task: Optional[asyncio.Task] = None
 
     async def process_frame(self, frame: Frame, direction: FrameDirection):
@@ -69,6 +76,10 @@ class ContextSaverProcessor(FrameProcessor):
                     self.session_id,
                     config_name=self.config_name,
                     participant_count=self.participant_count,
+                    config_version=self.config_version,
+                    transcript_files=self.transcript_files,
+                    transcript_offset=self._transcript_offset(),
+                    meeting_notes=self.meeting_notes.state if self.meeting_notes else None,
                 )
                 self.last_save_time = time.time()
                 logger.debug(f"Context saved to: {file_path}")
@@ -92,6 +103,10 @@ class ContextSaverProcessor(FrameProcessor):
                     self.session_id,
                     config_name=self.config_name,
                     participant_count=self.participant_count,
+                    config_version=self.config_version,
+                    transcript_files=self.transcript_files,
+                    transcript_offset=self._transcript_offset(),
+                    meeting_notes=self.meeting_notes.state if self.meeting_notes else None,
                 )
                 self.last_save_time = time.time()
                 logger.info(f"Periodic context save completed: {file_path}")
@@ -106,6 +121,32 @@ class ContextSaverProcessor(FrameProcessor):
         """Update participant count for context metadata."""
         self.participant_count = count
 
+    def set_transcript_files(
+        self, transcript_files: List[str], transcript_file: Optional[Path] = None
+    ):
+        """Update the transcript files recorded in context metadata.
+
+        The size of `transcript_file`, the one currently written, is recorded
+        with every save, so lines written after it can be recovered.
+        """
+        self.transcript_files = transcript_files
+        self.transcript_file = transcript_file
+
+    def set_meeting_notes(self, meeting_notes: Optional[MeetingNotes]):
+        """Save the state of the running meeting notes with the context."""
+        self.meeting_notes = meeting_notes
+
+    def _transcript_offset(self) -> int:
+        try:
+            return self.transcript_file.stat().st_size if self.transcript_file else 0
+        except OSError:
+            return 0
+
+    def set_config_version(self, config_name: str, config_version: Optional[str]):
+        """Update the config name and version recorded in context metadata."""
+        self.config_name = config_name
+        self.config_version = config_version
+
     async def cleanup(self):
         """Clean up any pending save tasks."""
         if self._save_task and not self._save_task.done():
@@ -0,0 +1,71 @@
+from typing import AsyncGenerator
+
+import httpx
+from deepgram import SpeakOptions
+from loguru import logger
+from pipecat.frames.frames import (
+    ErrorFrame,
+    Frame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.services.deepgram.tts import DeepgramTTSService
+from pipecat.utils.tracing.service_decorators import traced_tts
+
+
+class PooledDeepgramTTSService(DeepgramTTSService):
+    """Deepgram TTS that keeps one HTTP connection pool for all requests.
+
+    The Deepgram SDK opens a fresh `httpx.AsyncClient` for every sentence,
+    which loads the CA bundle (~190ms, blocking the event loop) and does a
+    new TCP/TLS handshake each time. Passing a long-lived transport skips
+    both: the SSL context is built once, when the service is created, and
+    connections are reused between sentences.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._http_transport = httpx.AsyncHTTPTransport()
+
+    async def cleanup(self):
+        await super().cleanup()
+        await self._http_transport.aclose()
+
+    @traced_tts
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        logger.debug(f"{self}: Generating TTS [{text}]")
+
+        options = SpeakOptions(
+            model=self._voice_id,
+            encoding=self._settings["encoding"],
+            sample_rate=self.sample_rate,
+            container="none",
+        )
+
+        try:
+            await self.start_ttfb_metrics()
+
+            response = await self._deepgram_client.speak.asyncrest.v("1").stream_raw(
+                {"text": text}, options, transport=self._http_transport
+            )
+
+            await self.start_tts_usage_metrics(text)
+            yield TTSStartedFrame()
+
+            try:
+                async for data in response.aiter_bytes():
+                    await self.stop_ttfb_metrics()
+                    if data:
+                        yield TTSAudioRawFrame(
+                            audio=data, sample_rate=self.sample_rate, num_channels=1
+                        )
+            finally:
+                # Hand the connection back to the pool, also on interruption
+                await response.aclose()
+
+            yield TTSStoppedFrame()
+
+        except Exception as e:
+            logger.exception(f"{self} exception: {e}")
+            yield ErrorFrame(f"Error getting audio: {str(e)}")
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import aiohttp
 import html2text
 from ddgs import DDGS
@@ -5,6 +7,9 @@ from loguru import logger
 from pipecat.adapters.schemas.function_schema import FunctionSchema
 from pipecat.services.llm_service import FunctionCallParams
 
+from .knowledge_base import get_shared_knowledge_base
+from .rate_scheduler import WEB_SCHEDULER, get_shared_rate_scheduler
+
 web_search_schema = FunctionSchema(
     name="web_search",
     description="Fetch relevant information from the web via search",
@@ -20,6 +25,7 @@ web_search_schema = FunctionSchema(
 
 async def web_search(params: FunctionCallParams):
     query = params.arguments.get("query", "")
+    await get_shared_rate_scheduler(WEB_SCHEDULER).acquire()
     results = DDGS().text(query, max_results=3)
     logger.debug(f"Web search for query '{query}' returned results:")
     logger.debug(results)
@@ -41,6 +47,7 @@ web_fetch_schema = FunctionSchema(
 
 async def web_fetch(params: FunctionCallParams):
     url = params.arguments.get("url", "")
+    await get_shared_rate_scheduler(WEB_SCHEDULER).acquire()
     try:
         async with aiohttp.ClientSession() as session:
             async with session.get(url, timeout=10) as response:
@@ -55,3 +62,33 @@ async def web_fetch(params: FunctionCallParams):
     except Exception as e:
         result = {"url": url, "error": str(e), "status": "error"}
     await params.result_callback({"result": result})
+
+
+kb_search_schema = FunctionSchema(
+    name="kb_search",
+    description="Search the internal knowledge base (our own documents) for relevant passages",
+    properties={
+        "query": {
+            "type": "string",
+            "description": "Keywords to look up in the knowledge base",
+        },
+    },
+    required=["query"],
+)
+
+
+def create_kb_search(index_dir: Path, top_k: int = 5, max_tokens: int = 800):
+    """Create the `kb_search` handler for the index in `index_dir`."""
+
+    async def kb_search(params: FunctionCallParams):
+        query = params.arguments.get("query", "")
+        try:
+            results = get_shared_knowledge_base(index_dir).search(query, top_k, max_tokens)
+            logger.debug(f"Knowledge base search for '{query}' returned {len(results)} passages")
+            result = {"results": results}
+        except Exception as e:
+            logger.error(f"Knowledge base search failed: {e}")
+            result = {"error": str(e)}
+        await params.result_callback(result)
+
+    return kb_search
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+from loguru import logger
+from openai import AsyncStream
+from openai.types.chat import ChatCompletionChunk
+from pipecat.adapters.services.open_ai_adapter import OpenAILLMInvocationParams
+from pipecat.frames.frames import CancelFrame, EndFrame
+from pipecat.services.openai.llm import OpenAILLMService
+
+
+class PrefetchedStream:
+    """Async chunk stream whose first chunk has already been received."""
+
+    def __init__(self, first_chunk: ChatCompletionChunk, stream: AsyncStream):
+        self._first_chunk: Optional[ChatCompletionChunk] = first_chunk
+        self._stream = stream
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        return self
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        if self._first_chunk is not None:
+            chunk, self._first_chunk = self._first_chunk, None
+            return chunk
+        return await self._stream.__anext__()
+
+    async def close(self):
+        await self._stream.close()
+
+
+class HedgedOpenAILLMService(OpenAILLMService):
+    """OpenAI LLM service that hedges slow requests with a second one.
+
+    If the first chunk of a completion hasn't arrived after the hedge delay, a
+    second, identical request is fired, either to the same provider or to a
+    configured secondary OpenAI-compatible provider/model. Whichever streams
+    first is used and the other one is cancelled. If the first request fails,
+    the second one is fired right away as a failover.
+
+    The hedge delay is the given percentile of recently observed first-chunk
+    latencies, so only the slow tail gets hedged.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        initial_delay_secs: float = 1.5,
+        min_delay_secs: float = 0.3,
+        max_delay_secs: float = 3.0,
+        window_size: int = 100,
+        secondary_model: Optional[str] = None,
+        secondary_base_url: Optional[str] = None,
+        secondary_api_key: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._percentile = percentile
+        self._initial_delay_secs = initial_delay_secs
+        self._min_delay_secs = min_delay_secs
+        self._max_delay_secs = max_delay_secs
+        self._latencies: deque[float] = deque(maxlen=window_size)
+
+        self._secondary_model = secondary_model
+        self._secondary_client = self._client
+        self._secondary_is_other_provider = bool(secondary_base_url)
+        if secondary_base_url or secondary_api_key:
+            self._secondary_client = self.create_client(
+                api_key=secondary_api_key or kwargs.get("api_key"),
+                base_url=secondary_base_url,
+            )
+
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    @property
+    def hedge_stats(self) -> dict:
+        """How often requests were hedged and how often the hedge was faster."""
+        return {
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "hedge_rate": self.hedges_fired / self.requests if self.requests else 0.0,
+            "hedge_delay_secs": self.hedge_delay_secs(),
+        }
+
+    async def stop(self, frame: EndFrame):
+        await super().stop(frame)
+        logger.info(f"{self}: Hedge stats: {self.hedge_stats}")
+
+    async def cancel(self, frame: CancelFrame):
+        await super().cancel(frame)
+        logger.info(f"{self}: Hedge stats: {self.hedge_stats}")
+
+    def hedge_delay_secs(self) -> float:
+        """Current hedge delay derived from the recent first-chunk latencies."""
+        if len(self._latencies) < 10:
+            return self._initial_delay_secs
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self._percentile / 100.0))
+        return min(self._max_delay_secs, max(self._min_delay_secs, ordered[index]))
+
+    async def get_chat_completions(
+        self, params_from_context: OpenAILLMInvocationParams
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        params = self.build_chat_completion_params(params_from_context)
+        self.requests += 1
+        start = time.monotonic()
+
+        primary = asyncio.create_task(self._first_chunk(self._client, params))
+        started = [primary]
+        pending = {primary}
+        winner: Optional[asyncio.Task] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay_secs())
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    logger.warning(f"{self}: LLM request failed: {task.exception()}")
+                if winner is not None:
+                    break
+
+                # Hedge if the primary is slow, fail over if it failed
+                if len(started) == 1:
+                    pending.add(self._start_hedge(params, started))
+                    logger.debug(
+                        f"{self}: Hedging request after {time.monotonic() - start:.2f}s "
+                        f"({self.hedge_stats})"
+                    )
+                elif not pending:
+                    # Every request failed, surface the primary's error
+                    raise primary.exception()
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if winner is not primary:
+                self.hedges_won += 1
+            self._latencies.append(time.monotonic() - start)
+            return winner.result()
+        finally:
+            for task in started:
+                if task is not winner:
+                    task.cancel()
+                    asyncio.create_task(self._close_loser(task))
+
+    def _start_hedge(self, params: dict, started: list[asyncio.Task]) -> asyncio.Task:
+        self.hedges_fired += 1
+        hedge_params = dict(params)
+        if self._secondary_model:
+            hedge_params["model"] = self._secondary_model
+        if self._secondary_is_other_provider:
+            # Other OpenAI-compatible providers may reject OpenAI-only parameters
+            hedge_params.pop("prompt_cache_key", None)
+        task = asyncio.create_task(self._first_chunk(self._secondary_client, hedge_params))
+        started.append(task)
+        return task
+
+    @staticmethod
+    async def _first_chunk(client: Any, params: dict) -> PrefetchedStream:
+        stream = await client.chat.completions.create(**params)
+        try:
+            first_chunk = await stream.__anext__()
+        except BaseException:
+            await stream.close()
+            raise
+        return PrefetchedStream(first_chunk, stream)
+
+    @staticmethod
+    async def _close_loser(task: asyncio.Task):
+        try:
+            stream = await task
+        except BaseException:
+            return
+        await stream.close()
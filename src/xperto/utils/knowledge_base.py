@@ -0,0 +1,374 @@
+import bisect
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+INDEX_VERSION = 2
+SOURCE_SUFFIXES = (".md", ".markdown", ".txt", ".pdf")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+PASSAGE_MAX_WORDS = 120
+# Rough token estimate, good enough to fill a budget
+CHARS_PER_TOKEN = 4
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*)$")
+
+# Each build is written to its own folder in here, meta.json names the current one
+BUILDS_DIR = "builds"
+# Sessions may still be opening the previous build, it is kept
+KEEP_BUILDS = 2
+
+_knowledge_bases: Dict[Tuple[str, int], "KnowledgeBase"] = {}
+_knowledge_bases_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1]
+
+
+def chunk_text(text: str, markdown: bool = False, max_words: int = PASSAGE_MAX_WORDS) -> List[str]:
+    """Split a document into passages of up to `max_words` words.
+
+    Paragraphs are kept together where possible. In markdown, each passage
+    starts with its closest heading so it can be understood on its own.
+    """
+    passages: List[str] = []
+    heading = ""
+    current: List[str] = []
+    current_words = 0
+
+    def flush():
+        nonlocal current, current_words
+        if current:
+            body = "\n\n".join(current)
+            passages.append(f"{heading}\n{body}" if heading else body)
+        current, current_words = [], 0
+
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        first_line, _, rest = paragraph.partition("\n")
+        match = HEADING_PATTERN.match(first_line) if markdown else None
+        if match:
+            flush()
+            heading = match.group(1).strip()
+            paragraph = rest.strip()
+            if not paragraph:
+                continue
+
+        words = paragraph.split()
+        if current_words + len(words) > max_words:
+            flush()
+        # Paragraphs longer than a passage are cut into windows
+        while len(words) > max_words:
+            current = [" ".join(words[:max_words])]
+            current_words = max_words
+            flush()
+            words = words[max_words:]
+        if words:
+            current.append(paragraph if len(words) == len(paragraph.split()) else " ".join(words))
+            current_words += len(words)
+    flush()
+    return passages
+
+
+def read_document(path: Path) -> str:
+    if path.suffix.lower() == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ModuleNotFoundError:
+            logger.error("In order to index PDF files, you need to `uv sync --extra kb-pdf`.")
+            raise
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+@dataclass
+class BuildReport:
+    indexed: int = 0
+    reused: int = 0
+    removed: int = 0
+    passages: int = 0
+    terms: int = 0
+    rebuilt: bool = False
+    elapsed_secs: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def build_index(source_dir: Path, index_dir: Path) -> BuildReport:
+    """Build or update the knowledge-base index of a folder of documents.
+
+    Only new and modified documents are read and chunked again, the passages
+    of unchanged ones are reused from the previous build. A rebuild writes a
+    new build folder and then replaces `meta.json`, which names it, so a
+    session opening the index sees either the old or the new build, never a
+    mix. Running sessions keep using the old build until they reopen the
+    index.
+    """
+    start = time.perf_counter()
+    report = BuildReport()
+    chunks_dir = index_dir / "chunks"
+    chunks_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = index_dir / "files.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    new_manifest = {}
+
+    for path in sorted(p for p in source_dir.rglob("*") if p.suffix.lower() in SOURCE_SUFFIXES):
+        relative = path.relative_to(source_dir).as_posix()
+        stat = path.stat()
+        entry = manifest.get(relative)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            new_manifest[relative] = entry
+            report.reused += 1
+            continue
+
+        try:
+            passages = chunk_text(read_document(path), markdown=path.suffix.lower() != ".txt")
+        except Exception as e:
+            report.errors.append(f"{relative}: {e}")
+            continue
+        chunk_name = hashlib.sha1(relative.encode("utf-8")).hexdigest() + ".json"
+        (chunks_dir / chunk_name).write_text(json.dumps(passages, ensure_ascii=False))
+        new_manifest[relative] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "chunks": chunk_name,
+        }
+        report.indexed += 1
+
+    for relative in manifest.keys() - new_manifest.keys():
+        (chunks_dir / manifest[relative]["chunks"]).unlink(missing_ok=True)
+        report.removed += 1
+
+    meta_path = index_dir / "meta.json"
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else None
+    if report.indexed or report.removed or not meta or meta.get("version") != INDEX_VERSION:
+        report.passages, report.terms = _write_index(index_dir, new_manifest)
+        report.rebuilt = True
+    else:
+        report.passages, report.terms = meta["passages"], meta["terms"]
+
+    _replace(manifest_path, json.dumps(new_manifest, indent=1).encode("utf-8"))
+    report.elapsed_secs = time.perf_counter() - start
+    return report
+
+
+def _write_index(index_dir: Path, manifest: dict) -> Tuple[int, int]:
+    """Write the inverted index and passage store of all documents as a new build."""
+    sources: List[str] = []
+    passage_sources: List[int] = []
+    passage_lengths: List[int] = []
+    passage_offsets = [0]
+    passages_blob = bytearray()
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    for source_id, relative in enumerate(sorted(manifest)):
+        sources.append(relative)
+        chunks_path = index_dir / "chunks" / manifest[relative]["chunks"]
+        for text in json.loads(chunks_path.read_text()):
+            passage_id = len(passage_lengths)
+            tokens = tokenize(text)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((passage_id, count))
+
+            passage_sources.append(source_id)
+            passage_lengths.append(len(tokens))
+            passages_blob += text.encode("utf-8")
+            passage_offsets.append(len(passages_blob))
+
+    terms = sorted(postings)
+    terms_blob = bytearray()
+    term_offsets = [0]
+    posting_offsets = [0]
+    posting_passages: List[int] = []
+    posting_tf: List[int] = []
+    for term in terms:
+        terms_blob += term.encode("utf-8")
+        term_offsets.append(len(terms_blob))
+        for passage_id, count in postings[term]:
+            posting_passages.append(passage_id)
+            posting_tf.append(min(count, np.iinfo(np.uint16).max))
+        posting_offsets.append(len(posting_passages))
+
+    arrays = {
+        "term_offsets": np.array(term_offsets, dtype=np.int64),
+        "posting_offsets": np.array(posting_offsets, dtype=np.int64),
+        "posting_passages": np.array(posting_passages, dtype=np.int32),
+        "posting_tf": np.array(posting_tf, dtype=np.uint16),
+        "passage_offsets": np.array(passage_offsets, dtype=np.int64),
+        "passage_lengths": np.array(passage_lengths, dtype=np.int32),
+        "passage_sources": np.array(passage_sources, dtype=np.int32),
+    }
+    build = f"{datetime.datetime.now():%Y%m%d_%H%M%S_%f}"
+    build_dir = index_dir / BUILDS_DIR / build
+    build_dir.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(build_dir / f"{name}.npy", array)
+    (build_dir / "terms.bin").write_bytes(terms_blob)
+    (build_dir / "passages.bin").write_bytes(passages_blob)
+    (build_dir / "sources.json").write_text(json.dumps(sources, ensure_ascii=False), "utf-8")
+
+    # Swaps in the complete build
+    meta = {
+        "version": INDEX_VERSION,
+        "build": build,
+        "passages": len(passage_lengths),
+        "terms": len(terms),
+        "avg_length": sum(passage_lengths) / len(passage_lengths) if passage_lengths else 0.0,
+        "built_at": datetime.datetime.now().isoformat(),
+    }
+    _replace(index_dir / "meta.json", json.dumps(meta).encode("utf-8"))
+
+    # Mapped files can be deleted on POSIX, open sessions keep reading them
+    for old_build in sorted((index_dir / BUILDS_DIR).iterdir())[:-KEEP_BUILDS]:
+        shutil.rmtree(old_build, ignore_errors=True)
+    # Version 1 indexes were written to the index folder itself
+    for name in ("terms.bin", "passages.bin", "sources.json", *(f"{n}.npy" for n in arrays)):
+        (index_dir / name).unlink(missing_ok=True)
+    return len(passage_lengths), len(terms)
+
+
+def _replace(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class _Terms:
+    """Sorted vocabulary in a memory-mapped blob, searchable with bisect."""
+
+    def __init__(self, blob: np.memmap, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self._blob[self._offsets[index] : self._offsets[index + 1]]).decode("utf-8")
+
+    def find(self, term: str) -> Optional[int]:
+        index = bisect.bisect_left(self, term)
+        if index < len(self) and self[index] == term:
+            return index
+        return None
+
+
+class KnowledgeBase:
+    """BM25 search over a prebuilt, memory-mapped index (see `build_index`).
+
+    Opening only maps the files, so it is instant regardless of the index
+    size, and the pages are shared by all sessions and processes on the host
+    through the OS page cache.
+    """
+
+    def __init__(self, index_dir: Path):
+        meta_path = index_dir / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No knowledge base index in {index_dir}, build it first")
+        meta = json.loads(meta_path.read_text())
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"Knowledge base index in {index_dir} is outdated, rebuild it")
+
+        self.index_dir = index_dir
+        self.passage_count = meta["passages"]
+        self.avg_length = meta["avg_length"] or 1.0
+        build_dir = index_dir / BUILDS_DIR / meta["build"]
+
+        def load(name: str) -> np.ndarray:
+            return np.load(build_dir / f"{name}.npy", mmap_mode="r")
+
+        self._terms = _Terms(_map_bytes(build_dir / "terms.bin"), load("term_offsets"))
+        self._posting_offsets = load("posting_offsets")
+        self._posting_passages = load("posting_passages")
+        self._posting_tf = load("posting_tf")
+        self._passages = _map_bytes(build_dir / "passages.bin")
+        self._passage_offsets = load("passage_offsets")
+        self._passage_lengths = load("passage_lengths")
+        self._passage_sources = load("passage_sources")
+        self._sources = json.loads((build_dir / "sources.json").read_text(encoding="utf-8"))
+
+    def passage(self, passage_id: int) -> str:
+        start, end = self._passage_offsets[passage_id], self._passage_offsets[passage_id + 1]
+        return bytes(self._passages[start:end]).decode("utf-8")
+
+    def search(self, query: str, top_k: int = 5, max_tokens: int = 800) -> List[dict]:
+        """Best matching passages, as many of the top `top_k` as fit into `max_tokens`."""
+        term_ids = {self._terms.find(token) for token in tokenize(query)} - {None}
+        if not term_ids or not self.passage_count:
+            return []
+
+        scores = np.zeros(self.passage_count, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self._posting_offsets[term_id], self._posting_offsets[term_id + 1]
+            passages = self._posting_passages[start:end]
+            tf = self._posting_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1.0 + (self.passage_count - df + 0.5) / (df + 0.5))
+            norm = K1 * (1.0 - B + B * self._passage_lengths[passages] / self.avg_length)
+            scores[passages] += idf * tf * (K1 + 1.0) / (tf + norm)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+        results = []
+        budget_chars = max_tokens * CHARS_PER_TOKEN
+        for passage_id in candidates:
+            text = self.passage(int(passage_id))
+            if len(text) > budget_chars:
+                if results:
+                    break
+                # Better a truncated best passage than nothing
+                text = text[:budget_chars]
+            budget_chars -= len(text)
+            results.append(
+                {
+                    "source": self._sources[self._passage_sources[passage_id]],
+                    "text": text,
+                    "score": round(float(scores[passage_id]), 3),
+                }
+            )
+        return results
+
+
+def _map_bytes(path: Path) -> np.ndarray:
+    # np.memmap can't map empty files
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def get_shared_knowledge_base(index_dir: Path) -> KnowledgeBase:
+    """Open an index once per process, reopened when it was rebuilt."""
+    meta_path = index_dir / "meta.json"
+    key = (str(index_dir.resolve()), meta_path.stat().st_mtime_ns if meta_path.exists() else 0)
+    with _knowledge_bases_lock:
+        if key not in _knowledge_bases:
+            for stale in [k for k in _knowledge_bases if k[0] == key[0]]:
+                del _knowledge_bases[stale]
+            _knowledge_bases[key] = KnowledgeBase(index_dir)
+            logger.debug(f"Opened knowledge base {index_dir}")
+        return _knowledge_bases[key]
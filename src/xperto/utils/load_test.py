@@ -0,0 +1,594 @@
+import asyncio
+import datetime
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice, ChoiceDelta
+from pipecat.adapters.services.open_ai_adapter import OpenAILLMInvocationParams
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.frames.frames import (
+    Frame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.services.openai.llm import OpenAILLMService
+from pipecat.services.stt_service import SegmentedSTTService
+from pipecat.services.tts_service import TTSService
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+from pipecat.utils.time import time_now_iso8601
+
+from ..bots.bot import SimpleBot
+from ..config import APIKeysConfig, AppConfig, PathsConfig
+
+FRAME_SECS = 0.02
+SAMPLE_RATE = 16000
+WORDS = (
+    "we should move the release to next week because the migration is not done yet "
+    "what do you think about the budget for the third quarter and the hiring plan "
+    "can someone share the numbers from the last customer survey before friday"
+).split()
+ANSWER = (
+    "Sure. Based on what was discussed, the release should move by one week so the "
+    "migration can be finished and tested. The budget question can be settled once "
+    "the survey numbers are shared."
+)
+
+
+@dataclass
+class LoadTestStats:
+    """Deadline and glitch counters of one session."""
+
+    ticks: int = 0
+    missed_deadlines: int = 0
+    max_lateness_secs: float = 0.0
+    output_underruns: int = 0
+    utterances: int = 0
+
+
+class SyntheticParticipant:
+    """Generates utterances at a realistic speaking rate.
+
+    Some utterances start with the assistant's name, so the LLM and TTS paths
+    are exercised as well.
+    """
+
+    def __init__(
+        self,
+        participant_id: str,
+        wake_phrase: str,
+        words_per_minute: float = 150.0,
+        wake_probability: float = 0.3,
+        seed: Optional[int] = None,
+    ):
+        self.id = participant_id
+        self.wake_phrase = wake_phrase
+        self.words_per_minute = words_per_minute
+        self.wake_probability = wake_probability
+        self.pending_transcripts: deque[str] = deque()
+        self._rng = random.Random(seed)
+
+    def next_utterance(self) -> tuple[str, float]:
+        """Text of the next utterance and how long it takes to say it."""
+        words = self._rng.choices(WORDS, k=self._rng.randint(4, 20))
+        if self._rng.random() < self.wake_probability:
+            words = [self.wake_phrase] + words
+        return " ".join(words), len(words) * 60.0 / self.words_per_minute
+
+    def next_pause_secs(self) -> float:
+        return self._rng.uniform(1.0, 4.0)
+
+
+class EnergyVADAnalyzer(VADAnalyzer):
+    """Cheap energy-based VAD for synthetic audio, Silero does not detect noise as speech."""
+
+    def __init__(self, **kwargs):
+        super().__init__(params=VADParams(min_volume=0.0), **kwargs)
+
+    def num_frames_required(self) -> int:
+        return int(self.sample_rate * FRAME_SECS)
+
+    def voice_confidence(self, buffer) -> float:
+        samples = np.frombuffer(buffer, dtype=np.int16)
+        return 1.0 if samples.size and np.abs(samples).mean() > 500 else 0.0
+
+
+class SyntheticInputTransport(BaseInputTransport):
+    """Pushes synthetic participant audio (or transcripts) in real time."""
+
+    def __init__(
+        self,
+        transport: "SyntheticTransport",
+        params: TransportParams,
+        deadline_secs: float,
+    ):
+        super().__init__(params)
+        self._transport = transport
+        self._participant = transport.participant
+        self._stats = transport.stats
+        self._deadline_secs = deadline_secs
+        self._speak_task: Optional[asyncio.Task] = None
+        self._next_tick = 0.0
+
+        # Pre-generated chunks, the generator must not dominate the measured CPU
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(SAMPLE_RATE) * 3000).astype(np.int16).tobytes()
+        chunk_bytes = int(SAMPLE_RATE * FRAME_SECS) * 2
+        self._speech_chunks = [
+            noise[i : i + chunk_bytes] for i in range(0, len(noise), chunk_bytes)
+        ]
+        self._silence_chunk = bytes(chunk_bytes)
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+        if not self._speak_task:
+            self._speak_task = self.create_task(self._speak())
+            await self._transport.participant_joined()
+
+    async def cleanup(self):
+        if self._speak_task:
+            await self.cancel_task(self._speak_task)
+            self._speak_task = None
+        await super().cleanup()
+
+    async def _speak(self):
+        self._next_tick = time.monotonic()
+        while True:
+            text, duration = self._participant.next_utterance()
+            self._stats.utterances += 1
+            if self._transport.mode == "transcripts":
+                await self._wait_until(self._next_tick + duration)
+                await self.push_frame(
+                    TranscriptionFrame(text, self._participant.id, time_now_iso8601())
+                )
+                await self._wait_until(self._next_tick + self._participant.next_pause_secs())
+                continue
+
+            self._participant.pending_transcripts.append(text)
+            for i in range(int(duration / FRAME_SECS)):
+                await self._push_chunk(self._speech_chunks[i % len(self._speech_chunks)])
+            for _ in range(int(self._participant.next_pause_secs() / FRAME_SECS)):
+                await self._push_chunk(self._silence_chunk)
+
+    async def _push_chunk(self, audio: bytes):
+        await self._wait_until(self._next_tick + FRAME_SECS)
+        await self.push_audio_frame(
+            InputAudioRawFrame(audio=audio, sample_rate=SAMPLE_RATE, num_channels=1)
+        )
+
+    async def _wait_until(self, deadline: float):
+        self._next_tick = deadline
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        lateness = time.monotonic() - deadline
+        self._stats.ticks += 1
+        self._stats.max_lateness_secs = max(self._stats.max_lateness_secs, lateness)
+        if lateness > self._deadline_secs:
+            self._stats.missed_deadlines += 1
+            # A real device would have dropped the audio, don't try to catch up
+            self._next_tick = time.monotonic()
+
+
+class SyntheticOutputTransport(BaseOutputTransport):
+    """Consumes bot audio in real time and counts playback underruns."""
+
+    def __init__(self, transport: "SyntheticTransport", params: TransportParams):
+        super().__init__(params)
+        self._stats = transport.stats
+        self._play_until = 0.0
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame) -> bool:
+        now = time.monotonic()
+        # A short gap within a stream is a glitch, a long one is a new utterance
+        gap = now - self._play_until
+        if FRAME_SECS < gap < 0.5:
+            self._stats.output_underruns += 1
+
+        duration = len(frame.audio) / (frame.sample_rate * frame.num_channels * 2)
+        self._play_until = max(now, self._play_until) + duration
+        await asyncio.sleep(max(0.0, self._play_until - now - duration))
+        return True
+
+
+class SyntheticTransport(BaseTransport):
+    """Local fake transport with one synthetic participant."""
+
+    def __init__(
+        self,
+        participant: SyntheticParticipant,
+        mode: str = "audio",
+        deadline_secs: float = 2 * FRAME_SECS,
+        vad_analyzer: Optional[VADAnalyzer] = None,
+    ):
+        super().__init__()
+        self.participant = participant
+        self.mode = mode
+        self.stats = LoadTestStats()
+        self._params = TransportParams(
+            audio_in_enabled=True,
+            audio_in_sample_rate=SAMPLE_RATE,
+            audio_out_enabled=True,
+            vad_analyzer=(vad_analyzer or EnergyVADAnalyzer()) if mode == "audio" else None,
+        )
+        self._input = SyntheticInputTransport(self, self._params, deadline_secs)
+        self._output = SyntheticOutputTransport(self, self._params)
+        self._register_event_handler("on_participant_joined")
+        self._register_event_handler("on_participant_left")
+
+    def input(self) -> FrameProcessor:
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        return self._output
+
+    async def participant_joined(self):
+        await self._call_event_handler("on_participant_joined", {"id": self.participant.id})
+
+
+class StubSTTService(SegmentedSTTService):
+    """Returns the participant's scripted text for each VAD segment."""
+
+    def __init__(self, participant: SyntheticParticipant, **kwargs):
+        super().__init__(**kwargs)
+        self._participant = participant
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        await asyncio.sleep(0.15)
+        if self._participant.pending_transcripts:
+            text = self._participant.pending_transcripts.popleft()
+            yield TranscriptionFrame(text, self._participant.id, time_now_iso8601())
+
+
+class StubOpenAILLMService(OpenAILLMService):
+    """OpenAI LLM service that streams a canned answer without network access."""
+
+    def __init__(self, ttfb_secs: float = 0.4, tokens_per_sec: float = 60.0, **kwargs):
+        super().__init__(api_key="load-test", model="load-test", **kwargs)
+        self._ttfb_secs = ttfb_secs
+        self._tokens_per_sec = tokens_per_sec
+
+    async def get_chat_completions(
+        self, params_from_context: OpenAILLMInvocationParams
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        return self._stream()
+
+    async def _stream(self) -> AsyncIterator[ChatCompletionChunk]:
+        await asyncio.sleep(self._ttfb_secs)
+        for token in ANSWER.split(" "):
+            yield ChatCompletionChunk(
+                id="load-test",
+                choices=[Choice(index=0, delta=ChoiceDelta(content=token + " "))],
+                created=int(time.time()),
+                model="load-test",
+                object="chat.completion.chunk",
+            )
+            await asyncio.sleep(1.0 / self._tokens_per_sec)
+
+
+class StubTTSService(TTSService):
+    """Produces silence with the duration of the spoken text."""
+
+    def __init__(self, ttfb_secs: float = 0.2, words_per_minute: float = 170.0, **kwargs):
+        super().__init__(**kwargs)
+        self._ttfb_secs = ttfb_secs
+        self._words_per_minute = words_per_minute
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        await asyncio.sleep(self._ttfb_secs)
+        yield TTSStartedFrame()
+        duration = len(text.split()) * 60.0 / self._words_per_minute
+        chunk = bytes(self.sample_rate * 2)  # 1s
+        remaining = int(duration * self.sample_rate) * 2
+        while remaining > 0:
+            yield TTSAudioRawFrame(
+                audio=chunk[:remaining], sample_rate=self.sample_rate, num_channels=1
+            )
+            remaining -= len(chunk)
+        yield TTSStoppedFrame()
+
+
+class LoadTestBot(SimpleBot):
+    """SimpleBot with stub STT/LLM/TTS services."""
+
+    def __init__(self, config: AppConfig, participant: SyntheticParticipant):
+        super().__init__(config, APIKeysConfig(openai_api_key="load-test"))
+        self.participant = participant
+
+    def _create_stt_service(self):
+        return StubSTTService(self.participant)
+
+    def _create_llm_service(self):
+        return StubOpenAILLMService()
+
+    def _create_tts_service(self):
+        return StubTTSService()
+
+
+@dataclass
+class StepReport:
+    sessions: int
+    wall_secs: float
+    cpu_cores: float
+    cpu_percent_per_session: float
+    rss_mb: float
+    rss_mb_per_session: float
+    loop_lag_p50_ms: float
+    loop_lag_p99_ms: float
+    loop_lag_max_ms: float
+    deadline_miss_rate: float
+    output_underruns: int
+    sustainable: bool
+
+
+@dataclass
+class LoadTestReport:
+    mode: str
+    vad: str = "energy"
+    max_sustainable_sessions: int = 0
+    sessions_per_core: float = 0.0
+    steps: List[StepReport] = field(default_factory=list)
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak RSS is the best we get without procfs (KB on Linux, bytes on macOS)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def cpu_secs() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval_secs: float = 0.05):
+        self.interval_secs = interval_secs
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def reset(self) -> List[float]:
+        samples, self.samples = self.samples, []
+        return samples
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval_secs)
+            self.samples.append(time.monotonic() - start - self.interval_secs)
+
+
+class LoadTest:
+    """Ramps up synthetic sessions in this process until frame deadlines are missed.
+
+    Every step adds `step_sessions` sessions, lets them settle and measures
+    for `step_secs`. A step is sustainable if fewer than `max_miss_rate` of the
+    input frame deadlines were missed and the event loop lag p99 stays below
+    `max_loop_lag_ms`. The ramp stops at the first unsustainable step or at
+    `max_sessions`.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        max_sessions: int = 50,
+        step_sessions: int = 1,
+        step_secs: float = 20.0,
+        settle_secs: float = 5.0,
+        mode: str = "audio",
+        vad: str = "energy",
+        max_miss_rate: float = 0.01,
+        max_loop_lag_ms: float = 50.0,
+    ):
+        self.config = config
+        self.max_sessions = max_sessions
+        self.step_sessions = step_sessions
+        self.step_secs = step_secs
+        self.settle_secs = settle_secs
+        self.mode = mode
+        self.vad = vad
+        self.max_miss_rate = max_miss_rate
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self._sessions: List[tuple[LoadTestBot, SyntheticTransport, asyncio.Task]] = []
+        self._output_dir = tempfile.TemporaryDirectory(prefix="xperto-load-test-")
+
+    async def run(self) -> LoadTestReport:
+        report = LoadTestReport(mode=self.mode, vad=self.vad)
+        monitor = EventLoopLagMonitor()
+        monitor.start()
+        baseline_rss = rss_bytes()
+        try:
+            while len(self._sessions) < self.max_sessions:
+                for _ in range(min(self.step_sessions, self.max_sessions - len(self._sessions))):
+                    self._start_session()
+                await asyncio.sleep(self.settle_secs)
+
+                step = await self._measure(monitor, baseline_rss)
+                report.steps.append(step)
+                logger.warning(
+                    f"Load test: {step.sessions} sessions, {step.cpu_cores:.2f} cores, "
+                    f"{step.rss_mb:.0f} MB, loop lag p99 {step.loop_lag_p99_ms:.1f}ms, "
+                    f"deadline misses {step.deadline_miss_rate:.2%}"
+                )
+                if not step.sustainable:
+                    break
+                report.max_sustainable_sessions = step.sessions
+                report.sessions_per_core = step.sessions / max(step.cpu_cores, 1e-6)
+        finally:
+            await monitor.stop()
+            await self._stop_sessions()
+            self._output_dir.cleanup()
+        return report
+
+    def _start_session(self):
+        index = len(self._sessions)
+        participant = SyntheticParticipant(
+            participant_id=f"participant-{index}",
+            wake_phrase=self.config.bot.assistant_names[0],
+            seed=index,
+        )
+        transport = SyntheticTransport(
+            participant, mode=self.mode, vad_analyzer=self._create_vad_analyzer()
+        )
+        bot = LoadTestBot(self._session_config(index), participant)
+        task = asyncio.create_task(bot.run(transport))
+        self._sessions.append((bot, transport, task))
+
+    def _create_vad_analyzer(self) -> VADAnalyzer:
+        """The cheap energy VAD isolates the pipeline, the Silero ones measure the real VAD cost."""
+        match self.vad:
+            case "energy":
+                return EnergyVADAnalyzer()
+            case "silero":
+                from pipecat.audio.vad.silero import SileroVADAnalyzer
+
+                return SileroVADAnalyzer()
+            case "batched":
+                from .batched_vad import BatchedSileroVADAnalyzer
+
+                return BatchedSileroVADAnalyzer()
+            case _:
+                raise ValueError(f"Unsupported load test VAD: {self.vad}")
+
+    def _session_config(self, index: int) -> AppConfig:
+        """Copy of the config writing to a private temp folder, without UI and reloads."""
+        folder = Path(self._output_dir.name) / f"session_{index}"
+        config = self.config.model_copy(deep=True)
+        config.bot = config.bot.model_copy(update={"tui": False, "hot_reload": False})
+        config.paths = PathsConfig(
+            recordings=folder / "recordings",
+            transcripts=folder / "transcripts",
+            contexts=folder / "contexts",
+            metrics=folder / "metrics",
+        )
+        config.storage = config.storage.model_copy(update={"janitor_interval_secs": 0})
+        return config
+
+    async def _measure(self, monitor: EventLoopLagMonitor, baseline_rss: int) -> StepReport:
+        def totals() -> tuple[int, int, int]:
+            stats = [transport.stats for _, transport, _ in self._sessions]
+            return (
+                sum(s.ticks for s in stats),
+                sum(s.missed_deadlines for s in stats),
+                sum(s.output_underruns for s in stats),
+            )
+
+        start_totals = totals()
+        monitor.reset()
+
+        start_wall, start_cpu = time.monotonic(), cpu_secs()
+        await asyncio.sleep(self.step_secs)
+        wall = time.monotonic() - start_wall
+        cores = (cpu_secs() - start_cpu) / wall
+
+        sessions = len(self._sessions)
+        ticks, missed, underruns = (end - start for end, start in zip(totals(), start_totals))
+        lags_ms = np.array(monitor.reset() or [0.0]) * 1000.0
+        rss = rss_bytes()
+        miss_rate = missed / ticks if ticks else 1.0
+        loop_lag_p99 = float(np.percentile(lags_ms, 99))
+
+        return StepReport(
+            sessions=sessions,
+            wall_secs=wall,
+            cpu_cores=cores,
+            cpu_percent_per_session=100.0 * cores / sessions,
+            rss_mb=rss / 1024 / 1024,
+            rss_mb_per_session=(rss - baseline_rss) / 1024 / 1024 / sessions,
+            loop_lag_p50_ms=float(np.percentile(lags_ms, 50)),
+            loop_lag_p99_ms=loop_lag_p99,
+            loop_lag_max_ms=float(lags_ms.max()),
+            deadline_miss_rate=miss_rate,
+            output_underruns=underruns,
+            sustainable=miss_rate <= self.max_miss_rate and loop_lag_p99 <= self.max_loop_lag_ms,
+        )
+
+    async def _stop_sessions(self):
+        for bot, _, _ in self._sessions:
+            if bot.task:
+                await bot.task.cancel()
+        await asyncio.gather(*(task for _, _, task in self._sessions), return_exceptions=True)
+        self._sessions.clear()
+
+
+def format_report(report: LoadTestReport) -> str:
+    lines = [
+        f"{'sessions':>8} {'cores':>6} {'cpu%/s':>7} {'rss MB':>7} {'MB/s':>6} "
+        f"{'lag p50':>8} {'lag p99':>8} {'lag max':>8} {'missed':>7} {'underrun':>8}"
+    ]
+    for step in report.steps:
+        lines.append(
+            f"{step.sessions:>8} {step.cpu_cores:>6.2f} {step.cpu_percent_per_session:>7.1f} "
+            f"{step.rss_mb:>7.0f} {step.rss_mb_per_session:>6.1f} "
+            f"{step.loop_lag_p50_ms:>6.1f}ms {step.loop_lag_p99_ms:>6.1f}ms "
+            f"{step.loop_lag_max_ms:>6.1f}ms {step.deadline_miss_rate:>7.2%} "
+            f"{step.output_underruns:>8}{'' if step.sustainable else '  <- overloaded'}"
+        )
+    lines.append("")
+    lines.append(
+        f"Max sustainable sessions: {report.max_sustainable_sessions} "
+        f"({report.mode} mode, {report.vad} VAD)"
+    )
+    lines.append(f"Sessions per core: {report.sessions_per_core:.1f}")
+    return "\n".join(lines)
+
+
+async def run_load_test(
+    config: AppConfig, max_sessions: int, **kwargs
+) -> Tuple[LoadTestReport, Path]:
+    """Run the load test and save the report as JSON in the metrics folder.
+
+    Returns the report and the path it was saved to.
+    """
+    report = await LoadTest(config, max_sessions=max_sessions, **kwargs).run()
+
+    metrics_folder = Path(config.paths.metrics)
+    metrics_folder.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = metrics_folder / f"{timestamp}_load_test.json"
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(asdict(report), f, indent=2)
+    return report, report_path
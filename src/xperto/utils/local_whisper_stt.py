@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from pipecat.frames.frames import (
+    AudioRawFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.whisper.stt import WhisperSTTService
+from pipecat.utils.time import time_now_iso8601
+
+# Used when `services.stt.model` is left at the (cloud provider) default
+DEFAULT_WHISPER_MODEL = "small"
+
+_models: Dict[Tuple[str, str, str], object] = {}
+_models_lock = threading.Lock()
+
+
+def whisper_model_name(model: Optional[str]) -> str:
+    """The faster-whisper model to load for the configured STT model.
+
+    Empty or unset (None) means `DEFAULT_WHISPER_MODEL`. Anything else must be
+    a faster-whisper model size, a Hugging Face repo ("org/name") or a local
+    model folder, a cloud model name like "nova-2-general" is rejected.
+    """
+    if not model:
+        return DEFAULT_WHISPER_MODEL
+
+    from faster_whisper import available_models
+
+    if model in available_models() or "/" in model or Path(model).is_dir():
+        return model
+    raise ValueError(
+        f"'{model}' is not a Whisper model, use one of {', '.join(available_models())}, "
+        f"a Hugging Face repo or a local model folder"
+    )
+
+
+def get_shared_whisper_model(model: str, device: str = "cpu", compute_type: str = "int8"):
+    """Load a faster-whisper model once per process and share it across sessions.
+
+    CTranslate2 models are safe to use from several threads, so concurrent
+    sessions can transcribe with the same weights in memory.
+    """
+    key = (model, device, compute_type)
+    with _models_lock:
+        if key not in _models:
+            from faster_whisper import WhisperModel
+
+            logger.debug(f"Loading shared Whisper model {key}...")
+            start = time.perf_counter()
+            _models[key] = WhisperModel(model, device=device, compute_type=compute_type)
+            logger.debug(f"Loaded shared Whisper model in {time.perf_counter() - start:.1f}s")
+        return _models[key]
+
+
+class LocalWhisperSTTService(WhisperSTTService):
+    """On-CPU streaming Whisper STT with interim results.
+
+    Extends pipecat's segmented Whisper service in two ways: the (quantized)
+    model is shared between all sessions of a process, and while the user is
+    speaking the growing segment is decoded greedily every
+    `interim_interval_secs` to emit `InterimTranscriptionFrame`s. The final
+    `TranscriptionFrame` is produced when VAD reports the end of speech, just
+    like with the cloud providers, so downstream processors work unchanged.
+    """
+
+    def __init__(
+        self,
+        *,
+        interim_interval_secs: float = 0.7,
+        max_interim_window_secs: float = 15.0,
+        **kwargs,
+    ):
+        self._interim_interval_secs = interim_interval_secs
+        self._max_interim_window_secs = max_interim_window_secs
+        self._interim_task: Optional[asyncio.Task] = None
+        self._interim_buffer_len = 0
+        self._segment_generation = 0
+        super().__init__(**kwargs)
+
+    def _load(self):
+        try:
+            self._model = get_shared_whisper_model(
+                self.model_name, device=self._device, compute_type=self._compute_type
+            )
+        except ModuleNotFoundError as e:
+            logger.error(f"Exception: {e}")
+            logger.error("In order to use local STT, you need to `uv sync --extra local-stt`.")
+            self._model = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        if isinstance(frame, (UserStartedSpeakingFrame, UserStoppedSpeakingFrame)):
+            # Any interim decode still running belongs to the previous segment
+            self._segment_generation += 1
+            self._interim_buffer_len = len(self._audio_buffer)
+        await super().process_frame(frame, direction)
+
+    async def process_audio_frame(self, frame: AudioRawFrame, direction: FrameDirection):
+        await super().process_audio_frame(frame, direction)
+
+        if not self._user_speaking or not self._model:
+            return
+        if self._interim_task and not self._interim_task.done():
+            return
+
+        interval_bytes = int(self._interim_interval_secs * self._audio_buffer_size_1s)
+        if len(self._audio_buffer) - self._interim_buffer_len < interval_bytes:
+            return
+
+        self._interim_buffer_len = len(self._audio_buffer)
+        max_bytes = int(self._max_interim_window_secs * self._audio_buffer_size_1s)
+        audio = bytes(self._audio_buffer[-max_bytes:])
+        self._interim_task = self.create_task(
+            self._run_interim(audio, self._segment_generation)
+        )
+
+    async def _run_interim(self, audio: bytes, generation: int):
+        audio_float = np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+        whisper_lang = self.language_to_service_language(self._settings["language"])
+
+        text = await asyncio.to_thread(self._transcribe_greedy, audio_float, whisper_lang)
+        if text and generation == self._segment_generation and self._user_speaking:
+            await self.push_frame(
+                InterimTranscriptionFrame(
+                    text, self._user_id, time_now_iso8601(), self._settings["language"]
+                )
+            )
+
+    def _transcribe_greedy(self, audio_float: np.ndarray, language: Optional[str]) -> str:
+        segments, _ = self._model.transcribe(
+            audio_float,
+            language=language,
+            beam_size=1,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        return " ".join(
+            segment.text.strip()
+            for segment in segments
+            if segment.no_speech_prob < self._no_speech_prob
+        )
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        if self._interim_task and not self._interim_task.done():
+            await self.cancel_task(self._interim_task)
+        async for frame in super().run_stt(audio):
+            yield frame
+
+    async def cleanup(self):
+        if self._interim_task and not self._interim_task.done():
+            await self.cancel_task(self._interim_task)
+        await super().cleanup()
+
+
+def benchmark(paths: list[str], model: str = "small", compute_type: str = "int8") -> list[dict]:
+    """Measure real-time factor and final-transcript latency on WAV recordings.
+
+    The final-transcript latency is the time from the end of a recording to its
+    final transcription, which is what the user waits for after speaking.
+    Returns the measurements and the transcript of every recording.
+    """
+    import wave
+
+    whisper = get_shared_whisper_model(model, "cpu", compute_type)
+    results = []
+    for path in paths:
+        with wave.open(path, "rb") as wf:
+            sample_rate = wf.getframerate()
+            audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            if wf.getnchannels() > 1:
+                audio = audio.reshape(-1, wf.getnchannels()).mean(axis=1).astype(np.int16)
+        if sample_rate != 16000:
+            raise ValueError(f"{path}: Whisper expects 16kHz audio, got {sample_rate}Hz")
+
+        audio_float = audio.astype(np.float32) / 32768.0
+        duration = len(audio_float) / sample_rate
+
+        start = time.perf_counter()
+        segments, _ = whisper.transcribe(audio_float)
+        text = " ".join(segment.text.strip() for segment in segments)
+        elapsed = time.perf_counter() - start
+
+        results.append(
+            {
+                "path": path,
+                "audio_secs": duration,
+                "rtf": elapsed / duration,
+                "final_latency_ms": elapsed * 1000,
+                "text": text,
+            }
+        )
+    return results
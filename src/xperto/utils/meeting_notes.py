@@ -0,0 +1,270 @@
+import asyncio
+import datetime
+import json
+import re
+import time
+from typing import Callable, List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import Frame, TranscriptionMessage
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from .rate_scheduler import (
+    Priority,
+    RateScheduler,
+    rate_limited_http_client,
+    request_priority,
+)
+
+NOTES_PROMPT = """You keep the running notes of a meeting an AI assistant takes part in.
+You get the current notes and the next part of the transcript. Fold the new part
+into the notes, keep everything still relevant, write in the language of the
+meeting and reply with the updated notes as a JSON object:
+{"summary": "<what was discussed so far, a few short paragraphs>",
+ "decisions": ["..."],
+ "action_items": [{"task": "...", "owner": "<name or null>", "due": "<date or null>"}],
+ "open_questions": ["..."]}"""
+
+RECAP_PROMPT = """Notes of this meeting so far, use them to answer the recap question:
+{notes}
+
+Said since the notes were last updated:
+{recent}"""
+
+# Only recaps of the meeting itself, "summarize that article" needs the full context
+_MEETING = r"(meeting|call|conversation|discussion|session)"
+_MEETING_DE = r"(meeting|call|gespräch|besprechung|diskussion|sitzung)\w*"
+RECAP_PATTERN = re.compile(
+    r"\b(what (have|did|'ve) we (discuss|talk|cover|decid|agree)\w*"
+    r"|(recap|summari[sz]e|sum up) what (we|we've|we have) (discuss|talk|cover|decid|agree)\w*"
+    rf"|(recap|summary|summari[sz]e|sum up|wrap up)( of)? (the|this|our|today'?s) {_MEETING}"
+    r"|(recap|summary|summari[sz]e|sum (it )?up)\w* (so far|until now|up to now)"
+    r"|was haben wir (\w+ )?(besprochen|beschlossen|entschieden|vereinbart)"
+    rf"|fass\w* (\w+ ){{0,3}}{_MEETING_DE} zusammen"
+    r"|fass\w* (\w+ )?zusammen,? was wir"
+    rf"|zusammenfassung (des|der|unseres|unserer|vom) (\w+ )?{_MEETING_DE})",
+    re.IGNORECASE,
+)
+# The user message may start with buffered speech not meant for the assistant,
+# the question is at its end
+RECAP_WINDOW_CHARS = 200
+
+
+def format_notes(notes: dict) -> str:
+    """The notes as markdown."""
+    lines = [str(notes.get("summary", "")).strip()]
+    for key, title in (("decisions", "Decisions"), ("open_questions", "Open questions")):
+        if notes.get(key):
+            lines += ["", f"{title}:"] + [f"- {item}" for item in notes[key]]
+    if notes.get("action_items"):
+        lines += ["", "Action items:"]
+        for item in notes["action_items"]:
+            if isinstance(item, dict):
+                details = [str(item[key]) for key in ("owner", "due") if item.get(key)]
+                suffix = f" ({', '.join(details)})" if details else ""
+                lines.append(f"- {item.get('task', '')}{suffix}")
+            else:
+                lines.append(f"- {item}")
+    return "\n".join(lines).strip()
+
+
+class MeetingNotes:
+    """Running notes of the meeting, updated in the background.
+
+    Transcript lines of all speakers are collected as they come in. Every
+    `interval_secs`, or as soon as `max_lines` are pending, they are folded
+    into structured notes (summary, decisions, action items, open questions)
+    by a cheap model at background priority. Recap questions are then
+    answered from the notes and the few lines since the last update (see
+    `RecapProcessor`) instead of the whole conversation.
+
+    `state` is saved with the session context and passed back on resume. A
+    resumed session without saved notes (`complete=False`) has notes of the
+    rest of the meeting only and answers recaps from the full context.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        interval_secs: float = 180.0,
+        max_lines: int = 40,
+        scheduler: Optional[RateScheduler] = None,
+        state: Optional[dict] = None,
+        complete: bool = True,
+    ):
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self.interval_secs = interval_secs
+        self.max_lines = max_lines
+        self.complete = complete
+        http_client = rate_limited_http_client(scheduler) if scheduler else None
+        self._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+        state = state or {}
+        self.notes: dict = state.get("notes") or {}
+        self.pending: List[str] = list(state.get("pending", []))
+        self.folds = state.get("folds", 0)
+        self.updated_at: Optional[str] = state.get("updated_at")
+
+        self.fold_failures = 0
+        self.fold_secs = 0.0
+        self.recaps = 0
+        self._last_fold = time.monotonic()
+        self._fold_requested = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def state(self) -> dict:
+        return {
+            "notes": self.notes,
+            "pending": self.pending,
+            "folds": self.folds,
+            "updated_at": self.updated_at,
+        }
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "folds": self.folds,
+            "fold_failures": self.fold_failures,
+            "mean_fold_secs": round(self.fold_secs / self.folds, 2) if self.folds else None,
+            "pending_lines": len(self.pending),
+            "recaps": self.recaps,
+        }
+
+    def add_messages(self, messages: List[TranscriptionMessage]):
+        self.add_lines(
+            f"{message.role} {message.user_id}: {message.content}" for message in messages
+        )
+
+    def add_lines(self, lines):
+        self.pending.extend(lines)
+        if len(self.pending) >= self.max_lines:
+            self._fold_requested.set()
+
+    def recap_messages(self) -> List[dict]:
+        """The notes and the lines since, as a system message for a recap answer."""
+        return [
+            {
+                "role": "system",
+                "content": RECAP_PROMPT.format(
+                    notes=format_notes(self.notes) or "(none yet)",
+                    recent="\n".join(self.pending) or "(nothing)",
+                ),
+            }
+        ]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info(f"Meeting notes stats: {self.stats}")
+
+    async def _run(self):
+        while True:
+            remaining = self._last_fold + self.interval_secs - time.monotonic()
+            try:
+                await asyncio.wait_for(self._fold_requested.wait(), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                pass
+            self._fold_requested.clear()
+            self._last_fold = time.monotonic()
+            if self.pending:
+                await self._fold()
+
+    async def _fold(self):
+        lines = self.pending[:]
+        start = time.monotonic()
+        token = request_priority.set(Priority.BACKGROUND)
+        try:
+            response = await self._client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": NOTES_PROMPT},
+                    {
+                        "role": "user",
+                        "content": json.dumps(
+                            {"notes": self.notes, "new_transcript": "\n".join(lines)},
+                            ensure_ascii=False,
+                        ),
+                    },
+                ],
+                response_format={"type": "json_object"},
+            )
+            notes = json.loads(response.choices[0].message.content or "{}")
+        except Exception as e:
+            # The lines stay pending and are folded with the next ones
+            self.fold_failures += 1
+            logger.error(f"Failed to update the meeting notes: {e}")
+            return
+        finally:
+            request_priority.reset(token)
+
+        self.notes = notes
+        # Lines that came in during the request stay pending
+        del self.pending[: len(lines)]
+        self.folds += 1
+        self.fold_secs += time.monotonic() - start
+        self.updated_at = datetime.datetime.now().isoformat()
+        logger.debug(
+            f"Meeting notes updated with {len(lines)} lines in {time.monotonic() - start:.1f}s"
+        )
+
+
+class RecapProcessor(FrameProcessor):
+    """Answers recap questions from the meeting notes with a small prompt.
+
+    Place it between the user context aggregator and the LLM. If the latest
+    user message asks for a recap, the LLM gets a context of the prompt
+    `prefix` (so the provider's prompt cache still hits), the notes and the
+    question instead of the whole conversation. The answer is added to the
+    conversation by the assistant aggregator as usual.
+    """
+
+    def __init__(self, notes: MeetingNotes, prefix: Callable[[], List[dict]], **kwargs):
+        super().__init__(**kwargs)
+        self._notes = notes
+        self._prefix = prefix
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            question = self._recap_question(frame.context)
+            if question is not None:
+                self._notes.recaps += 1
+                context = OpenAILLMContext(
+                    messages=[*self._prefix(), *self._notes.recap_messages(), question],
+                    tools=frame.context.tools,
+                )
+                logger.debug(f"Answering recap from the meeting notes: {question['content']}")
+                await self.push_frame(OpenAILLMContextFrame(context), direction)
+                return
+
+        await self.push_frame(frame, direction)
+
+    def _recap_question(self, context: OpenAILLMContext) -> Optional[dict]:
+        # Without notes (yet) the full context is the better source
+        if not self._notes.complete or not self._notes.notes:
+            return None
+        messages = context.messages
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        content = messages[-1].get("content")
+        if not isinstance(content, str) or not RECAP_PATTERN.search(content[-RECAP_WINDOW_CHARS:]):
+            return None
+        return dict(messages[-1])
@@ -0,0 +1,260 @@
+import asyncio
+import datetime
+import os
+import re
+import signal
+import sys
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from .blob_store import BlobStore
+
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP_STATS = 25
+
+SPILL_NOTE = "[Tool result of {chars} characters moved to blob {digest} to save memory]"
+SPILL_NOTE_PREFIX = SPILL_NOTE.split("{")[0]
+SPILL_NOTE_PATTERN = re.compile(
+    r"\[Tool result of \d+ characters moved to blob ([0-9a-f]{64}) to save memory\]"
+)
+
+_tracemalloc_previous: Optional[tracemalloc.Snapshot] = None
+
+
+def approx_size(obj, _seen: Optional[set] = None) -> int:
+    """Approximate deep size of an object graph in bytes."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += approx_size(key, seen) + approx_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += approx_size(item, seen)
+    elif hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), seen)
+    return size
+
+
+@dataclass
+class TrackedStructure:
+    """A growing structure of a session with its budget.
+
+    `enforce` is called with the budget when the structure grows beyond it and
+    returns the bytes it freed, None means the structure is only measured.
+    """
+
+    name: str
+    measure: Callable[[], int]
+    budget_bytes: int = 0
+    enforce: Optional[Callable[[int], int]] = None
+    size_bytes: int = 0
+    peak_bytes: int = 0
+    enforcements: int = 0
+    freed_bytes: int = 0
+
+
+class SessionMemoryAccountant:
+    """Tracks the approximate memory of a session's growing structures.
+
+    Every `check_interval_secs` each tracked structure is measured and, if it
+    exceeds its budget, trimmed or spilled to disk by its `enforce` callback.
+    A structure that keeps growing between checks although it is within budget
+    is what a leak looks like, the sizes are logged on every check for that.
+    """
+
+    def __init__(self, check_interval_secs: float = 30.0):
+        self.check_interval_secs = check_interval_secs
+        self.structures: Dict[str, TrackedStructure] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(
+        self,
+        name: str,
+        measure: Callable[[], int],
+        budget_bytes: int = 0,
+        enforce: Optional[Callable[[int], int]] = None,
+    ):
+        self.structures[name] = TrackedStructure(name, measure, budget_bytes, enforce)
+
+    @property
+    def stats(self) -> dict:
+        """Current and peak size of all tracked structures."""
+        return {
+            name: {
+                "size_bytes": structure.size_bytes,
+                "peak_bytes": structure.peak_bytes,
+                "budget_bytes": structure.budget_bytes,
+                "enforcements": structure.enforcements,
+                "freed_bytes": structure.freed_bytes,
+            }
+            for name, structure in self.structures.items()
+        }
+
+    def check(self):
+        """Measure all structures and enforce the budgets."""
+        for structure in self.structures.values():
+            try:
+                size = structure.measure()
+                if structure.budget_bytes and size > structure.budget_bytes and structure.enforce:
+                    freed = structure.enforce(structure.budget_bytes)
+                    structure.enforcements += 1
+                    structure.freed_bytes += freed
+                    logger.info(
+                        f"Memory budget of {structure.name} exceeded "
+                        f"({size / 1024:.0f} KB > {structure.budget_bytes / 1024:.0f} KB), "
+                        f"freed {freed / 1024:.0f} KB"
+                    )
+                    size = structure.measure()
+                structure.size_bytes = size
+                structure.peak_bytes = max(structure.peak_bytes, size)
+            except Exception as e:
+                logger.error(f"Memory accounting of {structure.name} failed: {e}")
+
+        logger.debug(
+            "Session memory: "
+            + ", ".join(
+                f"{s.name} {s.size_bytes / 1024:.0f} KB" for s in self.structures.values()
+            )
+        )
+
+    def start(self):
+        if self.check_interval_secs <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.structures:
+            logger.info(f"Session memory stats: {self.stats}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval_secs)
+            self.check()
+
+
+def audio_buffer_bytes(audio_buffer) -> int:
+    """Bytes of audio an AudioBufferProcessor holds in memory."""
+    # pipecat has no accessor for the buffer sizes, read them defensively
+    return sum(
+        len(getattr(audio_buffer, attr, b""))
+        for attr in (
+            "_user_audio_buffer",
+            "_bot_audio_buffer",
+            "_user_turn_audio_buffer",
+            "_bot_turn_audio_buffer",
+        )
+    )
+
+
+def spill_tool_results(
+    messages: List[dict], budget_bytes: int, blobs: BlobStore, keep_recent: int = 6
+) -> int:
+    """Move the content of large, older tool results to the blob store until the messages fit.
+
+    The tool message stays in place (the assistant's tool call needs its
+    answer) but its content is replaced by a short note naming the blob, the
+    context manager saves it as a blob reference (see `spilled_blob`). The
+    most recent `keep_recent` messages are never touched.
+
+    Returns:
+        Approximate number of bytes freed.
+    """
+    size = approx_size(messages)
+    candidates = [
+        (index, message)
+        for index, message in enumerate(messages[:-keep_recent] if keep_recent else messages)
+        if message.get("role") == "tool"
+        and isinstance(message.get("content"), str)
+        and not message["content"].startswith(SPILL_NOTE_PREFIX)
+    ]
+    # Largest first, that frees the most with the fewest spills
+    candidates.sort(key=lambda item: len(item[1]["content"]), reverse=True)
+
+    freed = 0
+    for index, message in candidates:
+        if size - freed <= budget_bytes:
+            break
+        content = message["content"]
+        digest = blobs.put(content)
+        message["content"] = SPILL_NOTE.format(chars=len(content), digest=digest)
+        freed += sys.getsizeof(content) - sys.getsizeof(message["content"])
+    return freed
+
+
+def spilled_blob(message: dict) -> Optional[str]:
+    """The digest of the blob a spilled tool result was moved to, None if it wasn't spilled."""
+    content = message.get("content")
+    if message.get("role") != "tool" or not isinstance(content, str):
+        return None
+    match = SPILL_NOTE_PATTERN.fullmatch(content)
+    return match.group(1) if match else None
+
+
+def _tracemalloc_diff(output_folder: Path):
+    """Take a snapshot and write the allocations grown since the previous one."""
+    global _tracemalloc_previous
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracemalloc_previous = tracemalloc.take_snapshot()
+        logger.warning("tracemalloc started, signal again to get a snapshot diff")
+        return
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    top_stats = snapshot.compare_to(_tracemalloc_previous, "lineno")
+    _tracemalloc_previous = snapshot
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Traced memory: {current / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)"]
+    lines += [str(stat) for stat in top_stats[:TRACEMALLOC_TOP_STATS]]
+    report = "\n".join(lines)
+    logger.warning(f"tracemalloc diff since last snapshot:\n{report}")
+
+    try:
+        output_folder.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = output_folder / f"{timestamp}_tracemalloc_diff.txt"
+        path.write_text(report + "\n", encoding="utf-8")
+        logger.warning(f"tracemalloc diff saved to {path}")
+    except OSError as e:
+        logger.error(f"Failed to save tracemalloc diff: {e}")
+
+
+def install_tracemalloc_handler(output_folder: Path) -> bool:
+    """Take tracemalloc snapshot diffs on SIGUSR1, see `request_tracemalloc_diff`.
+
+    The first signal starts tracing (which has a noticeable overhead, so it is
+    off until needed), every further one diffs against the previous snapshot.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGUSR1, _tracemalloc_diff, output_folder)
+    return True
+
+
+def request_tracemalloc_diff(pid: int):
+    """Ask a running bot for a tracemalloc snapshot diff."""
+    os.kill(pid, signal.SIGUSR1)
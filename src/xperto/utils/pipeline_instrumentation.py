@@ -0,0 +1,235 @@
+import asyncio
+import datetime
+import json
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import Frame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+# Upper bounds of the processing time histogram buckets in µs, the last bucket is open
+LATENCY_BUCKETS_US = (
+    10, 30, 100, 300, 1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000, 3_000_000
+)
+
+QUEUE_SAMPLE_SECS = 0.25
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of processing times in µs."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, us: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS_US, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket containing the given percentile, capped at the max."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for i, count in enumerate(self.buckets[:-1]):
+            seen += count
+            if seen >= rank:
+                return min(float(LATENCY_BUCKETS_US[i]), self.max_us)
+        return self.max_us
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else 0.0,
+            "p50_us": self.percentile(50),
+            "p95_us": self.percentile(95),
+            "p99_us": self.percentile(99),
+            "max_us": self.max_us,
+            "buckets_us": list(LATENCY_BUCKETS_US),
+            "bucket_counts": list(self.buckets),
+        }
+
+
+class ProcessorStats:
+    """Counters collected for a single processor."""
+
+    def __init__(self, processor: FrameProcessor):
+        self.processor = processor
+        self.name = processor.name
+        self.processing = LatencyHistogram()
+        self.frames: Counter = Counter()
+        self.frames_seen = 0
+        self.frames_at_last_report: Counter = Counter()
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.queue_depth_total = 0
+        self.queue_samples = 0
+
+    def sample_queue_depth(self):
+        depth = queue_depth(self.processor)
+        self.queue_depth = depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+        self.queue_depth_total += depth
+        self.queue_samples += 1
+
+
+def queue_depth(processor: FrameProcessor) -> int:
+    """Frames waiting in a processor's input and process queues."""
+    # pipecat keeps its queues private, read them defensively
+    depth = 0
+    for attr in ("_FrameProcessor__input_queue", "_FrameProcessor__process_queue"):
+        queue = getattr(processor, attr, None)
+        if queue is not None:
+            depth += queue.qsize()
+    return depth
+
+
+class PipelineInstrumentation:
+    """Measures where frames spend their time in the pipeline.
+
+    Wraps the `process_frame` method of each processor to count frames by type
+    and record processing times in a histogram, and periodically samples the
+    depth of each processor's input queue. A summary is logged every
+    `report_interval_secs` (visible in the TUI log panel) and, if a snapshot
+    path is set, appended as a JSON line for offline analysis.
+
+    With `sample_every` > 1 only every n-th frame of a processor is timed,
+    frame counts stay exact.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 1,
+        report_interval_secs: float = 10.0,
+        snapshot_path: Optional[Path] = None,
+    ):
+        self.sample_every = max(1, sample_every)
+        self.report_interval_secs = report_interval_secs
+        self.snapshot_path = snapshot_path
+        self.processors: Dict[str, ProcessorStats] = {}
+        self._started_at = time.monotonic()
+        self._last_report_at = self._started_at
+        self._task: Optional[asyncio.Task] = None
+
+    def instrument(self, processors: List[FrameProcessor]) -> List[FrameProcessor]:
+        """Wrap the given processors in place and return them."""
+        for processor in processors:
+            if processor.name in self.processors:
+                continue
+            stats = ProcessorStats(processor)
+            self.processors[processor.name] = stats
+            processor.process_frame = self._wrap(processor.process_frame, stats)
+        return processors
+
+    def _wrap(self, process_frame, stats: ProcessorStats):
+        sample_every = self.sample_every
+        frames = stats.frames
+        histogram = stats.processing
+
+        async def timed_process_frame(frame: Frame, direction: FrameDirection):
+            frames[frame.__class__.__name__] += 1
+            stats.frames_seen += 1
+            if stats.frames_seen % sample_every:
+                return await process_frame(frame, direction)
+            start = time.perf_counter_ns()
+            try:
+                return await process_frame(frame, direction)
+            finally:
+                histogram.record((time.perf_counter_ns() - start) / 1000.0)
+
+        return timed_process_frame
+
+    def snapshot(self) -> dict:
+        """Current stats of all processors, frame rates are since the last snapshot."""
+        now = time.monotonic()
+        elapsed = max(now - self._last_report_at, 1e-6)
+        self._last_report_at = now
+
+        processors = []
+        for stats in self.processors.values():
+            delta = stats.frames - stats.frames_at_last_report
+            stats.frames_at_last_report = Counter(stats.frames)
+            processors.append(
+                {
+                    "name": stats.name,
+                    "frames_total": stats.frames_seen,
+                    "frames_per_sec": sum(delta.values()) / elapsed,
+                    "frames_per_sec_by_type": {
+                        frame_type: count / elapsed for frame_type, count in delta.most_common()
+                    },
+                    "queue_depth": {
+                        "current": stats.queue_depth,
+                        "max": stats.queue_depth_max,
+                        "mean": (
+                            stats.queue_depth_total / stats.queue_samples
+                            if stats.queue_samples
+                            else 0.0
+                        ),
+                    },
+                    "processing": stats.processing.to_dict(),
+                }
+            )
+
+        return {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "uptime_secs": now - self._started_at,
+            "sample_every": self.sample_every,
+            "processors": processors,
+        }
+
+    def report(self):
+        """Log a summary and write a JSON snapshot."""
+        snapshot = self.snapshot()
+        lines = [f"Pipeline instrumentation ({snapshot['uptime_secs']:.0f}s):"]
+        for stats in snapshot["processors"]:
+            processing = stats["processing"]
+            queue = stats["queue_depth"]
+            lines.append(
+                f"  {stats['name']}: queue {queue['current']} (max {queue['max']}), "
+                f"p50 {processing['p50_us'] / 1000:.1f}ms, p95 {processing['p95_us'] / 1000:.1f}ms, "
+                f"max {processing['max_us'] / 1000:.1f}ms, {stats['frames_per_sec']:.0f} frames/s"
+            )
+        logger.info("\n".join(lines))
+
+        if self.snapshot_path:
+            try:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.snapshot_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(snapshot) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to write instrumentation snapshot: {e}")
+
+    def start(self):
+        """Sample queue depths and report in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self.report()
+
+    async def _run(self):
+        next_report = time.monotonic() + self.report_interval_secs
+        while True:
+            await asyncio.sleep(QUEUE_SAMPLE_SECS)
+            for stats in self.processors.values():
+                stats.sample_queue_depth()
+            if self.report_interval_secs > 0 and time.monotonic() >= next_report:
+                next_report += self.report_interval_secs
+                self.report()
@@ -0,0 +1,256 @@
+import datetime
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+from pipecat.adapters.schemas.tools_schema import ToolsSchema
+from pipecat.adapters.services.open_ai_adapter import OpenAILLMAdapter
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMTextFrame,
+    MetricsFrame,
+    StartInterruptionFrame,
+)
+from pipecat.metrics.metrics import LLMUsageMetricsData
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+def provider_tools(tools) -> list:
+    """Tools of a context in the JSON format sent to the provider."""
+    if isinstance(tools, ToolsSchema):
+        return OpenAILLMAdapter().to_provider_tools_format(tools)
+    if isinstance(tools, list):
+        return tools
+    return []
+
+
+def prefix_fingerprint(messages: List[dict], tools) -> str:
+    """Hash of the serialized prefix, equal fingerprints mean equal prompt bytes."""
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(provider_tools(tools), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PromptCache:
+    """Keeps the prompt prefix byte-stable and measures provider prompt caching.
+
+    Providers like OpenAI cache the longest previously seen prompt prefix
+    (from 1024 tokens on), which makes requests cheaper and faster. The prefix
+    of every request is the tool schemas followed by the first messages, so
+    the persona and intro system messages and the tools must never change
+    between turns, everything dynamic is appended after them.
+
+    Before each LLM request the context is checked against the expected
+    prefix and repaired if something (a resume, a compaction) changed it.
+    After it, the cached-token count from the usage metrics and the time to
+    first token are recorded per turn, in the log and optionally as JSON lines.
+
+    Use `guard()` right before the LLM and `metrics()` right after it.
+    """
+
+    def __init__(self, metrics_path: Optional[Path] = None):
+        self.metrics_path = metrics_path
+        self._prefix: List[dict] = []
+        self._tools = None
+        self._fingerprint: Optional[str] = None
+        self._tools_json: list = []
+
+        self._request_started_at: Optional[float] = None
+        self._ttfb: Optional[float] = None
+        self._usage: Optional[LLMUsageMetricsData] = None
+
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.prefix_repairs = 0
+        self._ttfb_cached: List[float] = []
+        self._ttfb_uncached: List[float] = []
+
+        self._guard_processor: Optional[PromptCacheGuardProcessor] = None
+        self._metrics_processor: Optional[PromptCacheMetricsProcessor] = None
+
+    def guard(self) -> "PromptCacheGuardProcessor":
+        """Processor to place between the user context aggregator and the LLM."""
+        if self._guard_processor is None:
+            self._guard_processor = PromptCacheGuardProcessor(self)
+        return self._guard_processor
+
+    def metrics(self) -> "PromptCacheMetricsProcessor":
+        """Processor to place between the LLM and the TTS service."""
+        if self._metrics_processor is None:
+            self._metrics_processor = PromptCacheMetricsProcessor(self)
+        return self._metrics_processor
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        return self._fingerprint
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            "prefix_repairs": self.prefix_repairs,
+            "mean_ttfb_cached_ms": _mean_ms(self._ttfb_cached),
+            "mean_ttfb_uncached_ms": _mean_ms(self._ttfb_uncached),
+        }
+
+    def set_prefix(self, messages: List[dict], tools):
+        """Set the messages and tools every request has to start with."""
+        self._prefix = [dict(message) for message in messages]
+        self._tools = tools
+        self._tools_json = provider_tools(tools)
+        self._fingerprint = prefix_fingerprint(self._prefix, tools)
+        logger.debug(f"Prompt prefix {self._fingerprint[:12]} ({len(self._prefix)} messages)")
+
+    def apply(self, context: OpenAILLMContext) -> bool:
+        """Put the prefix at the start of the context, returns True if it changed.
+
+        Leading system messages that differ from the prefix (e.g. the prompts of
+        an older config in a resumed session) are replaced by it.
+        """
+        if not self._prefix:
+            return False
+
+        changed = False
+        messages = context.messages
+        if messages[: len(self._prefix)] != self._prefix:
+            leading = 0
+            while leading < len(messages) and messages[leading].get("role") == "system":
+                leading += 1
+            messages[:leading] = [dict(message) for message in self._prefix]
+            changed = True
+
+        if provider_tools(context.tools) != self._tools_json:
+            context.set_tools(self._tools)
+            changed = True
+        return changed
+
+    def on_request(self, context: OpenAILLMContext):
+        """Check the prefix of a context about to be sent to the LLM."""
+        if self.apply(context):
+            self.prefix_repairs += 1
+            logger.warning(
+                "Prompt prefix changed since the last request, restored it "
+                "(the provider cache misses this turn)"
+            )
+        self._request_started_at = time.monotonic()
+        self._ttfb = None
+        self._usage = None
+
+    def on_text(self):
+        if self._request_started_at is not None and self._ttfb is None:
+            self._ttfb = time.monotonic() - self._request_started_at
+
+    def on_usage(self, usage: LLMUsageMetricsData):
+        self._usage = usage
+
+    def on_response_end(self):
+        """Record the finished request as one turn."""
+        usage, ttfb = self._usage, self._ttfb
+        self._request_started_at = None
+        self._usage = None
+        self._ttfb = None
+        if usage is None:
+            return
+
+        prompt_tokens = usage.value.prompt_tokens
+        cached_tokens = usage.value.cache_read_input_tokens or 0
+        self.turns += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        if ttfb is not None:
+            (self._ttfb_cached if cached_tokens else self._ttfb_uncached).append(ttfb)
+
+        ttfb_ms = ttfb * 1000 if ttfb is not None else None
+        logger.debug(
+            f"Prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached"
+            + (f", TTFB {ttfb_ms:.0f}ms" if ttfb_ms is not None else "")
+        )
+
+        if self.metrics_path:
+            record = {
+                "timestamp": datetime.datetime.now().isoformat(),
+                "model": usage.model,
+                "prefix": self._fingerprint,
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens,
+                "completion_tokens": usage.value.completion_tokens,
+                "ttfb_ms": ttfb_ms,
+            }
+            try:
+                self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.metrics_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to write prompt cache metrics: {e}")
+
+    def discard_request(self):
+        self._request_started_at = None
+        self._usage = None
+        self._ttfb = None
+
+
+def _mean_ms(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) * 1000 if values else None
+
+
+class PromptCacheGuardProcessor(FrameProcessor):
+    """Checks the prompt prefix of context frames on their way to the LLM."""
+
+    def __init__(self, cache: PromptCache, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self._cache.on_request(frame.context)
+
+        await self.push_frame(frame, direction)
+
+
+class PromptCacheMetricsProcessor(FrameProcessor):
+    """Records cached tokens and time to first token of each LLM response.
+
+    Follow-up requests after function calls are pushed upstream by the
+    assistant context aggregator and reach the LLM through this processor, so
+    their prefix is checked here.
+    """
+
+    def __init__(self, cache: PromptCache, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.UPSTREAM:
+            self._cache.on_request(frame.context)
+        elif isinstance(frame, LLMTextFrame):
+            self._cache.on_text()
+        elif isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                if isinstance(data, LLMUsageMetricsData):
+                    self._cache.on_usage(data)
+        elif isinstance(frame, LLMFullResponseEndFrame):
+            self._cache.on_response_end()
+        elif isinstance(frame, StartInterruptionFrame):
+            self._cache.discard_request()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            logger.info(f"Prompt cache stats: {self._cache.stats}")
+
+        await self.push_frame(frame, direction)
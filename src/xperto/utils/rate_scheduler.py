@@ -0,0 +1,401 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+# Unknown completion sizes are budgeted like this, as OpenAI does with max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+# Without a retry-after header, a 429 pauses all requests this long
+DEFAULT_PAUSE_SECS = 1.0
+# Providers enforce per-minute limits over short periods (OpenAI: per second),
+# so the buckets only hold this much of the budget
+BURST_SECS = 1.0
+DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    LIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the requests made by the current task, live turns unless set
+request_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "request_priority", default=Priority.LIVE
+)
+
+# Shared schedulers of the OpenAI API and of the web tools
+LLM_SCHEDULER = "openai"
+WEB_SCHEDULER = "web"
+
+_schedulers: Dict[str, "RateScheduler"] = {}
+_schedulers_lock = threading.Lock()
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+
+
+class RateScheduler:
+    """Token buckets for requests/min and tokens/min, shared by all sessions of a process.
+
+    Requests wait in a priority queue until both buckets hold enough for
+    them, so live turns go before background work and bursts are smoothed
+    out instead of running into the provider's rate limits. A request larger
+    than a bucket waits for it to be full and leaves it in debt. When the
+    provider does answer with a 429, all requests are paused for its
+    retry-after time, so the sessions don't retry in a storm.
+
+    A limit of 0 disables that bucket, with no limits requests never wait.
+    """
+
+    def __init__(self, name: str, requests_per_min: float = 0, tokens_per_min: float = 0):
+        self.name = name
+        self._counter = itertools.count()
+        self._queue: List[_Waiter] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._paused_until = 0.0
+        self.configure(requests_per_min, tokens_per_min)
+
+        self.throttled = 0
+        self._waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=1000) for priority in Priority
+        }
+
+    def configure(self, requests_per_min: float, tokens_per_min: float):
+        """Set the limits, the buckets start full."""
+        if (requests_per_min, tokens_per_min) == (
+            getattr(self, "requests_per_min", None),
+            getattr(self, "tokens_per_min", None),
+        ):
+            # Every session of the process configures the shared scheduler
+            return
+        self.requests_per_min = requests_per_min
+        self.tokens_per_min = tokens_per_min
+        self._max_requests = max(1.0, requests_per_min * BURST_SECS / 60)
+        self._max_tokens = tokens_per_min * BURST_SECS / 60
+        self._requests = self._max_requests
+        self._tokens = self._max_tokens
+        self._refilled_at = time.monotonic()
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.requests_per_min or self.tokens_per_min)
+
+    @property
+    def stats(self) -> dict:
+        """Queue wait times per priority and the number of 429s."""
+        stats = {"queued": len(self._queue), "throttled": self.throttled}
+        for priority, waits in self._waits.items():
+            ordered = sorted(waits)
+            name = priority.name.lower()
+            stats[f"{name}_requests"] = len(ordered)
+            stats[f"{name}_mean_wait_ms"] = (
+                sum(ordered) / len(ordered) * 1000 if ordered else 0.0
+            )
+            stats[f"{name}_p95_wait_ms"] = (
+                ordered[int(len(ordered) * 0.95)] * 1000 if ordered else 0.0
+            )
+        return stats
+
+    async def acquire(self, tokens: int = 0, priority: Optional[Priority] = None) -> float:
+        """Wait until the request may be sent, returns the wait in seconds."""
+        priority = request_priority.get() if priority is None else priority
+        start = time.monotonic()
+        if not self._queue and self._delay(tokens, start) <= 0:
+            self._take(tokens)
+            self._waits[priority].append(0.0)
+            return 0.0
+
+        self._bind_loop()
+        waiter = _Waiter(priority, next(self._counter), tokens)
+        heapq.heappush(self._queue, waiter)
+        self._notify()
+        try:
+            while True:
+                timeout = None
+                if self._queue[0] is waiter:
+                    timeout = self._delay(tokens, time.monotonic())
+                    if timeout <= 0:
+                        heapq.heappop(self._queue)
+                        self._take(tokens)
+                        break
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            self._notify()
+
+        wait = time.monotonic() - start
+        self._waits[priority].append(wait)
+        if wait > 0.1:
+            logger.debug(
+                f"Rate scheduler {self.name}: {priority.name.lower()} request waited "
+                f"{wait * 1000:.0f}ms ({len(self._queue)} queued)"
+            )
+        return wait
+
+    def pause(self, delay_secs: float):
+        """Hold back all requests, e.g. after the provider answered with a 429."""
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay_secs)
+        logger.warning(f"Rate scheduler {self.name}: rate limited, pausing {delay_secs:.1f}s")
+        self._notify()
+
+    def _bind_loop(self):
+        # Waiters of a previous event loop (e.g. an earlier asyncio.run) are gone
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue.clear()
+            self._changed = asyncio.Event()
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.requests_per_min:
+            self._requests = min(
+                self._max_requests, self._requests + elapsed * self.requests_per_min / 60
+            )
+        if self.tokens_per_min:
+            self._tokens = min(
+                self._max_tokens, self._tokens + elapsed * self.tokens_per_min / 60
+            )
+
+    def _delay(self, tokens: int, now: float) -> float:
+        """Seconds until the buckets hold enough for a request of `tokens`."""
+        self._refill(now)
+        delay = self._paused_until - now
+        if self.requests_per_min and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.requests_per_min)
+        if self.tokens_per_min:
+            needed = min(tokens, self._max_tokens)
+            if self._tokens < needed:
+                delay = max(delay, (needed - self._tokens) * 60 / self.tokens_per_min)
+        return delay
+
+    def _take(self, tokens: int):
+        if self.requests_per_min:
+            self._requests -= 1
+        if self.tokens_per_min:
+            self._tokens -= tokens
+
+
+def get_shared_rate_scheduler(name: str) -> RateScheduler:
+    """The process-wide scheduler of a provider, unlimited until configured."""
+    with _schedulers_lock:
+        if name not in _schedulers:
+            _schedulers[name] = RateScheduler(name)
+        return _schedulers[name]
+
+
+def estimate_tokens(body: bytes) -> int:
+    """Tokens an OpenAI request counts against the tokens/min limit."""
+    try:
+        request = json.loads(body)
+    except ValueError:
+        return 0
+    if not isinstance(request, dict):
+        return 0
+    # ~4 characters per token, like the knowledge base budget
+    prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+    completion_tokens = (
+        request.get("max_completion_tokens")
+        or request.get("max_tokens")
+        or DEFAULT_COMPLETION_TOKENS
+    )
+    return prompt_tokens + completion_tokens
+
+
+def retry_after_secs(response: httpx.Response) -> float:
+    """Pause requested by a 429 response of OpenAI or a compatible provider."""
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    # e.g. "6m0s" or "120ms"
+    for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        parts = DURATION_PART_PATTERN.findall(headers.get(header, ""))
+        if parts:
+            return sum(float(value) * DURATION_UNITS[unit] for value, unit in parts)
+    return DEFAULT_PAUSE_SECS
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that sends every request through a `RateScheduler`.
+
+    Sits below the OpenAI client, so the client's own retries are scheduled
+    as well, and a 429 pauses the scheduler before the client retries.
+    """
+
+    def __init__(self, scheduler: RateScheduler, transport: httpx.AsyncBaseTransport):
+        self._scheduler = scheduler
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = estimate_tokens(request.content) if self._scheduler.tokens_per_min else 0
+        await self._scheduler.acquire(tokens)
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 429:
+            self._scheduler.pause(retry_after_secs(response))
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def rate_limited_http_client(scheduler: RateScheduler) -> httpx.AsyncClient:
+    """HTTP client for `AsyncOpenAI(http_client=...)` that is rate scheduled."""
+    from openai import DefaultAsyncHttpxClient
+
+    # Same connection pool as pipecat's OpenAI services
+    limits = httpx.Limits(
+        max_keepalive_connections=100, max_connections=1000, keepalive_expiry=None
+    )
+    transport = RateLimitedTransport(scheduler, httpx.AsyncHTTPTransport(limits=limits))
+    return DefaultAsyncHttpxClient(transport=transport)
+
+
+def rate_limit_llm_service(llm, scheduler: RateScheduler):
+    """Route the requests of a pipecat OpenAI LLM service through the scheduler."""
+    client = llm._client
+    llm._client = client.with_options(http_client=rate_limited_http_client(scheduler))
+    # A hedge to the same provider shares its limits, another provider has its own
+    if getattr(llm, "_secondary_client", None) is client:
+        llm._secondary_client = llm._client
+
+
+async def benchmark(sessions: int = 20, turns: int = 5, server_rpm: int = 600) -> dict:
+    """Compare 429s and turn latency with and without the scheduler.
+
+    A local stub of the chat completions API enforces `server_rpm` per second
+    like OpenAI and answers with a 429 and a retry-after beyond it. Every
+    session sends `turns` requests at random times, like users in concurrent
+    meetings. Returns the 429s, failed turns and p95 turn latency of both.
+    """
+    import random
+
+    from aiohttp import web
+    from openai import AsyncOpenAI
+
+    server = RateScheduler("stub-server", requests_per_min=server_rpm)
+    rejected = 0
+
+    async def completions(request: web.Request) -> web.Response:
+        nonlocal rejected
+        retry = server._delay(0, time.monotonic())
+        if retry > 0:
+            rejected += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status=429,
+                headers={"retry-after-ms": str(int(retry * 1000))},
+            )
+        server._take(0)
+        await asyncio.sleep(0.2)
+        return web.json_response(
+            {
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "ok"},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+
+    async def run(scheduler: Optional[RateScheduler]) -> tuple[List[float], int]:
+        nonlocal rejected
+        server.configure(server_rpm, 0)
+        rejected = 0
+        http_client = rate_limited_http_client(scheduler) if scheduler else None
+        client = AsyncOpenAI(api_key="stub", base_url=base_url, http_client=http_client)
+        rng = random.Random(1)
+        latencies = []
+        failed = 0
+
+        async def session():
+            nonlocal failed
+            for _ in range(turns):
+                await asyncio.sleep(rng.uniform(0, 2))
+                start = time.monotonic()
+                try:
+                    await client.chat.completions.create(
+                        model="stub", messages=[{"role": "user", "content": "hi"}]
+                    )
+                except Exception:
+                    # Still rate limited after the client's retries
+                    failed += 1
+                latencies.append(time.monotonic() - start)
+
+        await asyncio.gather(*(session() for _ in range(sessions)))
+        await client.close()
+        return sorted(latencies), failed
+
+    unscheduled, unscheduled_failed = await run(None)
+    unscheduled_rejected = rejected
+    scheduled, scheduled_failed = await run(
+        RateScheduler("benchmark", requests_per_min=server_rpm)
+    )
+    scheduled_rejected = rejected
+    await runner.cleanup()
+
+    def p95(latencies: List[float]) -> float:
+        return latencies[int(len(latencies) * 0.95)] * 1000
+
+    return {
+        "unscheduled": {
+            "rejected": unscheduled_rejected,
+            "failed": unscheduled_failed,
+            "p95_turn_ms": p95(unscheduled),
+        },
+        "scheduled": {
+            "rejected": scheduled_rejected,
+            "failed": scheduled_failed,
+            "p95_turn_ms": p95(scheduled),
+        },
+    }
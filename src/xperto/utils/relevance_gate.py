@@ -0,0 +1,194 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    ErrorFrame,
+    Frame,
+    LLMMessagesAppendFrame,
+    TranscriptionFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from .wake_check_buffer import SPEAKER_TAGS_PATTERN, compile_wake_patterns
+
+WORD_PATTERN = re.compile(r"[\w']+", re.UNICODE)
+
+FILLER_WORDS = {
+    # EN
+    "uh", "uhm", "um", "umm", "hm", "hmm", "mhm", "ah", "oh", "okay", "ok", "yeah",
+    "yes", "no", "right", "sure", "alright", "thanks", "thank", "you", "cool", "nice",
+    "so", "well", "and", "but",
+    # DE
+    "äh", "ähm", "öhm", "hmm", "ja", "nein", "genau", "gut", "alles", "klar", "danke",
+    "also", "naja", "na", "super", "prima", "stimmt", "richtig", "und", "aber",
+}
+
+QUESTION_WORDS = {
+    # EN
+    "what", "how", "why", "who", "whom", "whose", "when", "where", "which", "can",
+    "could", "would", "should", "will", "is", "are", "do", "does", "did", "have", "has",
+    # DE
+    "was", "wie", "warum", "wieso", "weshalb", "wer", "wem", "wen", "wann", "wo",
+    "woher", "wohin", "welche", "welcher", "welches", "kannst", "könntest", "kann",
+    "könnte", "würdest", "hast", "bist", "ist", "gibt",
+}
+
+REQUEST_WORDS = {
+    # EN
+    "please", "tell", "explain", "summarize", "summarise", "describe", "list", "give",
+    "show", "help", "search", "look", "find", "recap", "repeat",
+    # DE
+    "bitte", "erklär", "erkläre", "erklären", "sag", "sage", "fasse", "zusammen",
+    "beschreib", "beschreibe", "nenn", "nenne", "zeig", "hilf", "such", "suche",
+    "wiederhole",
+}
+
+
+class RelevanceClassifier(ABC):
+    """Decides whether a transcribed utterance is addressed to the bot."""
+
+    @abstractmethod
+    def is_addressed(self, text: str) -> bool:
+        pass
+
+
+class HeuristicRelevanceClassifier(RelevanceClassifier):
+    """Cheap keyword heuristics, no model and no allocations beyond tokenizing.
+
+    An utterance counts as addressed to the bot if it mentions one of the wake
+    phrases, is phrased as a question or request, or is long enough to be a
+    statement the bot should react to. Pure filler ("uh", "okay", "genau") and
+    very short remarks are not.
+    """
+
+    def __init__(self, wake_phrases: list[str], min_words: int = 4):
+        self._min_words = min_words
+        self._wake_patterns = compile_wake_patterns(wake_phrases)
+
+    def is_addressed(self, text: str) -> bool:
+        text = SPEAKER_TAGS_PATTERN.sub(" ", text).strip()
+        words = WORD_PATTERN.findall(text.lower())
+        if not words:
+            return False
+
+        if any(pattern.search(text) for pattern in self._wake_patterns):
+            return True
+
+        if all(word in FILLER_WORDS for word in words):
+            return False
+
+        if text.endswith("?") or words[0] in QUESTION_WORDS:
+            return True
+
+        if any(word in REQUEST_WORDS for word in words):
+            return True
+
+        return len(words) >= self._min_words
+
+
+class RelevanceGate(FrameProcessor):
+    """Keeps utterances that aren't addressed to the bot from triggering the LLM.
+
+    Sits between the `WakeCheckBuffer` and the user context aggregator. Final
+    transcriptions the classifier deems relevant pass through unchanged. All
+    others are appended to the context as user messages without running the
+    LLM, so the bot still knows what was said when it's asked next.
+
+    Anything said while the bot is talking or shortly after it stopped is
+    treated as a reply (e.g. "yes" to a question) and always passes.
+    """
+
+    def __init__(
+        self, classifier: RelevanceClassifier, reply_window_secs: float = 5.0, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self._classifier = classifier
+        self._reply_window_secs = reply_window_secs
+        self._bot_speaking = False
+        self._bot_stopped_at = 0.0
+
+        self.utterances_passed = 0
+        self.utterances_gated = 0
+        self.total_decision_ns = 0
+        self.max_decision_ns = 0
+
+    @property
+    def stats(self) -> dict:
+        """Share of LLM runs avoided and per-utterance decision latency."""
+        decisions = self.utterances_passed + self.utterances_gated
+        return {
+            "utterances_passed": self.utterances_passed,
+            "utterances_gated": self.utterances_gated,
+            "llm_runs_avoided_ratio": self.utterances_gated / decisions if decisions else 0.0,
+            "mean_decision_us": self.total_decision_ns / decisions / 1000 if decisions else 0.0,
+            "max_decision_us": self.max_decision_ns / 1000,
+        }
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        try:
+            if isinstance(frame, BotStartedSpeakingFrame):
+                self._bot_speaking = True
+            elif isinstance(frame, BotStoppedSpeakingFrame):
+                self._bot_speaking = False
+                self._bot_stopped_at = time.monotonic()
+
+            if isinstance(frame, TranscriptionFrame):
+                start = time.perf_counter_ns()
+                addressed = self._in_reply_window() or self._classifier.is_addressed(
+                    frame.text
+                )
+                elapsed = time.perf_counter_ns() - start
+
+                self.total_decision_ns += elapsed
+                self.max_decision_ns = max(self.max_decision_ns, elapsed)
+
+                if addressed:
+                    self.utterances_passed += 1
+                    logger.debug(f"Relevance gate passed ({elapsed / 1000:.1f}us): {frame.text}")
+                    await self.push_frame(frame, direction)
+                else:
+                    self.utterances_gated += 1
+                    logger.debug(f"Relevance gate held back ({elapsed / 1000:.1f}us): {frame.text}")
+                    await self.push_frame(
+                        LLMMessagesAppendFrame(
+                            messages=[{"role": "user", "content": frame.text}],
+                            run_llm=False,
+                        ),
+                        direction,
+                    )
+                return
+
+            if isinstance(frame, (EndFrame, CancelFrame)):
+                logger.info(f"Relevance gate stats: {self.stats}")
+            await self.push_frame(frame, direction)
+        except Exception as e:
+            error_msg = f"Error in relevance gate: {e}"
+            logger.exception(error_msg)
+            await self.push_error(ErrorFrame(error_msg))
+
+    def _in_reply_window(self) -> bool:
+        if self._bot_speaking:
+            return True
+        return time.monotonic() - self._bot_stopped_at < self._reply_window_secs
+
+
+def create_relevance_classifier(
+    name: str, wake_phrases: list[str]
+) -> Optional[RelevanceClassifier]:
+    """Create the relevance classifier configured by name, or None if disabled."""
+    match name:
+        case "off" | "":
+            return None
+        case "heuristic":
+            return HeuristicRelevanceClassifier(wake_phrases)
+        case _:
+            raise ValueError(f"Unsupported relevance gate: {name}")
@@ -0,0 +1,210 @@
+import asyncio
+import datetime
+import json
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+SAMPLE_INTERVAL_SECS = 0.01
+LAG_INTERVAL_SECS = 0.1
+FLUSH_INTERVAL_SECS = 60.0
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads and the event loop lag of a session.
+
+    A background thread takes the stacks of all other threads every
+    `interval_secs` and counts them as collapsed stacks (`frame;frame;... N`,
+    the input of flamegraph.pl, speedscope, ...) in
+    `<output_folder>/<session_id>_profile.folded`. Each stack starts with a
+    frame tagging the capture (config name, session ID and start time), so
+    several captures of a session, or files of several sessions, can be
+    viewed together or apart. A task on the event loop measures how late its
+    wakeups are, the samples go to `<session_id>_loop_lag.jsonl`.
+
+    Only the sampler thread does work (a few microseconds per thread and
+    sample), the profiled code runs unchanged, so it can stay on for a whole
+    meeting. The files are rewritten/appended every `FLUSH_INTERVAL_SECS`.
+    """
+
+    def __init__(
+        self,
+        output_folder: Path,
+        session_id: str,
+        config_name: str,
+        interval_secs: float = SAMPLE_INTERVAL_SECS,
+    ):
+        self.output_folder = Path(output_folder)
+        self.session_id = session_id
+        self.config_name = config_name
+        self.interval_secs = interval_secs
+        self.stacks_file = self.output_folder / f"{session_id}_profile.folded"
+        self.lag_file = self.output_folder / f"{session_id}_loop_lag.jsonl"
+
+        self.samples = 0
+        self.sampler_cpu_secs = 0.0
+        self.running_secs = 0.0
+        self._stacks: Counter[str] = Counter()
+        self._lags: List[float] = []
+        self._pending_lags: List[dict] = []
+        self._labels: Dict[CodeType, str] = {}
+        self._root = ""
+        self._started_at: Optional[float] = None
+        self._last_flush = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def stats(self) -> dict:
+        running_secs = self.running_secs
+        if self._started_at is not None:
+            running_secs += time.monotonic() - self._started_at
+        lags = sorted(self._lags)
+        return {
+            "samples": self.samples,
+            "running_secs": round(running_secs, 1),
+            # Share of one core used by the sampler
+            "overhead": self.sampler_cpu_secs / running_secs if running_secs else 0.0,
+            "lag_p50_ms": round(statistics.median(lags) * 1000, 1) if lags else None,
+            "lag_p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 1) if lags else None,
+            "lag_max_ms": round(lags[-1] * 1000, 1) if lags else None,
+        }
+
+    def start(self):
+        """Start a capture, must be called from the event loop."""
+        if self.running:
+            return
+        now = datetime.datetime.now()
+        self._root = _folded_label(f"{self.config_name}:{self.session_id}:{now:%H%M%S}")
+        self._pending_lags.append(
+            {
+                "capture": self._root,
+                "session_id": self.session_id,
+                "config": self.config_name,
+                "interval_ms": LAG_INTERVAL_SECS * 1000,
+            }
+        )
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        self._last_flush = self._started_at
+        self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler")
+        self._thread.daemon = True
+        self._thread.start()
+        self._lag_task = asyncio.get_running_loop().create_task(self._measure_lag())
+        logger.info(f"Sampling profiler started, writing to {self.stacks_file}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        self.running_secs += time.monotonic() - self._started_at
+        self._started_at = None
+        self.flush()
+        logger.info(f"Sampling profiler stopped ({self.stats}), see {self.stacks_file}")
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def flush(self):
+        try:
+            self.output_folder.mkdir(parents=True, exist_ok=True)
+            # The stacks are aggregated, the file is small enough to rewrite. The
+            # sampler thread keeps counting, dict.copy is atomic
+            stacks = dict.copy(self._stacks)
+            lines = [f"{stack} {count}\n" for stack, count in stacks.items()]
+            tmp_file = self.stacks_file.with_name(f".{self.stacks_file.name}.tmp")
+            tmp_file.write_text("".join(lines), encoding="utf-8")
+            os.replace(tmp_file, self.stacks_file)
+
+            pending, self._pending_lags = self._pending_lags, []
+            with self.lag_file.open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in pending)
+        except OSError as e:
+            logger.error(f"Failed to write profile: {e}")
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        start_cpu = time.thread_time()
+        while not self._stop.wait(self.interval_secs):
+            self._sample(own_thread)
+            self.sampler_cpu_secs = time.thread_time() - start_cpu
+
+    def _sample(self, own_thread: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_thread:
+                continue
+            labels = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    file_name = Path(code.co_filename).name
+                    label = f"{code.co_qualname}_({file_name}:{code.co_firstlineno})"
+                    label = self._labels[code] = _folded_label(label)
+                labels.append(label)
+                frame = frame.f_back
+            labels.append(_folded_label(names.get(ident, str(ident))))
+            labels.append(self._root)
+            self._stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    async def _measure_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL_SECS)
+            lag = max(0.0, time.perf_counter() - start - LAG_INTERVAL_SECS)
+            self._lags.append(lag)
+            self._pending_lags.append(
+                {"time": round(time.time(), 3), "lag_ms": round(lag * 1000, 2)}
+            )
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECS:
+                self._last_flush = time.monotonic()
+                await asyncio.to_thread(self.flush)
+
+
+def _folded_label(text: str) -> str:
+    # ";" separates the frames of a collapsed stack, " " the stack from its count
+    return text.replace(";", ":").replace(" ", "_")
+
+
+def install_profile_toggle(profiler: SamplingProfiler) -> bool:
+    """Start/stop the profiler on SIGUSR2, see `request_profile_toggle`."""
+    if not hasattr(signal, "SIGUSR2"):
+        return False
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGUSR2, profiler.toggle)
+    return True
+
+
+def remove_profile_toggle():
+    """Undo `install_profile_toggle`, so the signal doesn't keep the profiler alive."""
+    if hasattr(signal, "SIGUSR2"):
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR2)
+
+
+def request_profile_toggle(pid: int):
+    """Start or stop the sampling profiler of a running bot."""
+    os.kill(pid, signal.SIGUSR2)
@@ -0,0 +1,221 @@
+import asyncio
+import datetime
+import json
+import os
+import wave
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from loguru import logger
+
+# Size of the chunks the AudioBufferProcessor hands over (per track, 16-bit mono),
+# i.e. 10s at 16kHz. This bounds the audio kept in RAM independent of meeting length.
+RECORDING_CHUNK_BYTES = 320_000
+
+MANIFEST_NAME = "manifest.json"
+
+
+class SegmentedRecorder:
+    """Writes recordings as rotating, crash-safe WAV segments with a manifest.
+
+    Audio arrives in chunks of `RECORDING_CHUNK_BYTES` from the
+    AudioBufferProcessor and is appended to the current segment of each track.
+    The WAV header is patched after every chunk, so a crash loses at most the
+    chunk in flight. Segments rotate every `segment_secs` seconds or
+    `segment_max_bytes` bytes, whichever comes first, and are listed in a
+    per-session `manifest.json`.
+
+    Layout: `<output_folder>/<timestamp>_<name>/<timestamp>_<name>_<track>_<index>.wav`
+    """
+
+    def __init__(
+        self,
+        output_folder: Path = Path("./recordings"),
+        output_name: str = "recording",
+        segment_secs: float = 300.0,
+        segment_max_bytes: int = 0,
+    ):
+        """Initialize the recorder and create the session folder.
+
+        Args:
+            output_folder: Path to the folder where session folders are created.
+            output_name: Name used for the session folder and segment files.
+            segment_secs: Max. duration of a segment, 0 for no limit.
+            segment_max_bytes: Max. size of a segment, 0 for no limit.
+        """
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.session_name = f"{timestamp}_{output_name}"
+        self.session_folder = output_folder / self.session_name
+        self.session_folder.mkdir(parents=True, exist_ok=True)
+        self.segment_secs = segment_secs
+        self.segment_max_bytes = segment_max_bytes
+
+        self._writers: Dict[str, tuple[wave.Wave_write, BinaryIO]] = {}
+        self._segment_index: Dict[str, int] = {}
+        self._segments: List[dict] = []
+        self._lock = asyncio.Lock()
+        logger.debug(f"SegmentedRecorder writing to: {self.session_folder}")
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.session_folder / MANIFEST_NAME
+
+    # Handler for combined audio data
+    async def on_audio_data(self, buffer, audio, sample_rate, num_channels):
+        await self._append("mix", audio, sample_rate, num_channels)
+
+    # Handler for separate tracks
+    async def on_track_audio_data(
+        self, buffer, user_audio, bot_audio, sample_rate, num_channels
+    ):
+        await self._append("user", user_audio, sample_rate, 1)
+        await self._append("bot", bot_audio, sample_rate, 1)
+
+    async def close(self):
+        """Finalize all open segments and the manifest."""
+        async with self._lock:
+            for track in list(self._writers):
+                await asyncio.to_thread(self._close_segment, track)
+            await asyncio.to_thread(self._write_manifest)
+        logger.info(f"Recording segments finalized in {self.session_folder}")
+
+    async def _append(self, track: str, audio: bytes, sample_rate: int, num_channels: int):
+        if not audio:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._write_chunk, track, audio, sample_rate, num_channels)
+
+    def _write_chunk(self, track: str, audio: bytes, sample_rate: int, num_channels: int):
+        if track not in self._writers:
+            self._open_segment(track, sample_rate, num_channels)
+
+        writer, file = self._writers[track]
+        # writeframes() patches the header on seekable files, keeping the file valid
+        writer.writeframes(audio)
+        file.flush()
+
+        segment = self._current_segment(track)
+        segment["bytes"] += len(audio)
+        segment["duration_secs"] = segment["bytes"] / (sample_rate * num_channels * 2)
+
+        if (self.segment_secs and segment["duration_secs"] >= self.segment_secs) or (
+            self.segment_max_bytes and segment["bytes"] >= self.segment_max_bytes
+        ):
+            self._close_segment(track)
+            self._write_manifest()
+
+    def _open_segment(self, track: str, sample_rate: int, num_channels: int):
+        index = self._segment_index.get(track, 0)
+        self._segment_index[track] = index + 1
+
+        filename = f"{self.session_name}_{track}_{index:05d}.wav"
+        file = (self.session_folder / filename).open("wb")
+        writer = wave.open(file, "wb")
+        writer.setsampwidth(2)
+        writer.setnchannels(num_channels)
+        writer.setframerate(sample_rate)
+        self._writers[track] = (writer, file)
+
+        self._segments.append(
+            {
+                "file": filename,
+                "track": track,
+                "index": index,
+                "started_at": datetime.datetime.now().isoformat(),
+                "sample_rate": sample_rate,
+                "num_channels": num_channels,
+                "bytes": 0,
+                "duration_secs": 0.0,
+                "complete": False,
+            }
+        )
+        # List the segment before writing to it so a crash leaves it discoverable
+        self._write_manifest()
+
+    def _close_segment(self, track: str):
+        writer, file = self._writers.pop(track)
+        writer.close()
+        file.close()
+        segment = self._current_segment(track)
+        segment["complete"] = True
+        logger.info(f"Recording segment closed: {segment['file']}")
+
+    def _current_segment(self, track: str) -> dict:
+        for segment in reversed(self._segments):
+            if segment["track"] == track and not segment["complete"]:
+                return segment
+        raise KeyError(track)
+
+    def _write_manifest(self):
+        manifest = {
+            "session": self.session_name,
+            "updated_at": datetime.datetime.now().isoformat(),
+            "segments": self._segments,
+        }
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def concat_segments(
+    session_folder: Path, output_path: Optional[Path] = None, track: Optional[str] = None
+) -> List[Path]:
+    """Join the segments of a session into one WAV per track without re-encoding.
+
+    The PCM data is copied as-is in fixed-size blocks, so memory use does not
+    depend on the recording length. Segments are taken from the manifest if it
+    exists and fall back to the sorted file names otherwise.
+
+    Args:
+        session_folder: Session folder created by `SegmentedRecorder`.
+        output_path: Output file, only valid if a single track is joined.
+        track: Only join this track ("mix", "user" or "bot").
+
+    Returns:
+        Paths of the joined files.
+    """
+    manifest_path = session_folder / MANIFEST_NAME
+    tracks: Dict[str, List[Path]] = {}
+    if manifest_path.exists():
+        with manifest_path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        for segment in sorted(manifest["segments"], key=lambda s: (s["track"], s["index"])):
+            tracks.setdefault(segment["track"], []).append(session_folder / segment["file"])
+    else:
+        for path in sorted(session_folder.glob(f"{session_folder.name}_*_*.wav")):
+            segment_track = path.stem[len(session_folder.name) + 1 :].rsplit("_", 1)[0]
+            tracks.setdefault(segment_track, []).append(path)
+
+    if track is not None:
+        tracks = {track: tracks.get(track, [])}
+    if output_path is not None and len(tracks) != 1:
+        raise ValueError(f"Output path needs a single track, found: {list(tracks)}")
+
+    outputs = []
+    for track_name, segments in tracks.items():
+        segments = [path for path in segments if path.exists()]
+        if not segments:
+            continue
+
+        target = output_path or session_folder.with_name(
+            f"{session_folder.name}_{track_name}.wav"
+        )
+        with wave.open(str(segments[0]), "rb") as first:
+            params = first.getparams()
+
+        with wave.open(str(target), "wb") as out:
+            out.setparams(params)
+            for path in segments:
+                with wave.open(str(path), "rb") as segment:
+                    if segment.getparams()[:3] != params[:3]:
+                        raise ValueError(f"Segment format mismatch: {path}")
+                    while True:
+                        frames = segment.readframes(65536)
+                        if not frames:
+                            break
+                        out.writeframesraw(frames)
+
+        logger.info(f"Joined {len(segments)} segments into {target}")
+        outputs.append(target)
+    return outputs
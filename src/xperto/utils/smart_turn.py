@@ -0,0 +1,190 @@
+import asyncio
+import bisect
+import statistics
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from pipecat.audio.turn.base_turn_analyzer import EndOfTurnState
+from pipecat.audio.turn.smart_turn.base_smart_turn import SmartTurnParams
+from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADParams, VADState
+
+from ..config import STTConfig
+
+SAMPLE_RATE = 16000
+FRAME_SECS = 0.02
+# A pause shorter than this means the speaker was still talking
+RESUME_SECS = 1.5
+
+
+class ThresholdSmartTurnAnalyzer(LocalSmartTurnAnalyzerV3):
+    """Smart-turn v3 (bundled ONNX model, CPU) with a configurable confidence.
+
+    The model runs whenever the VAD detects a short pause. The turn ends when
+    its end-of-turn probability reaches `threshold`, otherwise the user may
+    keep talking until `stop_secs` of silence end the turn anyway.
+    """
+
+    def __init__(self, *, threshold: float = 0.5, **kwargs):
+        super().__init__(**kwargs)
+        self._threshold = threshold
+
+    def _predict_endpoint(self, audio_array: np.ndarray) -> Dict[str, Any]:
+        result = super()._predict_endpoint(audio_array)
+        result["prediction"] = 1 if result["probability"] >= self._threshold else 0
+        return result
+
+
+def create_smart_turn_analyzer(stt: STTConfig) -> ThresholdSmartTurnAnalyzer:
+    return ThresholdSmartTurnAnalyzer(
+        threshold=stt.smart_turn_threshold,
+        params=SmartTurnParams(stop_secs=stt.smart_turn_stop_secs),
+    )
+
+
+@dataclass
+class TurnEvalReport:
+    mode: str
+    files: int = 0
+    turns: int = 0
+    false_cutoffs: int = 0
+    latencies_secs: List[float] = field(default_factory=list)
+
+    @property
+    def median_latency_ms(self) -> float:
+        return statistics.median(self.latencies_secs) * 1000 if self.latencies_secs else 0.0
+
+    @property
+    def false_cutoff_rate(self) -> float:
+        return self.false_cutoffs / self.turns if self.turns else 0.0
+
+    def merge(self, other: "TurnEvalReport"):
+        self.files += other.files
+        self.turns += other.turns
+        self.false_cutoffs += other.false_cutoffs
+        self.latencies_secs.extend(other.latencies_secs)
+
+
+@dataclass
+class TurnReplay:
+    """Speech starts/ends found by the VAD and turn ends of smart-turn, in seconds."""
+
+    speech_starts: List[float]
+    speech_ends: List[float]
+    smart_turn_ends: List[float]
+
+
+def evaluate_recordings(recordings_dir: Path, stt: STTConfig) -> List[TurnEvalReport]:
+    """Compare the silence trigger and smart-turn on the recorded user tracks.
+
+    Each track is replayed through the VAD and the smart-turn analyzer like
+    the transport does. The latency of a turn is the time from the end of the
+    user's speech to the end of the turn. A turn counts as a false cutoff if
+    the user continued speaking within `RESUME_SECS` of the pause.
+    """
+    tracks = sorted(recordings_dir.glob("**/*_user*.wav"))
+    if not tracks:
+        raise FileNotFoundError(
+            f"No user tracks in {recordings_dir}, record with `audio_separate_tracks: true`"
+        )
+
+    reports = [TurnEvalReport("silence"), TurnEvalReport("smart_turn")]
+    for track in tracks:
+        try:
+            replay = asyncio.run(_replay_track(_read_track(track), stt))
+        except Exception as e:
+            logger.warning(f"Failed to replay {track}: {e}")
+            continue
+        for report, track_report in zip(reports, score_replay(replay, stt.silence_trigger_secs)):
+            report.merge(track_report)
+    return reports
+
+
+def score_replay(replay: TurnReplay, silence_trigger_secs: float) -> List[TurnEvalReport]:
+    """Reports of the silence trigger and smart-turn on one replayed track.
+
+    Each turn end is matched to the last speech end before it.
+    """
+    # The silence trigger ends every pause longer than it
+    silence_ends = []
+    for end in replay.speech_ends:
+        next_start = _next_start(replay, end)
+        if next_start is None or next_start - end > silence_trigger_secs:
+            silence_ends.append(end + silence_trigger_secs)
+
+    reports = []
+    for mode, turn_ends in (("silence", silence_ends), ("smart_turn", replay.smart_turn_ends)):
+        report = TurnEvalReport(mode, files=1)
+        for turn_end in turn_ends:
+            index = bisect.bisect_right(replay.speech_ends, turn_end) - 1
+            if index < 0:
+                continue
+            speech_end = replay.speech_ends[index]
+            next_start = _next_start(replay, speech_end)
+            report.turns += 1
+            report.latencies_secs.append(turn_end - speech_end)
+            if next_start is not None and next_start - speech_end < RESUME_SECS:
+                report.false_cutoffs += 1
+        reports.append(report)
+    return reports
+
+
+def _next_start(replay: TurnReplay, speech_end: float) -> Optional[float]:
+    index = bisect.bisect_right(replay.speech_starts, speech_end)
+    return replay.speech_starts[index] if index < len(replay.speech_starts) else None
+
+
+def _read_track(path: Path) -> bytes:
+    """16 kHz mono 16-bit audio of a recorded track."""
+    with wave.open(str(path), "rb") as wf:
+        sample_rate = wf.getframerate()
+        channels = wf.getnchannels()
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        audio = audio[::channels]
+    if sample_rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), sample_rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.int16)
+    return audio.tobytes()
+
+
+async def _replay_track(audio: bytes, stt: STTConfig) -> TurnReplay:
+    """Run the VAD and smart-turn over a track, as `BaseInputTransport` does."""
+    vad = SileroVADAnalyzer(params=VADParams(stop_secs=stt.smart_turn_vad_stop_secs))
+    vad.set_sample_rate(SAMPLE_RATE)
+    turn_analyzer = create_smart_turn_analyzer(stt)
+    turn_analyzer.set_sample_rate(SAMPLE_RATE)
+
+    replay = TurnReplay([], [], [])
+    frame_bytes = int(SAMPLE_RATE * FRAME_SECS) * 2
+    vad_state = VADState.QUIET
+    for i in range(len(audio) // frame_bytes):
+        now = (i + 1) * FRAME_SECS
+        frame = audio[i * frame_bytes : (i + 1) * frame_bytes]
+
+        previous_state = vad_state
+        state = await vad.analyze_audio(frame)
+        if state != vad_state and state in (VADState.SPEAKING, VADState.QUIET):
+            # The VAD reports changes once they lasted start_secs/stop_secs
+            if state == VADState.SPEAKING:
+                replay.speech_starts.append(now - vad.params.start_secs)
+            else:
+                replay.speech_ends.append(now - vad.params.stop_secs)
+            vad_state = state
+
+        end_of_turn = turn_analyzer.append_audio(frame, vad_state == VADState.SPEAKING)
+        if end_of_turn == EndOfTurnState.COMPLETE:
+            replay.smart_turn_ends.append(now)
+        elif vad_state == VADState.QUIET and previous_state != VADState.QUIET:
+            start = time.perf_counter()
+            end_of_turn, _ = await turn_analyzer.analyze_end_of_turn()
+            if end_of_turn == EndOfTurnState.COMPLETE:
+                # The model's inference time adds to the latency
+                replay.smart_turn_ends.append(now + time.perf_counter() - start)
+    return replay
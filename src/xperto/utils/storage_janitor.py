@@ -0,0 +1,313 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from ..config import PathsConfig, StorageConfig, StorageQuotaConfig
+from .blob_store import BLOB_KEY, BLOBS_DIR, TOUCH_INTERVAL_SECS
+
+# All outputs (contexts, transcripts, recordings) are named "<YYYYMMDD>_<HHMMSS>_..."
+TIMESTAMPED_NAME_PATTERN = re.compile(r"^(?P<date>\d{8})_\d{6}")
+SHARD_NAME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+COMPRESSIBLE_SUFFIXES = {".json", ".log", ".txt"}
+CONTEXT_SUFFIXES = (".json", ".json.gz")
+
+DAY_SECS = 24 * 60 * 60
+
+
+def shard_name(name: str) -> Optional[str]:
+    """Date shard ("YYYY-MM-DD") for a timestamped file name, or None."""
+    match = TIMESTAMPED_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    date = match.group("date")
+    return f"{date[:4]}-{date[4:6]}-{date[6:]}"
+
+
+@dataclass
+class JanitorReport:
+    sharded: int = 0
+    compressed: int = 0
+    deleted: int = 0
+    freed_bytes: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def merge(self, other: "JanitorReport"):
+        self.sharded += other.sharded
+        self.compressed += other.compressed
+        self.deleted += other.deleted
+        self.freed_bytes += other.freed_bytes
+        self.errors.extend(other.errors)
+
+
+@dataclass
+class _BlobIndex:
+    """The blobs of a contexts folder and the context files referencing them."""
+
+    # digest -> (path, size, mtime)
+    blobs: Dict[str, Tuple[Path, int, float]] = field(default_factory=dict)
+    # context file -> digests
+    references: Dict[Path, Set[str]] = field(default_factory=dict)
+    counts: Counter = field(default_factory=Counter)
+    # False if a context file couldn't be read, its blobs are unknown then
+    complete: bool = True
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.blobs.values())
+
+
+class StorageJanitor:
+    """Keeps the recordings, transcripts and contexts folders small and fast to scan.
+
+    Each sweep moves cold top-level outputs into date shard folders
+    ("YYYY-MM-DD/"), gzips cold text files in place and deletes the oldest
+    files once a folder exceeds its age or size quota. Only files that were not
+    modified for `shard_after_days` are touched, so live sessions are safe.
+
+    The blob store of the contexts folder is never sharded or compressed, its
+    blobs count against the folder's size quota. Blobs no context file
+    references (any more) are deleted, as soon as the last context
+    referencing them is.
+    """
+
+    def __init__(self, paths: PathsConfig, storage: StorageConfig):
+        self.folders: Dict[Path, StorageQuotaConfig] = {
+            Path(paths.recordings): storage.recordings,
+            Path(paths.transcripts): storage.transcripts,
+            Path(paths.contexts): storage.contexts,
+        }
+        self.storage = storage
+        self._task: Optional[asyncio.Task] = None
+
+    def sweep(self) -> JanitorReport:
+        """Run one synchronous pass over all folders."""
+        report = JanitorReport()
+        for folder, quota in self.folders.items():
+            if not folder.is_dir():
+                continue
+            report.merge(self._sweep_folder(folder, quota))
+
+        logger.info(
+            f"Storage janitor: {report.sharded} sharded, {report.compressed} compressed, "
+            f"{report.deleted} deleted ({report.freed_bytes / 1024 / 1024:.1f} MB freed)"
+        )
+        return report
+
+    def start(self):
+        """Run sweeps in the background every `janitor_interval_secs`."""
+        if self.storage.janitor_interval_secs <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                # File operations must not block the event loop
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Storage janitor sweep failed: {e}")
+            await asyncio.sleep(self.storage.janitor_interval_secs)
+
+    def _sweep_folder(self, folder: Path, quota: StorageQuotaConfig) -> JanitorReport:
+        report = JanitorReport()
+        now = time.time()
+
+        # 1. Shard cold top-level outputs into date folders
+        shard_cutoff = now - self.storage.shard_after_days * DAY_SECS
+        for entry in folder.iterdir():
+            shard = shard_name(entry.name)
+            if shard is None:
+                continue
+            try:
+                if entry.stat().st_mtime > shard_cutoff:
+                    continue
+                target_dir = folder / shard
+                target_dir.mkdir(exist_ok=True)
+                target = target_dir / entry.name
+                if target.exists():
+                    report.errors.append(f"Not sharding {entry}, {target} exists")
+                    continue
+                os.replace(entry, target)
+                report.sharded += 1
+            except OSError as e:
+                report.errors.append(f"Failed to shard {entry}: {e}")
+
+        # 2. Compress cold text files inside the shards
+        compress_cutoff = now - self.storage.compress_after_days * DAY_SECS
+        for path in self._sharded_files(folder):
+            if path.suffix not in COMPRESSIBLE_SUFFIXES:
+                continue
+            try:
+                if path.stat().st_mtime > compress_cutoff:
+                    continue
+                report.freed_bytes += self._compress(path)
+                report.compressed += 1
+            except OSError as e:
+                report.errors.append(f"Failed to compress {path}: {e}")
+
+        # 3. Enforce age and size quotas, oldest first
+        files = []
+        for path in self._sharded_files(folder):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        # Blobs of the contexts folder, freed with the last context referencing them
+        blob_index = self._index_blobs(folder, report)
+        blob_cutoff = min(shard_cutoff, now - 2 * TOUCH_INTERVAL_SECS)
+
+        total_size = sum(size for _, size, _ in files)
+        if blob_index is not None:
+            total_size += blob_index.size
+        max_size = quota.max_size_mb * 1024 * 1024
+        age_cutoff = now - quota.max_age_days * DAY_SECS
+        for mtime, size, path in files:
+            too_old = quota.max_age_days > 0 and mtime < age_cutoff
+            too_big = quota.max_size_mb > 0 and total_size > max_size
+            if not (too_old or too_big):
+                break
+            try:
+                path.unlink()
+                total_size -= size
+                report.deleted += 1
+                report.freed_bytes += size
+            except OSError as e:
+                report.errors.append(f"Failed to delete {path}: {e}")
+                continue
+            if blob_index is not None:
+                digests = blob_index.references.pop(path, set())
+                blob_index.counts.subtract(digests)
+                total_size -= self._delete_unreferenced_blobs(
+                    blob_index, blob_cutoff, report, digests
+                )
+
+        # 4. Blobs no context references, e.g. after contexts were deleted by hand
+        if blob_index is not None:
+            self._delete_unreferenced_blobs(blob_index, blob_cutoff, report)
+
+        self._remove_empty_dirs(folder)
+
+        for error in report.errors:
+            logger.warning(error)
+        return report
+
+    def _index_blobs(self, folder: Path, report: JanitorReport) -> Optional[_BlobIndex]:
+        blobs_dir = folder / BLOBS_DIR
+        if not blobs_dir.is_dir():
+            return None
+
+        index = _BlobIndex()
+        for path in blobs_dir.rglob("*.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            index.blobs[path.name[: -len(".gz")]] = (path, stat.st_size, stat.st_mtime)
+
+        context_files = [path for path in folder.iterdir() if path.is_file()]
+        context_files += self._sharded_files(folder)
+        for path in context_files:
+            if not path.name.endswith(CONTEXT_SUFFIXES):
+                continue
+            try:
+                opener = gzip.open if path.name.endswith(".gz") else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    messages = json.load(f).get("messages") or []
+            except (OSError, ValueError, AttributeError) as e:
+                # E.g. a save in progress, keep all blobs this sweep
+                report.errors.append(f"Failed to read blob references of {path}: {e}")
+                index.complete = False
+                continue
+            digests = {
+                message[BLOB_KEY]
+                for message in messages
+                if isinstance(message, dict) and message.get(BLOB_KEY)
+            }
+            index.references[path] = digests
+            index.counts.update(digests)
+        return index
+
+    @staticmethod
+    def _delete_unreferenced_blobs(
+        index: _BlobIndex,
+        cutoff: float,
+        report: JanitorReport,
+        digests: Optional[Set[str]] = None,
+    ) -> int:
+        """Delete the blobs (of digests, or all) no context references, returns the bytes freed.
+
+        Blobs touched after cutoff are kept, a save may be about to reference them.
+        """
+        if not index.complete:
+            return 0
+        freed = 0
+        for digest in list(index.blobs if digests is None else digests):
+            if digest not in index.blobs:
+                continue
+            path, size, mtime = index.blobs[digest]
+            if index.counts[digest] > 0 or mtime >= cutoff:
+                continue
+            try:
+                path.unlink()
+            except OSError as e:
+                report.errors.append(f"Failed to delete {path}: {e}")
+                continue
+            del index.blobs[digest]
+            report.deleted += 1
+            report.freed_bytes += size
+            freed += size
+        return freed
+
+    @staticmethod
+    def _sharded_files(folder: Path) -> List[Path]:
+        files = []
+        for shard in folder.iterdir():
+            if shard.is_dir() and SHARD_NAME_PATTERN.match(shard.name):
+                files.extend(path for path in shard.rglob("*") if path.is_file())
+        return files
+
+    @staticmethod
+    def _compress(path: Path) -> int:
+        """Gzip a file in place, keeping its mtime. Returns the bytes saved."""
+        target = path.with_name(path.name + ".gz")
+        tmp = path.with_name(path.name + ".gz.tmp")
+        stat = path.stat()
+        with path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.utime(tmp, (stat.st_atime, stat.st_mtime))
+        os.replace(tmp, target)
+        path.unlink()
+        return stat.st_size - target.stat().st_size
+
+    @staticmethod
+    def _remove_empty_dirs(folder: Path):
+        for shard in folder.iterdir():
+            if not (shard.is_dir() and SHARD_NAME_PATTERN.match(shard.name)):
+                continue
+            for directory in sorted(shard.rglob("*"), reverse=True) + [shard]:
+                if directory.is_dir() and not any(directory.iterdir()):
+                    directory.rmdir()
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from .context_manager import ConversationContextManager
+
+# The worker touches this file once its pipeline runs (and the room is joined)
+READY_FILE_ENV = "XPERTO_READY_FILE"
+POLL_INTERVAL_SECS = 0.05
+
+
+class WorkerSupervisor:
+    """Runs the bot in a worker process and restarts it if it crashes.
+
+    The supervisor picks the session ID and transcript file up front and
+    passes them to every worker, so a restarted worker rejoins the same room,
+    resumes the latest saved context of the session and appends to the same
+    transcript. Transcript lines written after the last context save are
+    added to the context as a note by the worker (see `SimpleBot`).
+
+    A worker that exits with code 0 ended normally (the meeting is over or
+    it was interrupted) and is not restarted. Crashes are restarted right
+    away, repeated crashes with a backoff, until `max_restarts` happened
+    within `restart_window_secs`. The time from the crash to the restarted
+    worker's pipeline running is logged as the recovery time.
+    """
+
+    def __init__(
+        self,
+        worker_args: List[str],
+        contexts_dir: Path,
+        session_id: str,
+        transcript_file: str,
+        max_restarts: int = 5,
+        restart_window_secs: float = 600.0,
+    ):
+        self.worker_args = worker_args
+        self.context_manager = ConversationContextManager(contexts_dir)
+        self.session_id = session_id
+        self.transcript_file = transcript_file
+        self.max_restarts = max_restarts
+        self.restart_window_secs = restart_window_secs
+
+        self.recovery_secs: List[float] = []
+        self._restarts: deque[float] = deque()
+
+    def run(self) -> int:
+        """Supervise workers until one ends normally, returns its exit code."""
+        with tempfile.TemporaryDirectory(prefix="xperto-supervisor-") as tmp_dir:
+            ready_file = Path(tmp_dir) / "ready"
+            crashed_at: Optional[float] = None
+            while True:
+                try:
+                    returncode = self._run_worker(ready_file, crashed_at)
+                except KeyboardInterrupt:
+                    return 0
+                if returncode == 0:
+                    return 0
+
+                crashed_at = time.monotonic()
+                logger.error(f"Bot worker crashed (exit code {returncode})")
+                self._restarts.append(crashed_at)
+                while crashed_at - self._restarts[0] > self.restart_window_secs:
+                    self._restarts.popleft()
+                if len(self._restarts) > self.max_restarts:
+                    logger.error(
+                        f"{len(self._restarts)} crashes within {self.restart_window_secs:.0f}s, "
+                        "giving up"
+                    )
+                    return returncode
+
+                # Restart right away once, back off if the worker keeps crashing
+                if len(self._restarts) > 1:
+                    time.sleep(min(2.0 ** (len(self._restarts) - 2), 30.0))
+
+    def _worker_command(self) -> List[str]:
+        command = [sys.executable, "-m", "xperto.runner", *self.worker_args]
+        command += ["--session-id", self.session_id, "--transcript-file", self.transcript_file]
+        # Nothing to resume if the worker crashed before the first save
+        if self.context_manager._find_context_file(self.session_id) is not None:
+            command += ["--resume", self.session_id]
+        return command
+
+    def _run_worker(self, ready_file: Path, crashed_at: Optional[float]) -> int:
+        ready_file.unlink(missing_ok=True)
+        env = dict(os.environ, **{READY_FILE_ENV: str(ready_file)})
+        process = subprocess.Popen(self._worker_command(), env=env)
+        logger.info(f"Started bot worker {process.pid} for session {self.session_id}")
+
+        ready_at: Optional[float] = None
+        try:
+            while process.poll() is None:
+                if ready_at is None and ready_file.exists():
+                    ready_at = time.monotonic()
+                    if crashed_at is not None:
+                        self.recovery_secs.append(ready_at - crashed_at)
+                        logger.info(f"Bot worker recovered in {self.recovery_secs[-1]:.2f}s")
+                time.sleep(POLL_INTERVAL_SECS)
+        except KeyboardInterrupt:
+            # The worker got the interrupt as well and shuts down on its own
+            process.wait()
+            raise
+        return process.returncode
+
+
+def mark_worker_ready():
+    """Tell the supervisor (if any) that this worker is up."""
+    ready_file = os.environ.get(READY_FILE_ENV)
+    if ready_file:
+        Path(ready_file).touch()
@@ -1,4 +1,6 @@
 import datetime
+import re
+import sys
 from pathlib import Path
 from typing import List, Optional
 
@@ -7,6 +9,15 @@ from pipecat.frames.frames import TranscriptionMessage, TranscriptionUpdateFrame
 from pipecat.processors.transcript_processor import TranscriptProcessor
 from pipecat.utils.time import time_now_iso8601
 
+# "[<timestamp>] <role> <user_id>: <content>", as written by `save_message`
+MESSAGE_LINE_PATTERN = re.compile(
+    r"^(?:\[[^\]]*\] )?(?P<role>user|assistant) \S*: (?P<content>.*)$"
+)
+
+RECOVERY_NOTE = """The session was restarted after a crash. This was said between the last
+saved state and the crash, not all of it was addressed to you:
+{lines}"""
+
 
 class TranscriptHandler:
     """Handles real-time transcript processing and output.
@@ -23,19 +34,23 @@ class TranscriptHandler:
         self,
         output_folder: Optional[Path] = Path("./transcripts"),
         output_name: str = "bot",
+        file_name: Optional[str] = None,
     ):
         """Initialize handler with optional file output.
 
         Args:
             output_file: Path to output file. If None, outputs to log only.
+            file_name: Append to this file instead of a new timestamped one.
         """
         self.messages: List[TranscriptionMessage] = []
         self.output_file: Optional[Path] = None
 
         if output_folder is not None:
             output_folder.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.output_file = output_folder / f"{timestamp}_{output_name}.log"
+            if file_name is None:
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                file_name = f"{timestamp}_{output_name}.log"
+            self.output_file = output_folder / file_name
             logger.info(f"Transcript will be saved to: {self.output_file.as_posix()}")
 
     async def handle_participant_joined(self, participant_id: str):
@@ -90,6 +105,53 @@ class TranscriptHandler:
             except Exception as e:
                 logger.error(f"Error saving transcript message to file: {e}")
 
+    def read_messages(self, offset: int = 0) -> List[dict]:
+        """Messages (role, content) of the transcript lines in the output file after offset.
+
+        Used to recover what was said after the last context save of a
+        crashed session, whose transcript this handler appends to.
+        """
+        if not self.output_file or not self.output_file.exists():
+            return []
+        with self.output_file.open("rb") as f:
+            f.seek(offset)
+            text = f.read().decode("utf-8", errors="replace")
+
+        messages = []
+        for line in text.splitlines():
+            match = MESSAGE_LINE_PATTERN.match(line)
+            if match:
+                messages.append({"role": match.group("role"), "content": match.group("content")})
+        return messages
+
+    @staticmethod
+    def recovery_note(messages: List[dict]) -> dict:
+        """A system message with the recovered transcript messages.
+
+        Not everything in the transcript was in the live context (e.g. speech
+        the wake check discarded), so the messages aren't replayed as turns.
+        """
+        lines = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        return {"role": "system", "content": RECOVERY_NOTE.format(lines=lines)}
+
+    def trim_messages(self, max_bytes: int) -> int:
+        """Drop the oldest in-memory messages until they fit into max_bytes.
+
+        Messages are written to the output file as they arrive, so trimming
+        the in-memory copy loses nothing.
+
+        Returns:
+            Approximate number of bytes freed.
+        """
+        sizes = [sys.getsizeof(msg.content) + sys.getsizeof(msg) for msg in self.messages]
+        total = sum(sizes)
+        drop = 0
+        while drop < len(sizes) and total > max_bytes:
+            total -= sizes[drop]
+            drop += 1
+        del self.messages[:drop]
+        return sum(sizes[:drop])
+
     async def on_transcript_update(
         self, processor: TranscriptProcessor, frame: TranscriptionUpdateFrame
     ):
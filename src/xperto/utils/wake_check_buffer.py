@@ -5,50 +5,183 @@
 #
 
 import re
+import sys
 import time
+from collections import deque
 from enum import Enum
+from typing import Optional
 
 from loguru import logger
 
-from pipecat.frames.frames import ErrorFrame, Frame, TranscriptionFrame
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    ErrorFrame,
+    Frame,
+    TranscriptionFrame,
+)
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 
+# Matches the Speechmatics `speaker_active_format`/`speaker_passive_format` output,
+# e.g. "<S1>Hello</S1>" or "<PASSIVE><S2>Hello</S2></PASSIVE>".
+SPEAKER_TAG_PATTERN = re.compile(
+    r"^\s*(?P<passive><PASSIVE>)?\s*<(?P<speaker>[^<>/]+)>(?P<text>.*)</(?P=speaker)>",
+    re.DOTALL,
+)
+
+# Any speaker or passive tag, to get the plain text of a diarized transcription
+SPEAKER_TAGS_PATTERN = re.compile(r"</?[^<>]+>")
+
+SHARED_SPEAKER = ""
+
+
+def parse_speaker_tag(frame: TranscriptionFrame) -> tuple[str, bool]:
+    """Return the (speaker_id, is_passive) of a diarized transcription frame.
+
+    Falls back to the frame's `user_id` if the text carries no speaker tags.
+    """
+    text = frame.text
+    if text.startswith("<"):
+        match = SPEAKER_TAG_PATTERN.match(text)
+        if match:
+            return match.group("speaker"), match.group("passive") is not None
+    return frame.user_id or SHARED_SPEAKER, False
+
+
+def compile_wake_patterns(wake_phrases: list[str]) -> list[re.Pattern]:
+    """Case-insensitive whole-word patterns of the wake phrases, any spacing between words."""
+    patterns = []
+    for name in wake_phrases:
+        pattern = re.compile(
+            r"\b" + r"\s*".join(re.escape(word) for word in name.split()) + r"\b",
+            re.IGNORECASE,
+        )
+        patterns.append(pattern)
+    return patterns
+
 
 class WakeCheckBuffer(FrameProcessor):
     """This filter looks for wake phrases in transcription frames from any participant and maintains
     a single shared wake state. Frames are buffered until a wake phrase is detected, then all
     buffered frames are released in order. Once awakened, subsequent frames are passed through
     immediately until the keepalive timeout expires.
+
+    In per-speaker mode, the speaker of each frame is taken from its diarization tags and every
+    speaker gets their own wake state and bounded buffer, so only the speaker who said the wake
+    phrase is forwarded. Text from passive (background) speakers is dropped.
     """
 
+    DEFAULT_SPEAKER_BUFFER_FRAMES = 50
+
     class WakeState(Enum):
         IDLE = 1
         AWAKE = 2
 
-    def __init__(self, wake_phrases: list[str], keepalive_timeout_secs: float = 3):
+    class SpeakerState:
+        """Wake state and frame buffer of a single speaker (or of everyone, if shared)."""
+
+        def __init__(self, wake_timer: float, max_buffered_frames: Optional[int]):
+            self.state = WakeCheckBuffer.WakeState.AWAKE
+            self.wake_timer = wake_timer
+            self.frame_buffer: deque[TranscriptionFrame] = deque(maxlen=max_buffered_frames)
+            self.combined_text = ""
+
+        def clear(self):
+            self.frame_buffer.clear()
+            self.combined_text = ""
+
+    def __init__(
+        self,
+        wake_phrases: list[str],
+        keepalive_timeout_secs: float = 3,
+        per_speaker: bool = False,
+        max_buffered_frames: Optional[int] = None,
+    ):
         super().__init__()
-        self._state = WakeCheckBuffer.WakeState.AWAKE
-        self._wake_timer = time.time()
-        self._frame_buffer = []
-        self._combined_text = ""
+        self._per_speaker = per_speaker
+        if per_speaker and max_buffered_frames is None:
+            max_buffered_frames = WakeCheckBuffer.DEFAULT_SPEAKER_BUFFER_FRAMES
+        self._max_buffered_frames = max_buffered_frames
+        # Everyone starts AWAKE so the first reply to the intro gets through
+        self._started_at = time.time()
+        self._speakers: dict[str, WakeCheckBuffer.SpeakerState] = {}
         self._keepalive_timeout_secs = keepalive_timeout_secs
-        self._wake_patterns = []
-        for name in wake_phrases:
-            pattern = re.compile(
-                r"\b" + r"\s*".join(re.escape(word) for word in name.split()) + r"\b",
-                re.IGNORECASE,
-            )
-            self._wake_patterns.append(pattern)
+        self._wake_patterns = compile_wake_patterns(wake_phrases)
+
+        self.frames_forwarded = 0
+        self.frames_discarded = 0
+        self.frames_dropped_passive = 0
+        self.wakeups = 0
+
+    def update_wake_settings(self, wake_phrases: list[str], keepalive_timeout_secs: float):
+        """Swap in new wake phrases and keepalive timeout, e.g. after a config reload."""
+        self._wake_patterns = compile_wake_patterns(wake_phrases)
+        self._keepalive_timeout_secs = keepalive_timeout_secs
+
+    @property
+    def stats(self) -> dict:
+        """Counters showing how many transcriptions were kept away from the LLM."""
+        return {
+            "per_speaker": self._per_speaker,
+            "speakers": len(self._speakers),
+            "wakeups": self.wakeups,
+            "frames_forwarded": self.frames_forwarded,
+            "frames_discarded": self.frames_discarded,
+            "frames_dropped_passive": self.frames_dropped_passive,
+        }
+
+    def buffered_bytes(self) -> int:
+        """Approximate memory held by the buffered frames of all speakers."""
+        return sum(
+            sum(sys.getsizeof(frame.text) for frame in speaker.frame_buffer)
+            + sys.getsizeof(speaker.combined_text)
+            for speaker in self._speakers.values()
+        )
+
+    def trim_buffers(self, max_bytes: int) -> int:
+        """Discard the oldest buffered frames, longest buffer first, until they fit.
+
+        Returns:
+            Approximate number of bytes freed.
+        """
+        before = self.buffered_bytes()
+        size = before
+        while size > max_bytes and self._speakers:
+            speaker = max(self._speakers.values(), key=lambda s: len(s.frame_buffer))
+            if not speaker.frame_buffer:
+                break
+            speaker.frame_buffer.popleft()
+            self.frames_discarded += 1
+            speaker.combined_text = " ".join(f.text for f in speaker.frame_buffer)
+            size = self.buffered_bytes()
+        return before - size
+
+    def _get_speaker_state(self, speaker_id: str) -> "WakeCheckBuffer.SpeakerState":
+        speaker = self._speakers.get(speaker_id)
+        if speaker is None:
+            speaker = WakeCheckBuffer.SpeakerState(self._started_at, self._max_buffered_frames)
+            self._speakers[speaker_id] = speaker
+        return speaker
 
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
 
         try:
             if isinstance(frame, TranscriptionFrame):
+                if self._per_speaker:
+                    speaker_id, is_passive = parse_speaker_tag(frame)
+                    if is_passive:
+                        logger.debug(f"Dropping passive speaker {speaker_id}: {frame}")
+                        self.frames_dropped_passive += 1
+                        return
+                else:
+                    speaker_id = SHARED_SPEAKER
+                speaker = self._get_speaker_state(speaker_id)
+
                 # If we have been AWAKE within the last keepalive_timeout seconds, pass
                 # the frame through immediately
-                if self._state == WakeCheckBuffer.WakeState.AWAKE:
-                    if time.time() - self._wake_timer < self._keepalive_timeout_secs:
+                if speaker.state == WakeCheckBuffer.WakeState.AWAKE:
+                    if time.time() - speaker.wake_timer < self._keepalive_timeout_secs:
                         logger.debug(
                             f"Wake phrase keepalive timeout has not expired. Pushing {frame}"
                         )
@@ -60,43 +193,53 @@ class WakeCheckBuffer(FrameProcessor):
                         #       wake word (or even better bot response)?
                         # NOTE: Leaving it as is to not screw up the Connectival demo ...
 
-                        self._wake_timer = time.time()
+                        speaker.wake_timer = time.time()
+                        self.frames_forwarded += 1
                         await self.push_frame(frame)
                         return
                     else:
                         logger.debug(
-                            "Wake phrase keepalive timeout expired. Setting to IDLE"
+                            f"Wake phrase keepalive timeout expired. Setting {speaker_id or 'all'} to IDLE"
                         )
-                        self._state = WakeCheckBuffer.WakeState.IDLE
-                        self._frame_buffer.clear()
-                        self._combined_text = ""
-
-                # Buffer the frame while IDLE
-                self._frame_buffer.append(frame)
+                        speaker.state = WakeCheckBuffer.WakeState.IDLE
+                        self.frames_discarded += len(speaker.frame_buffer)
+                        speaker.clear()
 
-                # Incrementally add new frame text to combined text
-                if self._combined_text:
-                    self._combined_text += " " + frame.text
+                # Buffer the frame while IDLE, dropping the oldest one if the buffer is full
+                if len(speaker.frame_buffer) == speaker.frame_buffer.maxlen:
+                    self.frames_discarded += 1
+                    speaker.frame_buffer.append(frame)
+                    speaker.combined_text = " ".join(f.text for f in speaker.frame_buffer)
                 else:
-                    self._combined_text = frame.text
+                    speaker.frame_buffer.append(frame)
+
+                    # Incrementally add new frame text to combined text
+                    if speaker.combined_text:
+                        speaker.combined_text += " " + frame.text
+                    else:
+                        speaker.combined_text = frame.text
+
                 # Check combined text for wake phrases
                 for pattern in self._wake_patterns:
-                    match = pattern.search(self._combined_text)
+                    match = pattern.search(speaker.combined_text)
                     if match:
                         logger.debug(f"Wake phrase triggered: {match.group()}")
                         # Found the wake phrase, set to AWAKE and release all buffered frames
-                        self._state = WakeCheckBuffer.WakeState.AWAKE
-                        self._wake_timer = time.time()
+                        speaker.state = WakeCheckBuffer.WakeState.AWAKE
+                        speaker.wake_timer = time.time()
+                        self.wakeups += 1
 
                         # Push all buffered frames in order
-                        for buffered_frame in self._frame_buffer:
+                        for buffered_frame in speaker.frame_buffer:
+                            self.frames_forwarded += 1
                             await self.push_frame(buffered_frame)
 
                         # Clear the buffer and combined text
-                        self._frame_buffer.clear()
-                        self._combined_text = ""
+                        speaker.clear()
                         return
             else:
+                if isinstance(frame, (EndFrame, CancelFrame)):
+                    logger.info(f"Wake check stats: {self.stats}")
                 await self.push_frame(frame, direction)
         except Exception as e:
             error_msg = f"Error in wake word filter: {e}"
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+# Set for pool workers, they report to the pool as JSON lines on stdout
+POOL_WORKER_ENV = "XPERTO_POOL_WORKER"
+# A join request is answered once the bot joined the room (or failed to)
+JOIN_TIMEOUT_SECS = 60.0
+# Delay before replacing a worker that died while warming up
+RESPAWN_DELAY_SECS = 2.0
+
+
+class _PoolWorker:
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.dispatched = False
+        self.events: asyncio.Queue[dict] = asyncio.Queue()
+
+
+class WarmWorkerPool:
+    """Keeps `size` bot workers warmed up and hands join requests to them.
+
+    Each worker runs `xperto.runner --pool-worker`: it imports pipecat and the
+    services, loads the config and the VAD/turn models and creates the
+    services, then waits for a join request. The pool listens for requests
+    (`{"room_url": ..., "config": ...}` as a JSON line) on a local Unix
+    socket, passes each to an idle worker, which runs `SimpleBot.run` in the
+    room, and starts a replacement worker in the background. The reply is
+    sent once the bot joined the room, with the join latency measured from
+    the request. The bot greets when the first participant joins, the time
+    from the request to the greeting is logged and kept in the stats.
+
+    Workers are started ahead of time rather than forked from a warm parent,
+    the ONNX runtime sessions and service clients aren't fork-safe.
+    """
+
+    def __init__(self, worker_args: List[str], socket_path: Path, size: int = 2):
+        self.worker_args = worker_args
+        self.socket_path = Path(socket_path)
+        self.size = max(1, size)
+
+        self.join_latencies: List[float] = []
+        self.greeting_latencies: List[float] = []
+        self._workers: List[_PoolWorker] = []
+        self._ready_changed: Optional[asyncio.Condition] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._stopping = False
+
+    @property
+    def stats(self) -> dict:
+        def median_ms(latencies: List[float]) -> Optional[int]:
+            return round(statistics.median(latencies) * 1000) if latencies else None
+
+        return {
+            "joins": len(self.join_latencies),
+            "median_join_latency_ms": median_ms(self.join_latencies),
+            "max_join_latency_ms": round(max(self.join_latencies) * 1000)
+            if self.join_latencies
+            else None,
+            "greetings": len(self.greeting_latencies),
+            "median_greeting_latency_ms": median_ms(self.greeting_latencies),
+        }
+
+    async def serve(self):
+        """Run the pool until cancelled (Ctrl+C)."""
+        self._ready_changed = asyncio.Condition()
+        for _ in range(self.size):
+            self._spawn()
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle_client, path=str(self.socket_path))
+        logger.info(f"Warm worker pool of {self.size} listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._stopping = True
+            self.socket_path.unlink(missing_ok=True)
+            # Workers in a meeting keep running until it ends
+            for worker in self._workers:
+                if not worker.dispatched and worker.process.returncode is None:
+                    worker.process.terminate()
+            logger.info(f"Warm worker pool stats: {self.stats}")
+
+    def _spawn(self, delay_secs: float = 0.0):
+        self._create_task(self._start_worker(delay_secs))
+
+    def _create_task(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _worker_command(self) -> List[str]:
+        return [sys.executable, "-m", "xperto.runner", *self.worker_args, "--pool-worker"]
+
+    async def _start_worker(self, delay_secs: float):
+        if delay_secs:
+            await asyncio.sleep(delay_secs)
+        if self._stopping:
+            return
+        process = await asyncio.create_subprocess_exec(
+            *self._worker_command(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=dict(os.environ, **{POOL_WORKER_ENV: "1"}),
+        )
+        worker = _PoolWorker(process)
+        self._workers.append(worker)
+        await self._read_events(worker)
+
+    async def _read_events(self, worker: _PoolWorker):
+        while line := await worker.process.stdout.readline():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Something else printed to stdout
+                continue
+            if event.get("event") == "ready":
+                logger.info(
+                    f"Pool worker {worker.process.pid} warmed up in "
+                    f"{time.monotonic() - worker.started_at:.1f}s"
+                )
+                worker.ready = True
+                async with self._ready_changed:
+                    self._ready_changed.notify_all()
+            else:
+                await worker.events.put(event)
+
+        returncode = await worker.process.wait()
+        self._workers.remove(worker)
+        await worker.events.put({"event": "exited", "returncode": returncode})
+        if worker.dispatched:
+            logger.info(f"Pool worker {worker.process.pid} finished (exit code {returncode})")
+        elif not self._stopping:
+            logger.error(
+                f"Pool worker {worker.process.pid} exited while idle (exit code {returncode})"
+            )
+            self._spawn(RESPAWN_DELAY_SECS)
+
+    async def _take_worker(self) -> _PoolWorker:
+        def idle_worker() -> Optional[_PoolWorker]:
+            for worker in self._workers:
+                if worker.ready and not worker.dispatched:
+                    return worker
+            return None
+
+        async with self._ready_changed:
+            worker = await self._ready_changed.wait_for(idle_worker)
+            worker.dispatched = True
+        return worker
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(await reader.readline())
+            request.setdefault("requested_at", time.time())
+            response = await self._join(request)
+        except Exception as e:
+            response = {"error": str(e)}
+        writer.write(json.dumps(response).encode() + b"\n")
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _join(self, request: dict) -> dict:
+        worker = await self._take_worker()
+        # Warm up a replacement while this one joins
+        self._spawn()
+
+        worker.process.stdin.write(json.dumps(request).encode() + b"\n")
+        await worker.process.stdin.drain()
+        response = {"worker": worker.process.pid}
+        try:
+            async with asyncio.timeout(JOIN_TIMEOUT_SECS):
+                while True:
+                    event = await worker.events.get()
+                    match event.get("event"):
+                        case "joined":
+                            response["session_id"] = event.get("session_id")
+                            response["join_latency_secs"] = event.get("latency_secs")
+                            self.join_latencies.append(event.get("latency_secs", 0.0))
+                            self._create_task(self._wait_for_greeting(worker))
+                            return response
+                        case "exited":
+                            response["error"] = f"worker exited ({event.get('returncode')})"
+                            return response
+        except TimeoutError:
+            response["error"] = f"not joined within {JOIN_TIMEOUT_SECS:.0f}s"
+            return response
+
+    async def _wait_for_greeting(self, worker: _PoolWorker):
+        """The bot greets once somebody is in the room, which may take a while."""
+        while True:
+            event = await worker.events.get()
+            match event.get("event"):
+                case "greeted":
+                    latency_secs = event.get("latency_secs", 0.0)
+                    self.greeting_latencies.append(latency_secs)
+                    logger.info(
+                        f"Pool worker {worker.process.pid} greeted "
+                        f"{latency_secs * 1000:.0f}ms after the join request"
+                    )
+                    return
+                case "exited":
+                    return
+
+
+def request_join(socket_path: Path, room_url: Optional[str], config: Optional[str]) -> dict:
+    """Ask the pool at `socket_path` to join `room_url`, returns its reply."""
+
+    async def send() -> dict:
+        reader, writer = await asyncio.open_unix_connection(str(socket_path))
+        request = {"room_url": room_url, "config": config, "requested_at": time.time()}
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        try:
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    return asyncio.run(send())
+
+
+async def wait_for_join_request() -> dict:
+    """Tell the pool this worker is warm, then wait for its join request."""
+    report_pool_event("ready")
+    line = await asyncio.to_thread(sys.stdin.readline)
+    if not line:
+        raise EOFError("Worker pool closed")
+    return json.loads(line)
+
+
+def report_pool_event(event: str, **fields):
+    """Report to the pool (if this is a pool worker)."""
+    if os.environ.get(POOL_WORKER_ENV):
+        print(json.dumps({"event": event, **fields}), flush=True)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Optional
+
+from aiohttp import web
+
+
+class StubLLMServer:
+    """Local OpenAI-compatible chat completions server for tests.
+
+    Streams `text` in `chunks` parts, the first one after
+    `first_chunk_delay_secs`. Answers with `status` instead if it isn't 200,
+    and with a 429 once more than `max_requests_per_sec` requests arrived
+    within a second.
+    """
+
+    def __init__(
+        self,
+        text: str = "hello",
+        first_chunk_delay_secs: float = 0.0,
+        status: int = 200,
+        chunks: int = 5,
+        chunk_interval_secs: float = 0.02,
+        max_requests_per_sec: int = 0,
+    ):
+        self.text = text
+        self.first_chunk_delay_secs = first_chunk_delay_secs
+        self.status = status
+        self.chunks = chunks
+        self.chunk_interval_secs = chunk_interval_secs
+        self.max_requests_per_sec = max_requests_per_sec
+
+        # (arrival time.monotonic(), request body)
+        self.requests: list[tuple[float, dict]] = []
+        self.finished = 0
+        self.aborted = 0
+        self.rejected = 0
+        self._arrivals: deque[float] = deque()
+        self._runner: Optional[web.AppRunner] = None
+        self._port = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._port}/v1"
+
+    async def __aenter__(self) -> "StubLLMServer":
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        app.router.add_get("/v1/models", self._handle_models)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self._port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": []})
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        now = time.monotonic()
+        body = await request.json()
+        self.requests.append((now, body))
+
+        while self._arrivals and now - self._arrivals[0] >= 1.0:
+            self._arrivals.popleft()
+        if self.max_requests_per_sec and len(self._arrivals) >= self.max_requests_per_sec:
+            self.rejected += 1
+            retry_after = 1.0 - (now - self._arrivals[0])
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status=429,
+                headers={"retry-after-ms": str(int(retry_after * 1000) + 1)},
+            )
+        self._arrivals.append(now)
+
+        if self.status != 200:
+            return web.json_response(
+                {"error": {"message": f"Stub error {self.status}", "type": "server_error"}},
+                status=self.status,
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            await asyncio.sleep(self.first_chunk_delay_secs)
+            size = -(-len(self.text) // self.chunks)
+            for i in range(0, len(self.text), size):
+                await response.write(self._event(body, {"content": self.text[i : i + size]}))
+                await asyncio.sleep(self.chunk_interval_secs)
+            await response.write(self._event(body, {}, finish_reason="stop"))
+            await response.write(b"data: [DONE]\n\n")
+        except (ConnectionError, RuntimeError):
+            # The client closed the stream
+            self.aborted += 1
+            return response
+        self.finished += 1
+        return response
+
+    @staticmethod
+    def _event(body: dict, delta: dict, finish_reason: Optional[str] = None) -> bytes:
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n".encode()
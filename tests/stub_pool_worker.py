@@ -0,0 +1,27 @@
+"""Stands in for `xperto.runner --pool-worker` in the worker pool tests.
+
+Reports ready, takes one join request and reports joined right away. Greets
+once the participant file exists in STUB_POOL_DIR, runs until the stop file
+exists.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def report(event: str, **fields):
+    print(json.dumps({"event": event, **fields}), flush=True)
+
+
+state_dir = Path(os.environ["STUB_POOL_DIR"])
+report("ready")
+request = json.loads(sys.stdin.readline())
+report("joined", latency_secs=time.time() - request["requested_at"], session_id="stub-session")
+while not (state_dir / "participant").exists():
+    time.sleep(0.02)
+report("greeted", latency_secs=time.time() - request["requested_at"])
+while not (state_dir / "stop").exists():
+    time.sleep(0.02)
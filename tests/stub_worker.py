@@ -0,0 +1,24 @@
+"""Stands in for `xperto.runner` in the supervisor tests.
+
+Records its arguments, starts up for STUB_WORKER_STARTUP_SECS, tells the
+supervisor it's ready and runs until the stop file exists (exit code 0), or
+crashes right away with STUB_WORKER_CRASH set.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+state_dir = Path(os.environ["STUB_WORKER_DIR"])
+with (state_dir / "workers.jsonl").open("a") as f:
+    f.write(json.dumps({"pid": os.getpid(), "args": sys.argv[1:]}) + "\n")
+if os.environ.get("STUB_WORKER_CRASH"):
+    sys.exit(1)
+
+time.sleep(float(os.environ.get("STUB_WORKER_STARTUP_SECS", "0")))
+# As `mark_worker_ready` does, without importing pipecat
+Path(os.environ["XPERTO_READY_FILE"]).touch()
+while not (state_dir / "stop").exists():
+    time.sleep(0.02)
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+from pipecat.frames.frames import (
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.tests.utils import run_test
+
+from xperto.utils.answer_cache import AnswerCache, MinHasher, normalize_question
+
+QUESTION = "What is the budget for the next quarter?"
+ANSWER = "The budget is 40k."
+TOOLS = [{"type": "function", "function": {"name": "kb_search", "parameters": {}}}]
+
+
+def make_context(question: str, system: str = "You are Xperto.", tools=TOOLS):
+    return OpenAILLMContext(
+        [{"role": "system", "content": system}, {"role": "user", "content": question}],
+        tools=tools,
+    )
+
+
+def warm_cache(**kwargs) -> AnswerCache:
+    cache = AnswerCache(**kwargs)
+    assert cache.find(make_context(QUESTION)) is None
+    cache.add(ANSWER)
+    return cache
+
+
+def test_minhash_similarity():
+    hasher = MinHasher()
+
+    def similarity(a: str, b: str) -> float:
+        return MinHasher.similarity(
+            hasher.signature(normalize_question(a)), hasher.signature(normalize_question(b))
+        )
+
+    assert similarity(QUESTION, f"<S1>{QUESTION.lower()}</S1>") == 1.0
+    assert similarity(QUESTION, "What is the budget for next quarter?") >= 0.8
+    assert similarity(QUESTION, "Who is presenting at the offsite tomorrow?") < 0.3
+
+
+def test_near_duplicate_question_hits():
+    cache = warm_cache()
+    entry = cache.find(make_context("<S2>What's the budget for the next quarter</S2>"))
+    assert entry is not None and entry.answer == ANSWER
+    assert cache.find(make_context("Who is presenting at the offsite tomorrow?")) is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+
+
+def test_changed_system_prompt_or_tools_miss():
+    cache = warm_cache()
+    assert cache.find(make_context(QUESTION, system="You are Experte.")) is None
+    assert cache.find(make_context(QUESTION, tools=[])) is None
+    assert cache.find(make_context(QUESTION)) is not None
+
+
+def test_entries_expire_after_the_ttl():
+    cache = warm_cache(ttl_secs=0.05)
+    time.sleep(0.1)
+    assert cache.find(make_context(QUESTION)) is None
+    assert cache.stats["entries"] == 0
+
+
+def test_hit_answers_without_the_llm():
+    cache = warm_cache()
+    down, _ = asyncio.run(
+        run_test(
+            cache.lookup(),
+            frames_to_send=[OpenAILLMContextFrame(make_context(QUESTION))],
+            # The context frame isn't passed on, so it never reaches the LLM
+            expected_down_frames=[LLMFullResponseStartFrame, LLMTextFrame, LLMFullResponseEndFrame],
+        )
+    )
+    assert down[1].text == ANSWER
+
+    asyncio.run(
+        run_test(
+            cache.lookup(),
+            frames_to_send=[OpenAILLMContextFrame(make_context("Who is presenting tomorrow?"))],
+            expected_down_frames=[OpenAILLMContextFrame],
+        )
+    )
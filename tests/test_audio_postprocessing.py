@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from xperto.utils.audio_postprocessing import (
+    PEAK_CEILING_DBFS,
+    gated_loudness,
+    normalize,
+    postprocess_tracks,
+    read_wav,
+    write_wav,
+)
+
+SAMPLE_RATE = 16000
+
+
+def tone(freq: float, secs: float, dbfs: float) -> np.ndarray:
+    t = np.arange(int(secs * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    # A sine's mean square is half its squared amplitude
+    amplitude = np.sqrt(2.0) * 10.0 ** (dbfs / 20.0)
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def level_at(samples: np.ndarray, freq: float) -> float:
+    """Amplitude of one frequency in the samples, which must hold whole periods of it."""
+    spectrum = np.abs(np.fft.rfft(samples)) * 2 / len(samples)
+    return float(spectrum[round(freq * len(samples) / SAMPLE_RATE)])
+
+
+def test_normalize_reaches_the_target_loudness():
+    quiet = tone(440, 2.0, -40.0)
+    assert gated_loudness(quiet, SAMPLE_RATE) == pytest.approx(-40.0, abs=0.1)
+    assert gated_loudness(normalize(quiet, SAMPLE_RATE, -20.0), SAMPLE_RATE) == pytest.approx(
+        -20.0, abs=0.1
+    )
+
+
+def test_normalize_keeps_the_peak_under_the_ceiling():
+    # A single click in silence would need a huge gain to reach the target
+    click = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    click[100:110] = 0.1
+    normalized = normalize(click, SAMPLE_RATE, -3.0)
+    assert np.max(np.abs(normalized)) == pytest.approx(10.0 ** (PEAK_CEILING_DBFS / 20.0))
+
+
+def test_silence_is_left_alone():
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    assert gated_loudness(silence, SAMPLE_RATE) is None
+    assert normalize(silence, SAMPLE_RATE, -20.0) is silence
+
+
+def test_tracks_are_mixed_to_the_target_with_the_user_ducked(tmp_path):
+    user_path, bot_path, mix_path = (tmp_path / f"{n}.wav" for n in ("user", "bot", "mix"))
+    # The user talks all along, the bot only in the second half
+    write_wav(user_path, tone(440, 4.0, -35.0), SAMPLE_RATE)
+    bot = np.concatenate([np.zeros(2 * SAMPLE_RATE, dtype=np.float32), tone(1000, 1.5, -25.0)])
+    write_wav(bot_path, bot, SAMPLE_RATE)
+
+    stats = postprocess_tracks(user_path, bot_path, mix_path, target_dbfs=-20.0, duck_db=-6.0)
+
+    mix, sample_rate = read_wav(mix_path)
+    # The shorter track is padded, the mix is mono
+    assert sample_rate == SAMPLE_RATE and len(mix) == 4 * SAMPLE_RATE
+    assert stats["duration_secs"] == 4.0
+    assert stats["user_loudness_dbfs"] == pytest.approx(-35.0, abs=0.1)
+    assert stats["mix_loudness_dbfs"] == pytest.approx(-20.0, abs=0.2)
+    assert gated_loudness(mix, SAMPLE_RATE) == pytest.approx(-20.0, abs=0.2)
+
+    # Away from the ramps, the user is 6 dB quieter while the bot talks
+    alone = level_at(mix[: int(1.5 * SAMPLE_RATE)], 440)
+    ducked = level_at(mix[int(2.5 * SAMPLE_RATE) : int(3.5 * SAMPLE_RATE)], 440)
+    assert 20.0 * np.log10(ducked / alone) == pytest.approx(-6.0, abs=0.2)
+
+
+def test_sample_rate_mismatch_is_rejected(tmp_path):
+    write_wav(tmp_path / "user.wav", tone(440, 1.0, -30.0), SAMPLE_RATE)
+    write_wav(tmp_path / "bot.wav", tone(440, 1.0, -30.0), 24000)
+    with pytest.raises(ValueError):
+        postprocess_tracks(tmp_path / "user.wav", tmp_path / "bot.wav", tmp_path / "mix.wav")
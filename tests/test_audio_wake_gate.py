@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import numpy as np
+from pipecat.frames.frames import (
+    Frame,
+    InputAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.tests.utils import SleepFrame, run_test
+
+from xperto.utils.audio_wake_gate import AudioWakeGate
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms
+
+
+class SlowSpotter:
+    """Hears the name in any window with speech (non-zero samples), slowly."""
+
+    def __init__(self, spot_secs: float):
+        self.spot_secs = spot_secs
+
+    def spot(self, audio: bytes, sample_rate: int):
+        time.sleep(self.spot_secs)
+        return "Xperto" if np.frombuffer(audio, dtype=np.int16).any() else None
+
+
+class AudioRecorder(FrameProcessor):
+    """Stands in for the STT service, records the audio it gets."""
+
+    def __init__(self):
+        super().__init__()
+        self.frames: list[InputAudioRawFrame] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, InputAudioRawFrame):
+            self.frames.append(frame)
+        await self.push_frame(frame, direction)
+
+
+def audio_frames(secs: float, amplitude: int = 0) -> list[Frame]:
+    samples = np.full(FRAME_SAMPLES, amplitude, dtype=np.int16).tobytes()
+    return [
+        InputAudioRawFrame(audio=samples, sample_rate=SAMPLE_RATE, num_channels=1)
+        for _ in range(int(secs / 0.02))
+    ]
+
+
+def run_gate(spot_secs: float, silence_after_secs: float) -> list[InputAudioRawFrame]:
+    gate = AudioWakeGate(
+        SlowSpotter(spot_secs),
+        keepalive_timeout_secs=0.0,
+        preroll_secs=0.5,
+        spot_interval_secs=60.0,
+    )
+    stt = AudioRecorder()
+    frames = [
+        # Closes the gate, nobody spoke for keepalive_timeout_secs
+        *audio_frames(1.0),
+        SleepFrame(0.1),
+        UserStartedSpeakingFrame(),
+        SleepFrame(0.1),
+        *audio_frames(1.0, amplitude=1000),
+        SleepFrame(0.1),
+        UserStoppedSpeakingFrame(),
+        SleepFrame(0.1),
+        # Arrives while the end of the utterance is spotted
+        *audio_frames(silence_after_secs),
+        SleepFrame(spot_secs + 0.3),
+        *audio_frames(0.1),
+        SleepFrame(0.1),
+    ]
+    asyncio.run(run_test(Pipeline([gate, stt, gate.bypass]), frames_to_send=frames))
+    return stt.frames
+
+
+def speech_secs(frames: list[InputAudioRawFrame]) -> float:
+    return sum(0.02 for frame in frames if np.frombuffer(frame.audio, dtype=np.int16).any())
+
+
+def test_wake_replays_utterance_after_slow_spot():
+    # More audio than the pre-roll arrives before the spot returns
+    frames = run_gate(spot_secs=0.3, silence_after_secs=2.0)
+    assert speech_secs(frames) >= 0.98
+
+
+def test_no_wake_without_name():
+    gate = AudioWakeGate(SlowSpotter(0.0), keepalive_timeout_secs=0.0, preroll_secs=0.5)
+    stt = AudioRecorder()
+    frames = [
+        *audio_frames(1.0),
+        SleepFrame(0.1),
+        UserStartedSpeakingFrame(),
+        SleepFrame(0.1),
+        *audio_frames(0.5),
+        SleepFrame(0.1),
+        UserStoppedSpeakingFrame(),
+        SleepFrame(0.2),
+        *audio_frames(0.5),
+        SleepFrame(0.1),
+    ]
+    asyncio.run(run_test(Pipeline([gate, stt, gate.bypass]), frames_to_send=frames))
+    assert gate.wakeups == 0
+    # Only the first frame got through before the gate closed
+    assert len(stt.frames) <= 1
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.config import PathsConfig
+from xperto.utils.batch_summarizer import (
+    LEGACY_CHECKPOINT_NAME,
+    SUMMARY_SUFFIX,
+    BatchSummarizer,
+    StubSummarizer,
+)
+from xperto.utils.context_manager import ConversationContextManager
+
+SESSIONS = ["20260101_120000_test", "20260102_120000_test", "20260103_120000_test"]
+
+
+class CountingSummarizer(StubSummarizer):
+    def __init__(self, block_after: int = 0):
+        super().__init__(delay_secs=0.0)
+        self.texts: list[str] = []
+        self.block_after = block_after
+        self.blocked = asyncio.Event()
+
+    async def summarize(self, text: str) -> dict:
+        if self.block_after and len(self.texts) >= self.block_after:
+            # Stands for the process being stopped in the middle of a request
+            self.blocked.set()
+            await asyncio.Event().wait()
+        self.texts.append(text)
+        return await super().summarize(text)
+
+
+@pytest.fixture
+def paths(tmp_path) -> PathsConfig:
+    return PathsConfig(
+        recordings=tmp_path / "recordings",
+        transcripts=tmp_path / "transcripts",
+        contexts=tmp_path / "contexts",
+    )
+
+
+def save_sessions(paths: PathsConfig, sessions=SESSIONS, transcript_files=None):
+    manager = ConversationContextManager(paths.contexts)
+    for session_id in sessions:
+        messages = [
+            {"role": "system", "content": "You are Xperto."},
+            {"role": "user", "content": f"Let's plan {session_id}."},
+            {"role": "assistant", "content": "Sure."},
+        ]
+        manager.save_context(
+            OpenAILLMContext(messages=messages),
+            session_id,
+            transcript_files=(transcript_files or {}).get(session_id),
+        )
+    return manager
+
+
+def summarize(paths: PathsConfig, summarizer, concurrency: int = 2):
+    return asyncio.run(BatchSummarizer(paths, summarizer, concurrency=concurrency).run())
+
+
+def test_summaries_are_written_next_to_the_contexts(paths):
+    manager = save_sessions(paths)
+    report = summarize(paths, CountingSummarizer())
+
+    assert (report.summarized, report.skipped, report.failed) == (3, 0, 0)
+    for session_id in SESSIONS:
+        summary = (paths.contexts / f"{session_id}{SUMMARY_SUFFIX}").read_text()
+        assert summary.startswith(f"# {session_id}")
+        # From the spoken part of the context, without the prompt
+        assert f"user: Let's plan {session_id}." in summary
+        assert "You are Xperto" not in summary
+
+    # The checkpoint isn't taken for a context file
+    assert sorted(path.name for path in paths.contexts.glob("*.json")) == [
+        f"{session_id}.json" for session_id in SESSIONS
+    ]
+    assert [info.session_id for info in manager.list_saved_contexts()] == SESSIONS[::-1]
+
+
+def test_unchanged_sessions_are_skipped(paths):
+    save_sessions(paths)
+    summarize(paths, CountingSummarizer())
+
+    summarizer = CountingSummarizer()
+    report = summarize(paths, summarizer)
+    assert (report.summarized, report.skipped) == (0, 3)
+    assert not summarizer.texts
+
+    # A changed session is summarized again
+    manager = ConversationContextManager(paths.contexts)
+    messages = [{"role": "user", "content": "Something new"}]
+    manager.save_context(OpenAILLMContext(messages=messages), SESSIONS[1])
+    report = summarize(paths, summarizer)
+    assert (report.summarized, report.skipped) == (1, 2)
+    assert summarizer.texts == ["user: Something new"]
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(paths):
+    save_sessions(paths)
+
+    async def interrupted_run():
+        summarizer = CountingSummarizer(block_after=2)
+        task = asyncio.create_task(BatchSummarizer(paths, summarizer, concurrency=1).run())
+        await summarizer.blocked.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return summarizer
+
+    first = asyncio.run(interrupted_run())
+    assert len(first.texts) == 2
+
+    second = CountingSummarizer()
+    report = summarize(paths, second)
+    assert (report.summarized, report.skipped) == (1, 2)
+    # Oldest first, the newest session was left
+    assert second.texts == [f"user: Let's plan {SESSIONS[2]}.\nassistant: Sure."]
+
+
+def test_legacy_checkpoint_is_moved(paths):
+    save_sessions(paths)
+    batch = BatchSummarizer(paths, CountingSummarizer())
+    asyncio.run(batch.run())
+    batch.checkpoint_file.rename(paths.contexts / LEGACY_CHECKPOINT_NAME)
+
+    report = summarize(paths, CountingSummarizer())
+    assert report.skipped == 3
+    assert not (paths.contexts / LEGACY_CHECKPOINT_NAME).exists()
+    assert batch.checkpoint_file.exists()
+
+
+def test_sessions_are_matched_to_their_transcripts(paths):
+    linked, unlinked, without = SESSIONS
+    # The linked transcript was sharded by the janitor already
+    shard = paths.transcripts / "2026-01-01"
+    shard.mkdir(parents=True)
+    (shard / "20260101_120001_bot.log").write_text("Anna: linked transcript\n")
+    # Started right after the unlinked session, and one too late to belong to it
+    (paths.transcripts / "20260102_120030_bot.log").write_text("Ben: matched by time\n")
+    (paths.transcripts / "20260102_121000_bot.log").write_text("Ben: another meeting\n")
+    save_sessions(paths, transcript_files={linked: ["20260101_120001_bot.log"]})
+
+    batch = BatchSummarizer(paths, CountingSummarizer())
+    jobs = {job.session.session_id: job for job in batch.collect_jobs()}
+    assert jobs[linked].transcripts == [shard / "20260101_120001_bot.log"]
+    assert jobs[linked].text == "Anna: linked transcript\n"
+    assert jobs[unlinked].transcripts == [paths.transcripts / "20260102_120030_bot.log"]
+    assert jobs[unlinked].text == "Ben: matched by time\n"
+    # No transcript, summarized from the context
+    assert jobs[without].transcripts == []
+    assert jobs[without].text.startswith("user: Let's plan")
@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+import pipecat
+import pytest
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+
+from xperto.utils import batched_vad
+from xperto.utils.batched_vad import (
+    SILERO_SESSION_PIPECAT_VERSIONS,
+    BatchedSileroVADAnalyzer,
+    SileroBatcher,
+    _load_silero_session,
+)
+
+SAMPLE_RATE = 16000
+WINDOW_BYTES = 512 * 2
+
+
+def audio(seed: int, secs: float = 2.0) -> bytes:
+    """Noise with bursts of a voice-like tone."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * secs)) / SAMPLE_RATE
+    bursts = np.sin(2 * np.pi * (1 + seed) * t) > 0
+    samples = rng.normal(0, 500, len(t)) + 8000 * np.sin(2 * np.pi * 180 * t) * bursts
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def confidences(analyzer, data: bytes) -> list[float]:
+    analyzer.set_sample_rate(SAMPLE_RATE)
+    # pipecat's analyzer returns a one-element array, the batched one a float
+    return [
+        np.ravel(analyzer.voice_confidence(data[pos : pos + WINDOW_BYTES]))[0].item()
+        for pos in range(0, len(data) - WINDOW_BYTES + 1, WINDOW_BYTES)
+    ]
+
+
+def test_installed_pipecat_is_supported():
+    # A pipecat upgrade fails here first, rerun the equivalence test below and add it
+    assert pipecat.__version__ in SILERO_SESSION_PIPECAT_VERSIONS
+    assert _load_silero_session() is not None
+
+
+def test_moved_session_fails_loudly(monkeypatch):
+    monkeypatch.setattr(batched_vad, "SileroVADAnalyzer", lambda: object())
+    with pytest.raises(RuntimeError, match="_model.session"):
+        _load_silero_session()
+
+
+def test_batched_confidences_match_per_session_silero():
+    sessions = [audio(seed) for seed in range(3)]
+    expected = [confidences(SileroVADAnalyzer(), data) for data in sessions]
+
+    # A generous wait, so the sessions reliably share batches
+    batcher = SileroBatcher(max_wait_secs=0.05)
+    analyzers = [BatchedSileroVADAnalyzer(batcher=batcher) for _ in sessions]
+    results: list[list[float]] = [[] for _ in sessions]
+
+    def feed(i: int):
+        results[i] = confidences(analyzers[i], sessions[i])
+
+    threads = [threading.Thread(target=feed, args=(i,)) for i in range(len(sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert batcher.stats["mean_batch_size"] > 1
+    for got, want in zip(results, expected):
+        assert got == pytest.approx(want, abs=1e-4)
+    # The model state carries over between windows, the confidences aren't all alike
+    assert max(expected[0]) - min(expected[0]) > 0.1
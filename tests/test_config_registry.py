@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from xperto.config import AppConfig
+from xperto.utils.config_registry import ConfigRegistry
+
+
+def write(path, text: str):
+    """Write the file with a newer mtime, however coarse the file system's clock."""
+    mtime_ns = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def make_registry(tmp_path, **kwargs):
+    persona, intro = tmp_path / "persona.md", tmp_path / "intro.md"
+    write(persona, "You are Xperto.")
+    write(intro, "Say hello.")
+    config_path = tmp_path / "bot.yaml"
+    write(
+        config_path,
+        f"bot:\n  language: EN\nprompts:\n  persona: {persona}\n  intro: {intro}\n",
+    )
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return AppConfig.load_from_yaml(str(config_path))
+
+    registry = ConfigRegistry(loader, config_path=config_path, **kwargs)
+    return registry, config_path, persona, loads
+
+
+def test_changed_prompt_bumps_the_version(tmp_path):
+    registry, _, persona, _ = make_registry(tmp_path)
+    swaps = []
+    registry.add_listener(lambda old, new: swaps.append((old.version, new.version)))
+    first = registry.current
+
+    assert not registry.reload_if_changed()
+    write(persona, "You are Experte.")
+    assert registry.reload_if_changed()
+
+    assert registry.current.persona_prompt == "You are Experte."
+    assert registry.current.version != first.version
+    assert swaps == [(first.version, registry.current.version)]
+
+
+def test_touched_file_keeps_the_version(tmp_path):
+    registry, _, persona, loads = make_registry(tmp_path)
+    version = registry.current.version
+
+    write(persona, persona.read_text())
+    assert not registry.reload_if_changed()
+    assert registry.current.version == version and len(loads) == 2
+
+
+def test_broken_yaml_keeps_the_previous_snapshot(tmp_path):
+    registry, config_path, _, loads = make_registry(tmp_path)
+    snapshot = registry.current
+
+    good_yaml = config_path.read_text()
+    write(config_path, "bot: [unclosed\n")
+    assert not registry.reload_if_changed()
+    assert registry.current is snapshot
+    # The same broken file isn't loaded again on every poll
+    assert not registry.reload_if_changed()
+    assert len(loads) == 2
+
+    write(config_path, good_yaml.replace("language: EN", "language: DE"))
+    assert registry.reload_if_changed()
+    assert registry.current.config.bot.language == "DE"
+
+
+def test_watching_polls_for_changes(tmp_path):
+    registry, _, persona, _ = make_registry(tmp_path, poll_interval_secs=0.05)
+    version = registry.current.version
+
+    async def run():
+        registry.start_watching()
+        write(persona, "You are Experte.")
+        await asyncio.sleep(0.3)
+        await registry.stop_watching()
+
+    asyncio.run(run())
+    assert registry.current.version != version
+    assert registry.current.persona_prompt == "You are Experte."
@@ -0,0 +1,77 @@
+import json
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.utils.blob_store import BLOB_KEY, BLOBS_DIR
+from xperto.utils.context_manager import BLOB_MIN_CHARS, ConversationContextManager
+
+RESULT = "Search result line. " * (BLOB_MIN_CHARS // 10)
+
+
+def make_context(result: str = RESULT) -> OpenAILLMContext:
+    return OpenAILLMContext(
+        [
+            {"role": "system", "content": "You are Xperto."},
+            {"role": "user", "content": "Search the web"},
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "id": "call1",
+                        "type": "function",
+                        "function": {"name": "web_search", "arguments": "{}"},
+                    }
+                ],
+            },
+            {"role": "tool", "tool_call_id": "call1", "content": result},
+            {"role": "tool", "tool_call_id": "call2", "content": "short result"},
+        ]
+    )
+
+
+def blob_files(contexts_dir):
+    return list((contexts_dir / BLOBS_DIR).rglob("*.gz"))
+
+
+def test_saved_file_holds_references_only(tmp_path):
+    manager = ConversationContextManager(tmp_path)
+    path = manager.save_context(make_context(), "session1")
+
+    text = path.read_text()
+    assert RESULT not in text
+    messages = json.loads(text)["messages"]
+    assert set(messages[3]) == {"role", "tool_call_id", BLOB_KEY}
+    # Small results stay inline
+    assert messages[4]["content"] == "short result"
+
+
+def test_blobs_are_shared_across_sessions(tmp_path):
+    manager = ConversationContextManager(tmp_path)
+    manager.save_context(make_context(), "session1")
+    ConversationContextManager(tmp_path).save_context(make_context(), "session2")
+    assert len(blob_files(tmp_path)) == 1
+
+    manager.save_context(make_context(RESULT + "changed"), "session3")
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_load_restores_the_content(tmp_path):
+    context = make_context()
+    ConversationContextManager(tmp_path).save_context(context, "session1")
+
+    loaded, metadata = ConversationContextManager(tmp_path).load_context("session1")
+    assert loaded.messages == context.messages
+    assert metadata["session_id"] == "session1"
+
+
+def test_missing_blob_becomes_a_placeholder(tmp_path):
+    ConversationContextManager(tmp_path).save_context(make_context(), "session1")
+    for path in blob_files(tmp_path):
+        path.unlink()
+
+    loaded, _ = ConversationContextManager(tmp_path).load_context("session1")
+    assert loaded.messages[3] == {
+        "role": "tool",
+        "tool_call_id": "call1",
+        "content": "[Tool result no longer available]",
+    }
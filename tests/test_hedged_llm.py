@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+import pytest
+from openai import NOT_GIVEN, BadRequestError
+
+from stub_llm import StubLLMServer
+from xperto.utils.hedged_llm import HedgedOpenAILLMService
+
+HEDGE_DELAY_SECS = 0.3
+
+
+async def create_service(primary: StubLLMServer, secondary: StubLLMServer, **kwargs):
+    service = HedgedOpenAILLMService(
+        api_key="test",
+        base_url=primary.base_url,
+        model="primary-model",
+        secondary_base_url=secondary.base_url,
+        secondary_model="secondary-model",
+        initial_delay_secs=HEDGE_DELAY_SECS,
+        min_delay_secs=0.1,
+        **kwargs,
+    )
+    # A client's first request is slow (connection pool setup), keep it out of the timings
+    await service._client.models.list()
+    await service._secondary_client.models.list()
+    return service
+
+
+async def complete(service: HedgedOpenAILLMService) -> str:
+    messages = [{"role": "user", "content": "hi"}]
+    stream = await service.get_chat_completions(
+        {"messages": messages, "tools": NOT_GIVEN, "tool_choice": NOT_GIVEN}
+    )
+    text = ""
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            text += chunk.choices[0].delta.content
+    return text
+
+
+async def wait_for_streams(*servers: StubLLMServer):
+    """Until every request was either streamed completely or aborted."""
+    for _ in range(100):
+        if all(len(s.requests) == s.finished + s.aborted for s in servers if s.status == 200):
+            return
+        await asyncio.sleep(0.05)
+
+
+def test_fast_primary_is_not_hedged():
+    async def run():
+        async with StubLLMServer("primary") as primary, StubLLMServer("secondary") as secondary:
+            service = await create_service(primary, secondary)
+            assert await complete(service) == "primary"
+            assert service.hedges_fired == 0
+            assert not secondary.requests
+
+    asyncio.run(run())
+
+
+def test_hedge_fires_after_delay_and_first_streamer_wins():
+    async def run():
+        async with (
+            StubLLMServer("primary", first_chunk_delay_secs=2.0) as primary,
+            StubLLMServer("secondary") as secondary,
+        ):
+            service = await create_service(primary, secondary)
+            start = time.monotonic()
+            assert await complete(service) == "secondary"
+            assert time.monotonic() - start < 1.0
+
+            hedged_after = secondary.requests[0][0] - primary.requests[0][0]
+            assert HEDGE_DELAY_SECS - 0.05 <= hedged_after < HEDGE_DELAY_SECS + 0.3
+            assert secondary.requests[0][1]["model"] == "secondary-model"
+            assert (service.hedges_fired, service.hedges_won) == (1, 1)
+
+            # The slow primary is cancelled, not streamed to the end
+            await wait_for_streams(primary, secondary)
+            assert primary.aborted == 1 and primary.finished == 0
+
+    asyncio.run(run())
+
+
+def test_hedge_loses_and_is_cancelled():
+    async def run():
+        async with (
+            StubLLMServer("primary", first_chunk_delay_secs=0.5) as primary,
+            StubLLMServer("secondary", first_chunk_delay_secs=2.0) as secondary,
+        ):
+            service = await create_service(primary, secondary)
+            assert await complete(service) == "primary"
+            assert (service.hedges_fired, service.hedges_won) == (1, 0)
+
+            await wait_for_streams(primary, secondary)
+            assert secondary.aborted == 1 and secondary.finished == 0
+
+    asyncio.run(run())
+
+
+def test_failover_to_secondary():
+    async def run():
+        async with (
+            StubLLMServer("primary", status=400) as primary,
+            StubLLMServer("secondary") as secondary,
+        ):
+            service = await create_service(primary, secondary)
+            start = time.monotonic()
+            assert await complete(service) == "secondary"
+            # Fired right away, not after the hedge delay
+            assert time.monotonic() - start < HEDGE_DELAY_SECS
+            assert (service.hedges_fired, service.hedges_won) == (1, 1)
+
+    asyncio.run(run())
+
+
+def test_primary_error_when_both_fail():
+    async def run():
+        async with (
+            StubLLMServer(status=400) as primary,
+            StubLLMServer(status=400) as secondary,
+        ):
+            service = await create_service(primary, secondary)
+            with pytest.raises(BadRequestError):
+                await complete(service)
+            assert len(primary.requests) == len(secondary.requests) == 1
+
+    asyncio.run(run())
+
+
+def test_hedge_rate_and_adaptive_delay():
+    async def run():
+        async with StubLLMServer("primary") as primary, StubLLMServer("secondary") as secondary:
+            service = await create_service(primary, secondary)
+            for _ in range(10):
+                await complete(service)
+            # Fast first chunks bring the delay down from its initial value, not always
+            # to the minimum on a loaded machine
+            assert 0.1 <= service.hedge_delay_secs() < HEDGE_DELAY_SECS
+
+            primary.first_chunk_delay_secs = 1.0
+            for _ in range(2):
+                assert await complete(service) == "secondary"
+
+            stats = service.hedge_stats
+            assert stats["requests"] == 12
+            assert stats["hedges_fired"] == 2
+            assert stats["hedges_won"] == 2
+            assert stats["hedge_rate"] == pytest.approx(2 / 12)
+            await wait_for_streams(primary, secondary)
+
+    asyncio.run(run())
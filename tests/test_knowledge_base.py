@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from xperto.config import KnowledgeBaseConfig
+from xperto.utils.knowledge_base import BUILDS_DIR, KnowledgeBase, build_index
+
+
+def write_docs(source_dir, topic: str):
+    source_dir.mkdir(exist_ok=True)
+    (source_dir / "a.md").write_text(f"# Guide\n\nThe {topic} setup is described here.")
+    (source_dir / "b.txt").write_text(f"Notes about {topic} and more {topic}.")
+
+
+def test_rebuild_swaps_in_a_new_build(tmp_path):
+    source_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    write_docs(source_dir, "alpha")
+    assert build_index(source_dir, index_dir).rebuilt
+    old = KnowledgeBase(index_dir)
+    # Read the old meta, as a session starting to open the index during the rebuild
+    old_meta = json.loads((index_dir / "meta.json").read_text())
+
+    write_docs(source_dir, "betalongerword")
+    report = build_index(source_dir, index_dir)
+    assert report.rebuilt and report.indexed == 2
+    new = KnowledgeBase(index_dir)
+
+    assert [r["source"] for r in new.search("betalongerword")] == ["b.txt", "a.md"]
+    assert new.search("alpha") == []
+    # The old build is still complete and consistent
+    assert [r["source"] for r in old.search("alpha")] == ["b.txt", "a.md"]
+    assert (index_dir / BUILDS_DIR / old_meta["build"]).is_dir()
+
+
+def test_unchanged_documents_keep_the_build(tmp_path):
+    source_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    write_docs(source_dir, "alpha")
+    build_index(source_dir, index_dir)
+    report = build_index(source_dir, index_dir)
+    assert not report.rebuilt and report.reused == 2
+
+
+def test_only_the_last_builds_are_kept(tmp_path):
+    source_dir, index_dir = tmp_path / "docs", tmp_path / "index"
+    for topic in ("one", "two", "three", "four"):
+        write_docs(source_dir, topic)
+        build_index(source_dir, index_dir)
+    builds = sorted(path.name for path in (index_dir / BUILDS_DIR).iterdir())
+    assert len(builds) == 2
+    assert json.loads((index_dir / "meta.json").read_text())["build"] == builds[-1]
+    assert KnowledgeBase(index_dir).search("four")
+
+
+def test_index_dir_is_expanded_by_default():
+    config = KnowledgeBaseConfig()
+    assert config.index_dir == Path.home() / ".xperto" / "kb_index"
+    assert KnowledgeBaseConfig(source_dir="~/docs").source_dir == Path.home() / "docs"
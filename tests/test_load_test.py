@@ -0,0 +1,55 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+# The bot pulls in the local audio transport
+pytest.importorskip("pyaudio")
+
+import xperto  # noqa: E402
+from xperto.config import AppConfig, PathsConfig, PromptsConfig  # noqa: E402
+from xperto.utils.load_test import format_report, run_load_test  # noqa: E402
+
+PROMPTS_DIR = Path(xperto.__file__).parent / "prompts"
+
+
+def test_two_sessions_in_transcripts_mode(tmp_path):
+    config = AppConfig(
+        prompts=PromptsConfig(
+            persona=PROMPTS_DIR / "Experto_EN.md", intro=PROMPTS_DIR / "intro_EN.md"
+        ),
+        paths=PathsConfig(
+            recordings=tmp_path / "recordings",
+            transcripts=tmp_path / "transcripts",
+            contexts=tmp_path / "contexts",
+            metrics=tmp_path / "metrics",
+        ),
+    )
+    # Both seeded participants finish an utterance or a pause within the measured step
+    report, report_path = asyncio.run(
+        run_load_test(
+            config,
+            max_sessions=2,
+            step_sessions=2,
+            step_secs=5.0,
+            settle_secs=2.0,
+            mode="transcripts",
+        )
+    )
+
+    assert (report.mode, report.vad) == ("transcripts", "energy")
+    (step,) = report.steps
+    assert step.sessions == 2
+    assert step.wall_secs == pytest.approx(5.0, abs=0.5)
+    assert step.cpu_cores > 0 and step.rss_mb > 0
+    assert step.loop_lag_p50_ms <= step.loop_lag_p99_ms <= step.loop_lag_max_ms
+    # Transcripts have no audio deadlines to miss every 20ms, only utterance ends
+    assert step.deadline_miss_rate < 1.0
+    assert step.output_underruns >= 0
+    assert report.max_sustainable_sessions == (2 if step.sustainable else 0)
+
+    assert json.loads(report_path.read_text())["steps"][0]["sessions"] == 2
+    assert "Max sustainable sessions" in format_report(report)
+    # The sessions wrote to their own temp folders, not to the configured paths
+    assert not (tmp_path / "recordings").exists()
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pipecat.frames.frames import (
+    Frame,
+    InputAudioRawFrame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.tests.utils import SleepFrame, run_test
+
+from xperto.utils import local_whisper_stt
+from xperto.utils.local_whisper_stt import (
+    DEFAULT_WHISPER_MODEL,
+    LocalWhisperSTTService,
+    whisper_model_name,
+)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms
+
+
+class FakeWhisperModel:
+    """Transcribes any audio as its length, records how it was asked."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, language=None, **kwargs):
+        self.calls.append(kwargs)
+        segment = SimpleNamespace(text=f"{len(audio) / SAMPLE_RATE:.1f}s", no_speech_prob=0.0)
+        return iter([segment]), None
+
+
+class TranscriptRecorder(FrameProcessor):
+    def __init__(self):
+        super().__init__()
+        self.frames: list[Frame] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, (InterimTranscriptionFrame, TranscriptionFrame)):
+            self.frames.append(frame)
+        await self.push_frame(frame, direction)
+
+
+def speech(secs: float) -> list[Frame]:
+    """Audio in 20ms frames, with pauses for the interim decodes to run."""
+    audio = b"\x01\x00" * FRAME_SAMPLES
+    frames = []
+    for n in range(int(secs / 0.02)):
+        frames.append(InputAudioRawFrame(audio=audio, sample_rate=SAMPLE_RATE, num_channels=1))
+        if n % 10 == 9:
+            frames.append(SleepFrame(0.05))
+    return frames
+
+
+def test_interim_transcripts_while_speaking_then_one_final(monkeypatch):
+    model = FakeWhisperModel()
+    monkeypatch.setitem(local_whisper_stt._models, ("fake", "cpu", "int8"), model)
+    stt = LocalWhisperSTTService(
+        model="fake", device="cpu", compute_type="int8", interim_interval_secs=0.5
+    )
+    recorder = TranscriptRecorder()
+
+    frames = [
+        UserStartedSpeakingFrame(),
+        *speech(2.0),
+        UserStoppedSpeakingFrame(),
+        SleepFrame(0.3),
+        # Audio after the turn (VAD says nobody speaks) gets no interim transcripts
+        *speech(1.0),
+        SleepFrame(0.3),
+    ]
+    asyncio.run(run_test(Pipeline([stt, recorder]), frames_to_send=frames))
+
+    interims = [f for f in recorder.frames if isinstance(f, InterimTranscriptionFrame)]
+    finals = [f for f in recorder.frames if isinstance(f, TranscriptionFrame)]
+    assert len(finals) == 1 and recorder.frames[-1] is finals[0]
+    assert len(interims) >= 2
+    # Every interim decodes the segment so far, greedily
+    lengths = [float(f.text.rstrip("s")) for f in interims]
+    assert lengths == sorted(lengths) and lengths[-1] <= 2.0
+    assert model.calls[0]["beam_size"] == 1
+
+
+def test_whisper_model_name():
+    assert whisper_model_name(None) == DEFAULT_WHISPER_MODEL
+    assert whisper_model_name("") == DEFAULT_WHISPER_MODEL
+    assert whisper_model_name("distil-large-v3") == "distil-large-v3"
+    assert whisper_model_name("Systran/faster-whisper-small") == "Systran/faster-whisper-small"
+    with pytest.raises(ValueError):
+        whisper_model_name("nova-2-general")
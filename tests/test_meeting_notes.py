@@ -0,0 +1,59 @@
+import pytest
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.utils.meeting_notes import RECAP_PATTERN, MeetingNotes, RecapProcessor
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Xperto, what have we discussed so far?",
+        "what did we decide about the budget",
+        "Can you recap the meeting?",
+        "summarize what we discussed",
+        "give us a summary of the call",
+        "please summarize this conversation",
+        "sum it up so far",
+        "Was haben wir bisher besprochen?",
+        "Xperto, fasse das Meeting zusammen",
+        "fass mal zusammen, was wir entschieden haben",
+        "Gib mir eine Zusammenfassung des heutigen Meetings",
+    ],
+)
+def test_recap_questions(question):
+    assert RECAP_PATTERN.search(question)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "summarize the page you just fetched",
+        "give me a summary of that article",
+        "can you recap what the docs say about rate limits",
+        "Fasse den Artikel zusammen",
+        "Zusammenfassung der Webseite bitte",
+    ],
+)
+def test_other_summaries_are_not_recaps(question):
+    assert not RECAP_PATTERN.search(question)
+
+
+def create_processor(notes: dict) -> RecapProcessor:
+    meeting_notes = MeetingNotes(api_key="test", model="test", state={"notes": notes})
+    return RecapProcessor(meeting_notes, prefix=lambda: [])
+
+
+def recap_context() -> OpenAILLMContext:
+    return OpenAILLMContext(
+        messages=[{"role": "user", "content": "Xperto, what have we discussed so far?"}]
+    )
+
+
+def test_recap_from_notes():
+    processor = create_processor({"summary": "Budget review"})
+    assert processor._recap_question(recap_context()) is not None
+
+
+def test_recap_from_full_context_without_notes():
+    processor = create_processor({})
+    assert processor._recap_question(recap_context()) is None
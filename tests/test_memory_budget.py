@@ -0,0 +1,59 @@
+import json
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.utils.blob_store import BLOB_KEY
+from xperto.utils.context_manager import ConversationContextManager
+from xperto.utils.memory_budget import approx_size, spill_tool_results, spilled_blob
+
+
+def tool_messages(sizes):
+    messages = [{"role": "system", "content": "You are a bot."}]
+    for n, size in enumerate(sizes):
+        messages.append(
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "id": f"call{n}",
+                        "type": "function",
+                        "function": {"name": "f", "arguments": "{}"},
+                    }
+                ],
+            }
+        )
+        messages.append({"role": "tool", "tool_call_id": f"call{n}", "content": str(n) * size})
+    return messages
+
+
+def test_spill_moves_the_largest_old_results_to_the_blob_store(tmp_path):
+    manager = ConversationContextManager(tmp_path)
+    messages = tool_messages([10_000, 50_000, 20_000, 30_000])
+    original = [message.get("content") for message in messages]
+
+    budget = approx_size(messages) - 40_000
+    freed = spill_tool_results(messages, budget, manager.blobs, keep_recent=2)
+
+    assert freed >= 40_000
+    # The 50k result is spilled, the last one is recent and kept
+    digest = spilled_blob(messages[4])
+    assert digest is not None and manager.blobs.get(digest) == original[4]
+    assert messages[-1]["content"] == original[-1]
+    assert spilled_blob(messages[2]) is None
+    assert messages[3]["tool_calls"][0]["id"] == messages[4]["tool_call_id"]
+
+
+def test_spilled_results_are_saved_as_references_and_restored(tmp_path):
+    manager = ConversationContextManager(tmp_path)
+    context = OpenAILLMContext(tool_messages([50_000, 100]))
+    original = context.messages[2]["content"]
+    spill_tool_results(
+        context.messages, approx_size(context.messages) - 40_000, manager.blobs, keep_recent=0
+    )
+
+    saved = json.loads(manager.save_context(context, "session").read_text())
+    assert BLOB_KEY in saved["messages"][2] and "content" not in saved["messages"][2]
+    assert saved["messages"][4]["content"] == "1" * 100
+
+    loaded, _ = ConversationContextManager(tmp_path).load_context("session")
+    assert loaded.messages[2]["content"] == original
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from importlib.metadata import version
+
+from pipecat.frames.frames import Frame, TextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.tests.utils import run_test
+
+from xperto.utils.pipeline_instrumentation import PipelineInstrumentation, queue_depth
+
+PIPECAT_VERSION = version("pipecat-ai")
+
+
+class SlowProcessor(FrameProcessor):
+    """Holds up the first text frame so the following ones queue up behind it."""
+
+    def __init__(self):
+        super().__init__()
+        self.depths: list[int] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, TextFrame) and not self.depths:
+            await asyncio.sleep(0.2)
+            self.depths.append(queue_depth(self))
+        await self.push_frame(frame, direction)
+
+
+def test_queue_depth_reads_pipecats_private_queues():
+    processor = SlowProcessor()
+    frames = [TextFrame(f"Frame {n}") for n in range(5)]
+    asyncio.run(run_test(processor, frames_to_send=frames, expected_down_frames=[TextFrame] * 5))
+
+    # queue_depth falls back to 0 if the attributes are gone, make that fail here instead
+    for attr in ("_FrameProcessor__input_queue", "_FrameProcessor__process_queue"):
+        assert hasattr(processor, attr), (
+            f"pipecat-ai {PIPECAT_VERSION} has no FrameProcessor.{attr}, update queue_depth()"
+        )
+    assert processor.depths[0] >= 4, f"queue_depth() misreads pipecat-ai {PIPECAT_VERSION}"
+
+
+def test_frames_are_counted_and_timed(tmp_path):
+    snapshot_path = tmp_path / "instrumentation.jsonl"
+    instrumentation = PipelineInstrumentation(sample_every=2, snapshot_path=snapshot_path)
+    processor = instrumentation.instrument([SlowProcessor()])[0]
+
+    async def run():
+        instrumentation.start()
+        await run_test(
+            processor,
+            frames_to_send=[TextFrame(f"Frame {n}") for n in range(6)],
+            expected_down_frames=[TextFrame] * 6,
+        )
+        await instrumentation.stop()
+
+    asyncio.run(run())
+
+    (snapshot,) = [json.loads(line) for line in snapshot_path.read_text().splitlines()]
+    (stats,) = snapshot["processors"]
+    assert stats["name"] == processor.name
+    assert stats["frames_per_sec_by_type"]["TextFrame"] > 0
+    # Every frame is counted, only every second one is timed
+    assert stats["processing"]["count"] == stats["frames_total"] // 2
+    assert stats["processing"]["max_us"] >= 200_000
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from pipecat.adapters.schemas.function_schema import FunctionSchema
+from pipecat.adapters.schemas.tools_schema import ToolsSchema
+from pipecat.frames.frames import LLMFullResponseEndFrame, LLMTextFrame, MetricsFrame
+from pipecat.metrics.metrics import LLMTokenUsage, LLMUsageMetricsData
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.tests.utils import SleepFrame, run_test
+
+from xperto.utils.context_manager import ConversationContextManager
+from xperto.utils.prompt_cache import PromptCache, prefix_fingerprint
+
+PREFIX = [
+    {"role": "system", "content": "You are Xperto, a meeting assistant."},
+    {"role": "system", "content": "Introduce yourself briefly."},
+]
+TOOLS = ToolsSchema(
+    standard_tools=[
+        FunctionSchema(
+            name="web_search",
+            description="Search the web",
+            properties={"query": {"type": "string"}},
+            required=["query"],
+        )
+    ]
+)
+
+
+def make_context(messages) -> OpenAILLMContext:
+    return OpenAILLMContext([dict(message) for message in messages], tools=TOOLS)
+
+
+def test_prefix_fingerprint_survives_a_resume(tmp_path):
+    cache = PromptCache()
+    cache.set_prefix(PREFIX, TOOLS)
+    fingerprint = cache.fingerprint
+
+    context = make_context(PREFIX + [{"role": "user", "content": "Hi"}])
+    manager = ConversationContextManager(tmp_path)
+    manager.save_context(context, "session1")
+    resumed, _ = ConversationContextManager(tmp_path).load_context("session1")
+
+    # The tools come back as provider JSON, the prompt bytes must not change
+    assert not cache.apply(resumed)
+    assert prefix_fingerprint(resumed.messages[: len(PREFIX)], resumed.tools) == fingerprint
+    cache.set_prefix(PREFIX, TOOLS)
+    assert cache.fingerprint == fingerprint
+
+
+def test_dynamic_messages_stay_after_the_prefix():
+    cache = PromptCache()
+    cache.set_prefix(PREFIX, TOOLS)
+    history = [
+        {"role": "user", "content": "What's the agenda?"},
+        {"role": "assistant", "content": "Budget and hiring."},
+        {"role": "system", "content": "Meeting notes: budget approved."},
+        {"role": "user", "content": "And next?"},
+    ]
+    # A session resumed with the prompts of an older config
+    context = make_context([{"role": "system", "content": "You are Experte."}] + history)
+
+    assert cache.apply(context)
+    assert context.messages == PREFIX + history
+    assert not cache.apply(context)
+
+
+def test_guard_repairs_a_changed_prefix():
+    cache = PromptCache()
+    cache.set_prefix(PREFIX, TOOLS)
+    changed = make_context(PREFIX + [{"role": "user", "content": "Hi"}])
+    changed.messages[0]["content"] += " Today is Monday."
+
+    asyncio.run(
+        run_test(
+            cache.guard(),
+            frames_to_send=[OpenAILLMContextFrame(changed)],
+            expected_down_frames=[OpenAILLMContextFrame],
+        )
+    )
+    assert changed.messages[: len(PREFIX)] == PREFIX
+    assert cache.prefix_repairs == 1
+
+
+def usage_frame(prompt_tokens: int, cached_tokens: int) -> MetricsFrame:
+    usage = LLMTokenUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=5,
+        total_tokens=prompt_tokens + 5,
+        cache_read_input_tokens=cached_tokens,
+    )
+    return MetricsFrame(data=[LLMUsageMetricsData(processor="llm", model="gpt-4.1", value=usage)])
+
+
+def test_cached_tokens_are_recorded_per_turn(tmp_path):
+    metrics_path = tmp_path / "prompt_cache.jsonl"
+    cache = PromptCache(metrics_path)
+    cache.set_prefix(PREFIX, TOOLS)
+    context = make_context(PREFIX + [{"role": "user", "content": "Hi"}])
+
+    frames = []
+    for prompt_tokens, cached_tokens in ((1500, 0), (1600, 1280)):
+        frames += [
+            OpenAILLMContextFrame(context),
+            SleepFrame(0.02),
+            LLMTextFrame("Hello"),
+            # Metrics are system frames, keep them in order with the response
+            SleepFrame(0.02),
+            usage_frame(prompt_tokens, cached_tokens),
+            SleepFrame(0.02),
+            LLMFullResponseEndFrame(),
+            SleepFrame(0.02),
+        ]
+    asyncio.run(run_test(Pipeline([cache.guard(), cache.metrics()]), frames_to_send=frames))
+
+    records = [json.loads(line) for line in metrics_path.read_text().splitlines()]
+    assert [(r["prompt_tokens"], r["cached_tokens"]) for r in records] == [(1500, 0), (1600, 1280)]
+    assert all(r["prefix"] == cache.fingerprint and r["ttfb_ms"] is not None for r in records)
+    assert cache.stats["turns"] == 2
+    assert cache.stats["cached_ratio"] == 1280 / 3100
+    assert cache.stats["mean_ttfb_cached_ms"] is not None
+    assert cache.stats["mean_ttfb_uncached_ms"] is not None
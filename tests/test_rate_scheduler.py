@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from openai import AsyncOpenAI, RateLimitError
+
+from stub_llm import StubLLMServer
+from xperto.utils.rate_scheduler import (
+    Priority,
+    RateScheduler,
+    rate_limited_http_client,
+    request_priority,
+)
+
+SERVER_REQUESTS_PER_SEC = 10
+
+
+def create_client(server: StubLLMServer, scheduler: RateScheduler | None) -> AsyncOpenAI:
+    http_client = rate_limited_http_client(scheduler) if scheduler else None
+    # No client retries, every 429 fails the request
+    return AsyncOpenAI(
+        api_key="test", base_url=server.base_url, http_client=http_client, max_retries=0
+    )
+
+
+async def complete(client: AsyncOpenAI, content: str, priority: Priority = Priority.LIVE):
+    request_priority.set(priority)
+    stream = await client.chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": content}], stream=True
+    )
+    async for _ in stream:
+        pass
+
+
+async def burst(client: AsyncOpenAI, requests: int) -> list:
+    return await asyncio.gather(
+        *(complete(client, "hi") for _ in range(requests)), return_exceptions=True
+    )
+
+
+def test_unscheduled_burst_runs_into_429s():
+    async def run():
+        async with StubLLMServer(max_requests_per_sec=SERVER_REQUESTS_PER_SEC) as server:
+            results = await burst(create_client(server, None), 30)
+            assert server.rejected >= 10
+            assert sum(isinstance(result, RateLimitError) for result in results) == server.rejected
+
+    asyncio.run(run())
+
+
+def test_scheduled_burst_gets_no_429s():
+    async def run():
+        async with StubLLMServer(max_requests_per_sec=SERVER_REQUESTS_PER_SEC) as server:
+            # The stub counts a sliding second, the buckets allow a full burst
+            # on top of the rate, so schedule at half the server's limit
+            scheduler = RateScheduler("test", requests_per_min=SERVER_REQUESTS_PER_SEC * 30)
+            results = await burst(create_client(server, scheduler), 20)
+            assert results == [None] * 20
+            assert server.rejected == 0
+            assert scheduler.throttled == 0
+
+    asyncio.run(run())
+
+
+def test_live_requests_go_before_background_requests():
+    async def run():
+        async with StubLLMServer(max_requests_per_sec=SERVER_REQUESTS_PER_SEC) as server:
+            scheduler = RateScheduler("test", requests_per_min=SERVER_REQUESTS_PER_SEC * 30)
+            client = create_client(server, scheduler)
+            await client.models.list()
+            # Empty the bucket, so every request below has to queue
+            while scheduler._delay(0, time.monotonic()) <= 0:
+                scheduler._take(0)
+
+            background = [
+                asyncio.create_task(complete(client, "background", Priority.BACKGROUND))
+                for _ in range(5)
+            ]
+            await asyncio.sleep(0.05)
+            live = [asyncio.create_task(complete(client, "live")) for _ in range(3)]
+            await asyncio.gather(*background, *live)
+
+            order = [body["messages"][0]["content"] for _, body in server.requests]
+            assert order == ["live"] * 3 + ["background"] * 5
+            assert server.rejected == 0
+            stats = scheduler.stats
+            assert stats["live_mean_wait_ms"] < stats["background_mean_wait_ms"]
+
+    asyncio.run(run())
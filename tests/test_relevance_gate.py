@@ -0,0 +1,79 @@
+import asyncio
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    LLMMessagesAppendFrame,
+    TranscriptionFrame,
+)
+from pipecat.tests.utils import run_test
+
+from xperto.utils.relevance_gate import HeuristicRelevanceClassifier, RelevanceGate
+
+WAKE_PHRASES = ["Experto", "Ex Perto"]
+
+
+def transcription(text: str) -> TranscriptionFrame:
+    return TranscriptionFrame(text=text, user_id="user", timestamp="")
+
+
+def test_classifier_passes_names_questions_requests_and_statements():
+    classifier = HeuristicRelevanceClassifier(WAKE_PHRASES)
+    assert classifier.is_addressed("Experto")
+    assert classifier.is_addressed("okay ex perto")
+    assert classifier.is_addressed("<S1>Was ist das</S1>")
+    assert classifier.is_addressed("budget numbers?")
+    assert classifier.is_addressed("please recap")
+    assert classifier.is_addressed("The rollout starts next Monday in Berlin")
+
+
+def test_classifier_holds_back_filler_and_short_remarks():
+    classifier = HeuristicRelevanceClassifier(WAKE_PHRASES)
+    assert not classifier.is_addressed("")
+    assert not classifier.is_addressed("<S2>uh okay</S2>")
+    assert not classifier.is_addressed("ja genau, danke")
+    assert not classifier.is_addressed("fine by me")
+    # Tags don't count as words or names
+    assert not classifier.is_addressed("<Experto>hmm</Experto>")
+
+
+def test_gate_appends_unaddressed_speech_without_running_the_llm():
+    gate = RelevanceGate(HeuristicRelevanceClassifier(WAKE_PHRASES), reply_window_secs=0.0)
+    down, _ = asyncio.run(
+        run_test(
+            gate,
+            frames_to_send=[transcription("uh okay"), transcription("Experto, what's next?")],
+            expected_down_frames=[LLMMessagesAppendFrame, TranscriptionFrame],
+        )
+    )
+    assert down[0].run_llm is False
+    assert down[0].messages == [{"role": "user", "content": "uh okay"}]
+    assert down[1].text == "Experto, what's next?"
+    assert gate.stats["utterances_gated"] == 1 and gate.stats["utterances_passed"] == 1
+
+
+def test_gate_passes_replies_while_and_after_the_bot_speaks():
+    gate = RelevanceGate(HeuristicRelevanceClassifier(WAKE_PHRASES), reply_window_secs=60.0)
+    down, _ = asyncio.run(
+        run_test(
+            gate,
+            frames_to_send=[
+                BotStartedSpeakingFrame(),
+                transcription("yes"),
+                BotStoppedSpeakingFrame(),
+                transcription("okay"),
+            ],
+            # System frames overtake the queued transcriptions
+            expected_down_frames=[
+                BotStartedSpeakingFrame,
+                BotStoppedSpeakingFrame,
+                TranscriptionFrame,
+                TranscriptionFrame,
+            ],
+        )
+    )
+    assert [frame.text for frame in down if isinstance(frame, TranscriptionFrame)] == [
+        "yes",
+        "okay",
+    ]
+    assert gate.stats["utterances_gated"] == 0
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import signal
+import threading
+
+from xperto.utils.sampling_profiler import (
+    SamplingProfiler,
+    install_profile_toggle,
+    remove_profile_toggle,
+)
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def read_folded(path) -> dict:
+    stacks = {}
+    for line in path.read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    return stacks
+
+
+def test_samples_a_busy_thread(tmp_path):
+    profiler = SamplingProfiler(tmp_path, "session1", "my config;v2", interval_secs=0.005)
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy worker;1")
+
+    async def run():
+        thread.start()
+        profiler.start()
+        await asyncio.sleep(0.3)
+        profiler.stop()
+        stop.set()
+
+    asyncio.run(run())
+    thread.join()
+
+    stacks = read_folded(profiler.stacks_file)
+    # The busy thread holds the GIL most of the time, the sampler gets fewer turns
+    assert profiler.samples >= 5
+    assert sum(stacks.values()) >= profiler.samples
+    for stack in stacks:
+        # The capture tag is escaped like the frames, the format stays parsable
+        assert stack.split(";")[0].startswith("my_config:v2:session1:")
+        assert " " not in stack
+    busy = [s for s in stacks if s.split(";")[1] == "busy_worker:1"]
+    assert busy and all("busy_loop_(test_sampling_profiler.py:" in s for s in busy)
+
+
+def test_lag_file_has_a_header_per_capture(tmp_path):
+    profiler = SamplingProfiler(tmp_path, "session1", "default")
+
+    async def run():
+        for _ in range(2):
+            profiler.start()
+            await asyncio.sleep(0.35)
+            profiler.stop()
+            # The capture tag has a resolution of a second
+            await asyncio.sleep(1.0)
+
+    asyncio.run(run())
+
+    records = [json.loads(line) for line in profiler.lag_file.read_text().splitlines()]
+    headers = [n for n, record in enumerate(records) if "capture" in record]
+    assert len(headers) == 2 and headers[0] == 0
+    assert records[0]["session_id"] == "session1" and records[0]["interval_ms"] == 100
+    assert records[0]["capture"] != records[headers[1]]["capture"]
+    for start, end in ((headers[0], headers[1]), (headers[1], len(records))):
+        lags = records[start + 1 : end]
+        assert lags and all("lag_ms" in record for record in lags)
+
+
+def test_start_stop_and_toggle_are_idempotent(tmp_path):
+    profiler = SamplingProfiler(tmp_path, "session1", "default")
+
+    async def run():
+        profiler.stop()
+        assert not profiler.running and not profiler.lag_file.exists()
+
+        profiler.start()
+        thread = profiler._thread
+        profiler.start()
+        assert profiler._thread is thread
+        await asyncio.sleep(0.05)
+        profiler.stop()
+        profiler.stop()
+        assert not profiler.running
+
+        profiler.toggle()
+        assert profiler.running
+        profiler.toggle()
+        assert not profiler.running
+
+    asyncio.run(run())
+    assert not any(t.name == "sampling-profiler" for t in threading.enumerate())
+    records = [json.loads(line) for line in profiler.lag_file.read_text().splitlines()]
+    assert sum("capture" in record for record in records) == 2
+
+
+def test_toggle_signal_handler_is_removed(tmp_path):
+    profiler = SamplingProfiler(tmp_path, "session1", "default")
+
+    async def run():
+        assert install_profile_toggle(profiler)
+        assert signal.getsignal(signal.SIGUSR2) not in (signal.SIG_DFL, None)
+        remove_profile_toggle()
+
+    asyncio.run(run())
+    assert signal.getsignal(signal.SIGUSR2) == signal.SIG_DFL
@@ -0,0 +1,23 @@
+import asyncio
+import json
+import wave
+
+from xperto.utils.segmented_recorder import MANIFEST_NAME, SegmentedRecorder
+
+
+def test_chunks_without_limits_go_into_one_file_per_track(tmp_path):
+    recorder = SegmentedRecorder(tmp_path, "bot", segment_secs=0, segment_max_bytes=0)
+    chunk = b"\x01\x00" * 16000
+
+    async def record():
+        for _ in range(5):
+            await recorder.on_track_audio_data(None, chunk, chunk, 16000, 1)
+        await recorder.close()
+
+    asyncio.run(record())
+
+    manifest = json.loads((recorder.session_folder / MANIFEST_NAME).read_text())
+    assert sorted(segment["track"] for segment in manifest["segments"]) == ["bot", "user"]
+    for segment in manifest["segments"]:
+        with wave.open(str(recorder.session_folder / segment["file"]), "rb") as wf:
+            assert wf.getnframes() == 5 * 16000
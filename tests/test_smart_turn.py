@@ -0,0 +1,54 @@
+import pytest
+
+from xperto.utils.smart_turn import TurnEvalReport, TurnReplay, score_replay
+
+SILENCE_TRIGGER_SECS = 0.5
+
+
+def test_turn_ends_are_matched_to_speech_ends():
+    replay = TurnReplay(
+        # A 0.8s pause within the first turn, then a long pause before the last one
+        speech_starts=[0.0, 2.3, 6.0],
+        speech_ends=[1.5, 3.0, 7.0],
+        # Before any speech ended (ignored), after the 2nd and 3rd speech end
+        smart_turn_ends=[0.2, 3.4, 7.3],
+    )
+    silence, smart_turn = score_replay(replay, SILENCE_TRIGGER_SECS)
+
+    # The silence trigger ends every pause longer than 0.5s, including the
+    # one the user spoke on after
+    assert (silence.mode, silence.turns, silence.false_cutoffs) == ("silence", 3, 1)
+    assert silence.latencies_secs == pytest.approx([0.5, 0.5, 0.5])
+    assert silence.false_cutoff_rate == pytest.approx(1 / 3)
+
+    assert (smart_turn.mode, smart_turn.turns, smart_turn.false_cutoffs) == ("smart_turn", 2, 0)
+    assert smart_turn.latencies_secs == pytest.approx([0.4, 0.3])
+    assert smart_turn.median_latency_ms == pytest.approx(350)
+
+
+def test_short_pauses_are_no_turns_for_the_silence_trigger():
+    replay = TurnReplay(speech_starts=[0.0, 1.9], speech_ends=[1.5, 4.0], smart_turn_ends=[1.7])
+    silence, smart_turn = score_replay(replay, SILENCE_TRIGGER_SECS)
+
+    assert silence.latencies_secs == pytest.approx([0.5])
+    assert silence.false_cutoffs == 0
+    # Smart-turn ended the turn in the 0.4s pause
+    assert (smart_turn.turns, smart_turn.false_cutoffs) == (1, 1)
+    assert smart_turn.median_latency_ms == pytest.approx(200)
+
+
+def test_reports_of_tracks_are_merged():
+    report = TurnEvalReport("smart_turn")
+    for latencies, cutoffs in (([0.1, 0.3], 1), ([0.9], 0)):
+        report.merge(
+            TurnEvalReport(
+                "smart_turn",
+                files=1,
+                turns=len(latencies),
+                false_cutoffs=cutoffs,
+                latencies_secs=latencies,
+            )
+        )
+    assert (report.files, report.turns, report.false_cutoffs) == (2, 3, 1)
+    assert report.median_latency_ms == pytest.approx(300)
+    assert TurnEvalReport("silence").median_latency_ms == 0.0
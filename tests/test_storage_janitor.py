@@ -0,0 +1,92 @@
+import os
+import random
+import time
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.config import PathsConfig, StorageConfig, StorageQuotaConfig
+from xperto.utils.blob_store import BLOBS_DIR
+from xperto.utils.context_manager import ConversationContextManager
+from xperto.utils.storage_janitor import DAY_SECS, StorageJanitor
+
+PAGE_CHARS = 200_000
+
+
+def page(seed: int) -> str:
+    # Random text, so the gzipped blobs stay large
+    rng = random.Random(seed)
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(PAGE_CHARS))
+
+
+def save_session(manager: ConversationContextManager, day: int, pages: list[str]) -> str:
+    session_id = f"202601{day:02d}_120000_test"
+    messages = [{"role": "user", "content": "fetch it"}]
+    messages += [{"role": "tool", "tool_call_id": str(i), "content": p} for i, p in enumerate(pages)]
+    manager.save_context(OpenAILLMContext(messages=messages), session_id)
+    return session_id
+
+
+def age_files(folder, days: float):
+    timestamp = time.time() - days * DAY_SECS
+    for path in folder.rglob("*"):
+        if path.is_file():
+            os.utime(path, (timestamp, timestamp))
+
+
+def create_janitor(tmp_path, contexts_dir, **quota) -> StorageJanitor:
+    paths = PathsConfig(
+        recordings=tmp_path / "recordings",
+        transcripts=tmp_path / "transcripts",
+        contexts=contexts_dir,
+    )
+    return StorageJanitor(paths, StorageConfig(contexts=StorageQuotaConfig(**quota)))
+
+
+def folder_size(folder) -> int:
+    return sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+
+
+def test_size_quota_counts_and_frees_blobs(tmp_path):
+    contexts_dir = tmp_path / "contexts"
+    manager = ConversationContextManager(contexts_dir)
+    shared = page(0)
+    sessions = [save_session(manager, day, [shared, page(day)]) for day in range(1, 6)]
+    age_files(contexts_dir, 10)
+    # Oldest first, as the janitor deletes them
+    for day, session_id in enumerate(sessions, start=1):
+        context_file = contexts_dir / f"{session_id}.json"
+        timestamp = time.time() - (20 - day) * DAY_SECS
+        os.utime(context_file, (timestamp, timestamp))
+    assert len(list((contexts_dir / BLOBS_DIR).rglob("*.gz"))) == 6
+
+    # Room for about three sessions' blobs
+    max_size = 3.5 * folder_size(contexts_dir / BLOBS_DIR) / 6
+    create_janitor(tmp_path, contexts_dir, max_size_mb=max_size / 1024 / 1024).sweep()
+
+    assert folder_size(contexts_dir) <= max_size
+    remaining = ConversationContextManager(contexts_dir).list_saved_contexts()
+    assert 0 < len(remaining) < len(sessions)
+    # The newest sessions are kept, with their blobs
+    for info in remaining:
+        context, _ = ConversationContextManager(contexts_dir).load_context(info.session_id)
+        day = int(info.session_id[6:8])
+        assert [m["content"] for m in context.messages[1:]] == [shared, page(day)]
+    assert len(list((contexts_dir / BLOBS_DIR).rglob("*.gz"))) == len(remaining) + 1
+
+
+def test_unreferenced_blobs_are_deleted_without_quota(tmp_path):
+    contexts_dir = tmp_path / "contexts"
+    manager = ConversationContextManager(contexts_dir)
+    kept = save_session(manager, 1, [page(1)])
+    deleted = save_session(manager, 2, [page(2)])
+    age_files(contexts_dir, 10)
+    next(contexts_dir.glob(f"{deleted}.json")).unlink()
+    # A blob a save is about to reference
+    fresh_digest = manager.blobs.put(page(3))
+
+    create_janitor(tmp_path, contexts_dir).sweep()
+
+    blobs = {path.name[: -len(".gz")] for path in (contexts_dir / BLOBS_DIR).rglob("*.gz")}
+    assert blobs == {manager.blobs.put(page(1)), fresh_digest}
+    context, _ = ConversationContextManager(contexts_dir).load_context(kept)
+    assert context.messages[1]["content"] == page(1)
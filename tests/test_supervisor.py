@@ -0,0 +1,83 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from xperto.utils.context_manager import ConversationContextManager
+from xperto.utils.supervisor import WorkerSupervisor
+
+STUB_WORKER = Path(__file__).parent / "stub_worker.py"
+STARTUP_SECS = 0.3
+
+
+class StubWorkerSupervisor(WorkerSupervisor):
+    def _worker_command(self) -> list[str]:
+        # [python, -m, xperto.runner, *args]
+        return [sys.executable, str(STUB_WORKER), *super()._worker_command()[3:]]
+
+
+def read_workers(state_dir: Path) -> list[dict]:
+    workers_file = state_dir / "workers.jsonl"
+    if not workers_file.exists():
+        return []
+    return [json.loads(line) for line in workers_file.read_text().splitlines()]
+
+
+def wait_for(condition, timeout_secs: float = 10.0):
+    deadline = time.monotonic() + timeout_secs
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_killed_worker_is_restarted_and_resumed(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_WORKER_DIR", str(tmp_path))
+    monkeypatch.setenv("STUB_WORKER_STARTUP_SECS", str(STARTUP_SECS))
+    contexts_dir = tmp_path / "contexts"
+    session_id = ConversationContextManager(contexts_dir).generate_session_id()
+    supervisor = StubWorkerSupervisor(
+        ["--config", "default"], contexts_dir, session_id, "20260101_120000_bot.log"
+    )
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(returncode=supervisor.run()))
+    thread.start()
+    try:
+        wait_for(lambda: len(read_workers(tmp_path)) == 1)
+        # The worker saved the context before it gets killed
+        context = OpenAILLMContext(messages=[{"role": "user", "content": "hello"}])
+        ConversationContextManager(contexts_dir).save_context(context, session_id)
+        time.sleep(STARTUP_SECS + 0.2)
+        os.kill(read_workers(tmp_path)[0]["pid"], signal.SIGKILL)
+
+        wait_for(lambda: supervisor.recovery_secs)
+    finally:
+        (tmp_path / "stop").touch()
+        thread.join(timeout=10)
+
+    assert result["returncode"] == 0
+    # Recovered as soon as the new worker started up
+    assert STARTUP_SECS <= supervisor.recovery_secs[0] < STARTUP_SECS + 2.0
+
+    first, second = [worker["args"] for worker in read_workers(tmp_path)]
+    assert "--resume" not in first
+    assert second[second.index("--resume") + 1] == session_id
+    for args in (first, second):
+        assert args[args.index("--session-id") + 1] == session_id
+        assert args[args.index("--transcript-file") + 1] == "20260101_120000_bot.log"
+
+
+def test_gives_up_after_repeated_crashes(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_WORKER_DIR", str(tmp_path))
+    monkeypatch.setenv("STUB_WORKER_CRASH", "1")
+    supervisor = StubWorkerSupervisor(
+        [], tmp_path / "contexts", "20260101_120000_test", "bot.log", max_restarts=1
+    )
+    assert supervisor.run() == 1
+    # Restarted once right away, then given up
+    assert len(read_workers(tmp_path)) == 2
+    assert not supervisor.recovery_secs
@@ -0,0 +1,21 @@
+from xperto.utils.transcript_handler import TranscriptHandler
+
+
+def test_recovered_lines_become_one_note(tmp_path):
+    handler = TranscriptHandler(tmp_path, file_name="bot.log")
+    saved = "[2026-01-01T12:00:00] user alice: before the save\n"
+    handler.output_file.write_text(
+        saved
+        + "[2026-01-01T12:00:05] user bob: lunch at noon?\n"
+        + "[2026-01-01T12:00:07] user alice: Xperto, what's the budget?\n"
+        + "[2026-01-01T12:00:09] assistant bot: 40k for this quarter.\n"
+    )
+
+    messages = handler.read_messages(len(saved.encode()))
+    assert [message["role"] for message in messages] == ["user", "user", "assistant"]
+
+    note = handler.recovery_note(messages)
+    assert note["role"] == "system"
+    assert "user: lunch at noon?" in note["content"]
+    assert "assistant: 40k for this quarter." in note["content"]
+    assert "before the save" not in note["content"]
@@ -0,0 +1,71 @@
+import asyncio
+
+from pipecat.frames.frames import TranscriptionFrame
+from pipecat.tests.utils import run_test
+
+from xperto.utils.wake_check_buffer import WakeCheckBuffer, parse_speaker_tag
+
+
+def said(speaker: str, text: str, passive: bool = False) -> TranscriptionFrame:
+    text = f"<{speaker}>{text}</{speaker}>"
+    if passive:
+        text = f"<PASSIVE>{text}</PASSIVE>"
+    return TranscriptionFrame(text=text, user_id="", timestamp="")
+
+
+def make_buffer(**kwargs) -> WakeCheckBuffer:
+    # No keepalive, so everyone is IDLE from their first frame on
+    return WakeCheckBuffer(["hey xperto"], keepalive_timeout_secs=0, per_speaker=True, **kwargs)
+
+
+def test_parse_speaker_tag():
+    assert parse_speaker_tag(said("S1", "Hello")) == ("S1", False)
+    assert parse_speaker_tag(said("S2", "Hello", passive=True)) == ("S2", True)
+    untagged = TranscriptionFrame(text="Hello", user_id="participant1", timestamp="")
+    assert parse_speaker_tag(untagged) == ("participant1", False)
+
+
+def test_waking_releases_only_that_speakers_buffer():
+    buffer = make_buffer()
+    frames = [
+        said("S1", "Did you see the budget?"),
+        said("S2", "Not yet, it's late."),
+        said("S2", "Let me check."),
+        said("S3", "Background chatter", passive=True),
+        said("S1", "Hey Xperto, summarize it"),
+    ]
+    down, _ = asyncio.run(
+        run_test(
+            buffer,
+            frames_to_send=frames,
+            expected_down_frames=[TranscriptionFrame, TranscriptionFrame],
+        )
+    )
+
+    assert [frame.text for frame in down] == [frames[0].text, frames[4].text]
+    assert len(buffer._speakers["S2"].frame_buffer) == 2
+    assert "S3" not in buffer._speakers
+    assert buffer.stats["wakeups"] == 1 and buffer.stats["frames_dropped_passive"] == 1
+
+
+def test_speaker_buffer_is_bounded():
+    buffer = make_buffer(max_buffered_frames=3)
+    frames = [said("S1", f"Sentence {n}.") for n in range(5)] + [said("S1", "Hey Xperto")]
+    down, _ = asyncio.run(
+        run_test(buffer, frames_to_send=frames, expected_down_frames=[TranscriptionFrame] * 3)
+    )
+
+    # Only the newest frames are released, the oldest were dropped
+    assert [frame.text for frame in down] == [frame.text for frame in frames[3:]]
+    assert buffer.stats["frames_discarded"] == 3
+
+
+def test_per_speaker_buffer_defaults_to_a_bound():
+    buffer = make_buffer()
+    frames = [said("S1", f"Sentence {n}.") for n in range(60)]
+    asyncio.run(run_test(buffer, frames_to_send=frames, expected_down_frames=[]))
+
+    speaker = buffer._speakers["S1"]
+    assert len(speaker.frame_buffer) == WakeCheckBuffer.DEFAULT_SPEAKER_BUFFER_FRAMES
+    assert speaker.frame_buffer[0].text == frames[10].text
+    assert speaker.combined_text.startswith("<S1>Sentence 10.</S1>")
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from xperto.utils.worker_pool import WarmWorkerPool, request_join
+
+STUB_POOL_WORKER = Path(__file__).parent / "stub_pool_worker.py"
+
+
+class StubWorkerPool(WarmWorkerPool):
+    def _worker_command(self) -> list[str]:
+        return [sys.executable, str(STUB_POOL_WORKER)]
+
+
+async def wait_for(condition, timeout_secs: float = 10.0):
+    async with asyncio.timeout(timeout_secs):
+        while not condition():
+            await asyncio.sleep(0.02)
+
+
+def test_join_is_answered_before_anybody_is_greeted(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_POOL_DIR", str(tmp_path))
+    socket_path = tmp_path / "pool.sock"
+
+    async def run():
+        pool = StubWorkerPool([], socket_path, size=1)
+        serving = asyncio.create_task(pool.serve())
+        try:
+            await wait_for(lambda: any(worker.ready for worker in pool._workers))
+
+            # Nobody in the room yet, the reply doesn't wait for the greeting
+            async with asyncio.timeout(5):
+                response = await asyncio.to_thread(request_join, socket_path, "room", None)
+            assert "error" not in response
+            assert response["session_id"] == "stub-session"
+            assert 0 <= response["join_latency_secs"] < 1.0
+            assert pool.stats["joins"] == 1
+            assert pool.stats["greetings"] == 0
+
+            (tmp_path / "participant").touch()
+            await wait_for(lambda: pool.greeting_latencies)
+            assert pool.greeting_latencies[0] > response["join_latency_secs"]
+            assert pool.stats["greetings"] == 1
+        finally:
+            (tmp_path / "stop").touch()
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+            await wait_for(lambda: not pool._workers)
+
+    asyncio.run(run())